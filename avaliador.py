@@ -0,0 +1,278 @@
+import math
+
+from codigo_objeto import converter_argumento, profundidade_maxima, total_alocado
+from otimizador import OPERACOES, otimizar_instrucoes
+
+
+# Avaliação parcial do código da MaqHipo em tempo de compilação
+#
+# O programa é executado simbolicamente a partir do endereço 0. Cada
+# posição de D é conhecida (um valor, igual ao que o p2.py teria) ou
+# desconhecida (depende de lerDouble). Os valores conhecidos não geram
+# código; o que depende da entrada vira código residual, com as partes
+# conhecidas trocadas por constantes. Cada IMPR de um valor conhecido vira
+# "CRCT valor / IMPR".
+#
+# Desvios com condição conhecida são seguidos, então laços com número de
+# voltas conhecido são desenrolados (ou somem, se o corpo não depender da
+# entrada). No primeiro desvio cuja condição depende da entrada, ou quando
+# um dos orçamentos acaba, a avaliação para: o código residual grava em D
+# os valores conhecidos, recoloca na pilha o que estava nela e desvia para
+# o ponto correspondente do código original, que vem logo depois.
+#
+# O código residual calcula as expressões desconhecidas na mesma ordem do
+# original, então os LEIT consomem a entrada na mesma ordem. Operações que
+# dariam erro em tempo de execução (divisão por zero) ficam no residual.
+
+PASSOS = 1_000_000
+TAMANHO = 10_000
+
+# Inteiros maiores que isso não viram constantes no código residual
+MAIOR_INTEIRO = 2 ** 63
+
+UNARIAS = {
+    "INVE": lambda a: -a,
+    "NEGA": lambda a: 1 - a,
+}
+BINARIAS = dict(OPERACOES)
+BINARIAS["CONJ"] = lambda a, b: 1 if (a == 1 and b == 1) else 0
+BINARIAS["DISJ"] = lambda a, b: 1 if (a == 1 or b == 1) else 0
+
+
+class Parar(Exception):
+    """A avaliação não pode seguir a partir da instrução atual."""
+
+
+class Conhecido:
+    def __init__(self, valor):
+        self.valor = valor
+
+    def codigo(self):
+        return [("CRCT", _texto(self.valor))]
+
+
+class Residual:
+    """Valor calculado em tempo de execução pelas instruções em self.instrucoes."""
+
+    def __init__(self, instrucoes):
+        self.instrucoes = instrucoes
+
+    def codigo(self):
+        return self.instrucoes
+
+
+def _texto(valor):
+    """Constante como o p2.py a leria de volta com o mesmo tipo (int ou float)."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise Parar()
+    if isinstance(valor, int):
+        if abs(valor) >= MAIOR_INTEIRO:
+            raise Parar()
+        return str(valor)
+    # repr de float sempre tem ".", "e", "inf" ou "nan", então não volta como int
+    return repr(valor)
+
+
+def _mesmo(a, b):
+    return type(a) is type(b) and (a == b or (isinstance(a, float) and math.isnan(a) and math.isnan(b)))
+
+
+class Avaliador:
+    def __init__(self, instrucoes, passos=PASSOS, tamanho=TAMANHO):
+        self.instrucoes = instrucoes
+        self.passos = passos
+        self.tamanho = tamanho
+        self.conhecidos = {}
+        # Valor que está de fato em D na execução do residual, quando se sabe
+        self.memoria = {}
+        self.alocadas = 0
+        self.pilha = []
+        self.residual = []
+        self.impressoes = 0
+        self.desvios = 0
+        self.executadas = 0
+        # Endereço do original em que a avaliação parou (None: foi até o fim)
+        self.parada = None
+        self.aplicada = False
+
+    def emitir(self, instrucoes):
+        self.residual.extend(instrucoes)
+
+    def avaliar(self):
+        """Executa até parar; o endereço da parada fica em self.parada."""
+        pc = 0
+        fim = len(self.instrucoes)
+        while pc < fim:
+            if self.executadas >= self.passos or len(self.residual) >= self.tamanho:
+                self.parada = pc
+                return
+            try:
+                proximo = self.passo(pc)
+            except Parar:
+                self.parada = pc
+                return
+            self.executadas += 1
+            if proximo is None:
+                return
+            pc = proximo
+
+    def resumo(self):
+        if not self.aplicada:
+            return "Avaliação parcial: nenhum desvio decidido nem valor impresso; código mantido."
+        fim = ("programa inteiro avaliado" if self.parada is None
+               else f"segue no original a partir do endereço {self.parada}")
+        return (f"Avaliação parcial: {self.executadas} instruções executadas, "
+                f"{self.impressoes} impressões pré-calculadas; {fim}.")
+
+    def passo(self, pc):
+        """Executa a instrução pc; devolve o próximo pc, ou None depois de PARA."""
+        nome, arg = self.instrucoes[pc]
+        pilha = self.pilha
+        if nome == "INPP":
+            pilha.clear()
+            self.emitir([("INPP", None)])
+        elif nome == "ALME":
+            for x in range(self.alocadas, self.alocadas + int(arg)):
+                self.conhecidos[x] = self.memoria[x] = 0
+            self.alocadas += int(arg)
+            self.emitir([("ALME", arg)])
+        elif nome == "CRCT":
+            valor = converter_argumento(arg)
+            _texto(valor)
+            pilha.append(Conhecido(valor))
+        elif nome == "CRVL":
+            x = int(arg)
+            if x in self.conhecidos:
+                pilha.append(Conhecido(self.conhecidos[x]))
+            else:
+                pilha.append(Residual([("CRVL", x)]))
+        elif nome == "LEIT":
+            pilha.append(Residual([("LEIT", None)]))
+        elif nome in BINARIAS:
+            if len(pilha) < 2:
+                raise Parar()
+            b = pilha.pop()
+            a = pilha.pop()
+            pilha.append(self.operar(nome, BINARIAS[nome], a, b))
+        elif nome in UNARIAS:
+            if not pilha:
+                raise Parar()
+            pilha.append(self.operar(nome, UNARIAS[nome], pilha.pop()))
+        elif nome in ("ARMZ", "IMPR"):
+            # Um residual abaixo do topo seria calculado depois desta instrução
+            if not pilha or any(isinstance(e, Residual) for e in pilha[:-1]):
+                raise Parar()
+            valor = pilha.pop()
+            if nome == "IMPR":
+                if isinstance(valor, Conhecido):
+                    self.impressoes += 1
+                self.emitir(valor.codigo() + [("IMPR", None)])
+            else:
+                self.armazenar(int(arg), valor)
+        elif nome == "DSVF":
+            if not pilha or not isinstance(pilha[-1], Conhecido):
+                raise Parar()
+            self.desvios += 1
+            return int(arg) if pilha.pop().valor == 0 else pc + 1
+        elif nome == "DSVI":
+            self.desvios += 1
+            return int(arg)
+        elif nome == "PARA":
+            self.emitir([("PARA", None)])
+            return None
+        else:
+            raise Parar()
+        return pc + 1
+
+    def operar(self, nome, operacao, *operandos):
+        if all(isinstance(e, Conhecido) for e in operandos):
+            try:
+                resultado = operacao(*(e.valor for e in operandos))
+                _texto(resultado)
+                return Conhecido(resultado)
+            except (ArithmeticError, TypeError, Parar):
+                pass
+        codigo = []
+        for e in operandos:
+            codigo.extend(e.codigo())
+        return Residual(codigo + [(nome, None)])
+
+    def armazenar(self, x, valor):
+        if isinstance(valor, Conhecido):
+            self.conhecidos[x] = valor.valor
+        else:
+            self.emitir(valor.codigo() + [("ARMZ", x)])
+            self.conhecidos.pop(x, None)
+            self.memoria.pop(x, None)
+
+    def desviar_para_original(self, pc):
+        """Código que leva o estado simbólico para D e para a pilha antes de seguir em pc."""
+        codigo = []
+        for e in self.pilha:
+            codigo.extend(e.codigo())
+        for x, valor in sorted(self.conhecidos.items()):
+            if x not in self.memoria or not _mesmo(self.memoria[x], valor):
+                codigo.extend(Conhecido(valor).codigo() + [("ARMZ", x)])
+        return codigo
+
+
+def avaliar_instrucoes(instrucoes, passos=PASSOS, tamanho=TAMANHO):
+    """Avalia pares (nome, argumento); devolve (lista de pares, Avaliador).
+
+    passos limita as instruções executadas na avaliação e tamanho o número
+    de instruções do código residual. Se a avaliação parar antes de
+    decidir algum desvio ou imprimir algum valor, o código volta intacto.
+    """
+    instrucoes = list(instrucoes)
+    avaliador = Avaliador(instrucoes, passos, tamanho)
+    avaliador.avaliar()
+    pc = avaliador.parada
+    if pc is not None and not (avaliador.desvios or avaliador.impressoes):
+        return instrucoes, avaliador
+    avaliador.aplicada = True
+    if pc is None:
+        return _completar_memoria(avaliador.residual, instrucoes), avaliador
+
+    # Residual, desvio para pc no original e o original inteiro, deslocado
+    novo = avaliador.residual + avaliador.desviar_para_original(pc)
+    deslocamento = len(novo) + 1
+    novo.append(("DSVI", pc + deslocamento))
+    for nome, arg in instrucoes:
+        novo.append((nome, int(arg) + deslocamento if nome in ("DSVI", "DSVF") else arg))
+    # O começo do original (INPP, ALME, ...) que já foi avaliado fica inalcançável
+    novo, _ = otimizar_instrucoes(novo, ["codigo_morto"])
+    return _completar_memoria(novo, instrucoes), avaliador
+
+
+def _alocado(instrucoes):
+    return total_alocado(*zip(*instrucoes)) if instrucoes else 0
+
+
+def _completar_memoria(novo, instrucoes):
+    """Garante em novo pelo menos as posições que os ALME de instrucoes alocam.
+
+    Os endereços das variáveis são fixados na compilação, então um ALME
+    que a avaliação não executou (o de uma declaração dentro de um laço
+    de zero voltas, por exemplo) deixaria sem posição as variáveis
+    declaradas depois dele. A diferença vira um ALME logo depois do INPP.
+    """
+    falta = _alocado(instrucoes) - _alocado(novo)
+    if falta <= 0:
+        return novo
+    posicao = 1 if novo and novo[0][0] == "INPP" else 0
+    novo = [(nome, arg + 1 if nome in ("DSVI", "DSVF") and arg >= posicao else arg)
+            for nome, arg in novo]
+    novo.insert(posicao, ("ALME", falta))
+    return novo
+
+
+def avaliar_gerador(gerador, passos=PASSOS, tamanho=TAMANHO):
+    """Aplica avaliar_instrucoes() ao código do gerador; devolve o Avaliador."""
+    novo, avaliador = avaliar_instrucoes(gerador.instrucoes(), passos, tamanho)
+    gerador.substituir(novo)
+    # Recolocar a pilha e gravar os conhecidos pode passar da altura medida na
+    # emissão, e um laço desenrolado repete o ALME das declarações do corpo
+    nomes, args = zip(*gerador.instrucoes()) if len(gerador) else ((), ())
+    gerador.alturaMaxima = max(gerador.alturaMaxima, profundidade_maxima(nomes, args))
+    gerador.contadorEndRel = total_alocado(nomes, args)
+    return avaliador
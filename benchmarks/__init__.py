@@ -0,0 +1 @@
+# Benchmarks do compilador (p1.py) e da MaqHipo (p2.py); ver benchmarks/__main__.py
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import platform
+import sys
+
+from benchmarks.gerador import gerar_programa
+from benchmarks.medicoes import medir_analise, medir_lexico, medir_vm
+
+
+# python -m benchmarks
+#
+# Gera os programas sintéticos do tamanho escolhido, mede cada estágio e
+# compara com a linha de base gravada (benchmarks/linha_de_base.json).
+# Uma métrica regrediu quando fica abaixo de (1 - tolerância) vezes o
+# valor da linha de base; nesse caso o comando termina com código 1.
+
+LINHA_DE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linha_de_base.json")
+TOLERANCIA = 0.25
+
+# (programa para léxico/análise, programa para a VM)
+TAMANHOS = {
+    "pequeno": (dict(variaveis=50, comandos=300, profundidade=4, tamanho_expressao=10, iteracoes=1),
+                dict(variaveis=20, comandos=20, profundidade=3, tamanho_expressao=6, iteracoes=2000)),
+    "medio": (dict(variaveis=200, comandos=2000, profundidade=6, tamanho_expressao=20, iteracoes=1),
+              dict(variaveis=30, comandos=30, profundidade=4, tamanho_expressao=8, iteracoes=20000)),
+    "grande": (dict(variaveis=500, comandos=10000, profundidade=8, tamanho_expressao=40, iteracoes=1),
+               dict(variaveis=40, comandos=40, profundidade=5, tamanho_expressao=10, iteracoes=100000)),
+}
+
+ESTAGIOS = ("lexico", "analise", "vm")
+
+
+def medir(tamanho, estagios=ESTAGIOS, repeticoes=5, semente=0):
+    compilacao, execucao = TAMANHOS[tamanho]
+    fonte = gerar_programa(semente=semente, **compilacao)
+    metricas = {}
+    if "lexico" in estagios:
+        metricas.update(medir_lexico(fonte, repeticoes))
+    if "analise" in estagios:
+        metricas.update(medir_analise(fonte, repeticoes))
+    if "vm" in estagios:
+        metricas.update(medir_vm(gerar_programa(semente=semente, **execucao), repeticoes))
+    return metricas
+
+
+def comparar(metricas, base):
+    """Devolve uma lista de (métrica, atual, base, variação, regrediu)."""
+    tolerancias = base.get("tolerancias", {})
+    linhas = []
+    for nome, atual in metricas.items():
+        referencia = base["metricas"].get(nome)
+        if not referencia:
+            linhas.append((nome, atual, None, None, False))
+            continue
+        variacao = atual / referencia - 1
+        limite = tolerancias.get(nome, base.get("tolerancia", TOLERANCIA))
+        linhas.append((nome, atual, referencia, variacao, variacao < -limite))
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Mede léxico, análise, geração de código e a MaqHipo.")
+    parser.add_argument("--tamanho", choices=sorted(TAMANHOS), default="pequeno")
+    parser.add_argument("--estagios", default=",".join(ESTAGIOS),
+                        help=f"estágios separados por vírgula (padrão: {','.join(ESTAGIOS)})")
+    parser.add_argument("--repeticoes", type=int, default=5, help="cada medição é o melhor de N execuções")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--linha-de-base", default=LINHA_DE_BASE)
+    parser.add_argument("--gravar", action="store_true", help="grava o resultado como nova linha de base")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="queda máxima aceita antes de acusar regressão, ao gravar (padrão: 0.25)")
+    parser.add_argument("--json", default=None, help="grava também o resultado neste arquivo")
+    opcoes = parser.parse_args()
+
+    estagios = [e for e in opcoes.estagios.split(",") if e]
+    for estagio in estagios:
+        if estagio not in ESTAGIOS:
+            parser.error(f"estágio desconhecido: {estagio}")
+
+    metricas = medir(opcoes.tamanho, estagios, opcoes.repeticoes, opcoes.semente)
+    resultado = {
+        "tamanho": opcoes.tamanho,
+        "semente": opcoes.semente,
+        "python": platform.python_version(),
+        "metricas": metricas,
+    }
+    if opcoes.json:
+        with open(opcoes.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=1)
+
+    base = None
+    if not opcoes.gravar and os.path.exists(opcoes.linha_de_base):
+        with open(opcoes.linha_de_base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if (base.get("tamanho"), base.get("semente")) != (opcoes.tamanho, opcoes.semente):
+            print(f"Linha de base é de outro tamanho/semente ({base.get('tamanho')}, {base.get('semente')}); "
+                  "sem comparação.")
+            base = None
+
+    regressoes = 0
+    print(f"{'métrica':<34}{'atual':>14}{'base':>14}{'variação':>10}")
+    if base is None:
+        for nome, atual in metricas.items():
+            print(f"{nome:<34}{atual:>14,.0f}")
+    else:
+        for nome, atual, referencia, variacao, regrediu in comparar(metricas, base):
+            if referencia is None:
+                print(f"{nome:<34}{atual:>14,.0f}{'-':>14}")
+                continue
+            marca = "  REGRESSÃO" if regrediu else ""
+            regressoes += regrediu
+            print(f"{nome:<34}{atual:>14,.0f}{referencia:>14,.0f}{variacao:>+10.1%}{marca}")
+
+    if opcoes.gravar:
+        resultado["tolerancia"] = opcoes.tolerancia
+        with open(opcoes.linha_de_base, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=1)
+            f.write("\n")
+        print(f"Linha de base gravada em {opcoes.linha_de_base}")
+    if regressoes:
+        print(f"{regressoes} métrica(s) abaixo da tolerância da linha de base.")
+        sys.exit(1)
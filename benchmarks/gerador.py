@@ -0,0 +1,142 @@
+import argparse
+import random
+
+
+# Gerador de programas sintéticos da linguagem do p1.py
+#
+# Os programas seguem a gramática (declarações double, atribuições,
+# System.out.println, if/else e while) e sempre terminam: o laço externo
+# roda exatamente `iteracoes` vezes e cada while interno no máximo duas.
+# Os valores ficam limitados a [0, 997): cada atribuição guarda a
+# expressão em uma temporária e depois o resto da divisão por 997, e só
+# há divisão por constantes diferentes de zero.
+
+MODULO = 997
+
+
+class Gerador:
+    def __init__(self, variaveis=50, comandos=200, profundidade=4, tamanho_expressao=8,
+                 iteracoes=1000, semente=0):
+        self.rnd = random.Random(semente)
+        self.variaveis = [f"v{i}" for i in range(max(variaveis, 2))]
+        self.comandos = comandos
+        self.profundidade = profundidade
+        self.tamanho_expressao = max(tamanho_expressao, 1)
+        self.iteracoes = iteracoes
+        self.linhas = []
+
+    def emitir(self, nivel, texto):
+        self.linhas.append("    " * nivel + texto)
+
+    def fator(self):
+        if self.rnd.random() < 0.7:
+            return self.rnd.choice(self.variaveis)
+        return str(self.rnd.randint(1, 99))
+
+    def operando(self):
+        # O menos unário só pode abrir um termo (FATOR_UN), nunca vir depois de * ou /
+        if self.rnd.random() < 0.05:
+            return f"-{self.fator()}"
+        return self.fator()
+
+    def expressao(self, n):
+        """Expressão com n operandos, parênteses e divisões só por constantes."""
+        if n <= 1:
+            return self.operando()
+        esquerda = self.rnd.randint(1, n - 1)
+        a = self.expressao(esquerda)
+        b = self.expressao(n - esquerda)
+        sorteio = self.rnd.random()
+        if sorteio < 0.1:
+            texto = f"{a} / {self.rnd.randint(2, 9)}"
+        elif sorteio < 0.25:
+            texto = f"{a} * {self.fator()}"
+        else:
+            texto = f"{a} {self.rnd.choice('+-')} {b}"
+        if self.rnd.random() < 0.3:
+            return f"({texto})"
+        return texto
+
+    def atribuicao(self, nivel):
+        destino = self.rnd.choice(self.variaveis)
+        self.emitir(nivel, f"tmp = {self.expressao(self.rnd.randint(1, self.tamanho_expressao))};")
+        self.emitir(nivel, f"{destino} = tmp - (tmp / {MODULO}) * {MODULO};")
+
+    def condicao(self):
+        a = self.expressao(self.rnd.randint(1, 3))
+        b = self.expressao(self.rnd.randint(1, 3))
+        return f"{a} {self.rnd.choice(['<', '>', '<=', '>=', '==', '!='])} {b}"
+
+    def bloco(self, nivel, profundidade):
+        for _ in range(self.rnd.randint(1, 3)):
+            self.comando(nivel, profundidade)
+
+    def comando(self, nivel, profundidade):
+        sorteio = self.rnd.random()
+        if profundidade > 0 and sorteio < 0.25:
+            self.emitir(nivel, f"if ({self.condicao()}) {{")
+            self.bloco(nivel + 1, profundidade - 1)
+            if self.rnd.random() < 0.6:
+                self.emitir(nivel, "} else {")
+                self.bloco(nivel + 1, profundidade - 1)
+            self.emitir(nivel, "}")
+        elif profundidade > 0 and sorteio < 0.32:
+            # Cada nível tem o seu contador, então whiles aninhados não interferem
+            contador = f"w{profundidade}"
+            self.emitir(nivel, f"{contador} = 0;")
+            self.emitir(nivel, f"while ({contador} < 2) {{")
+            self.bloco(nivel + 1, profundidade - 1)
+            self.emitir(nivel + 1, f"{contador} = {contador} + 1;")
+            self.emitir(nivel, "}")
+        elif sorteio < 0.36:
+            self.emitir(nivel, f"System.out.println({self.expressao(2)});")
+        else:
+            self.atribuicao(nivel)
+
+    def gerar(self):
+        self.emitir(0, "public class Sintetico {")
+        self.emitir(1, "public static void main(String[] args) {")
+        for i in range(0, len(self.variaveis), 10):
+            self.emitir(2, f"double {', '.join(self.variaveis[i:i + 10])};")
+        contadores = [f"w{k}" for k in range(1, self.profundidade + 1)]
+        self.emitir(2, f"double {', '.join(['it', 'tmp'] + contadores)};")
+        for nome in self.variaveis:
+            self.emitir(2, f"{nome} = {self.rnd.randint(1, 99)};")
+
+        self.emitir(2, "it = 0;")
+        self.emitir(2, f"while (it < {self.iteracoes}) {{")
+        for _ in range(self.comandos):
+            self.comando(3, self.rnd.randint(0, self.profundidade))
+        self.emitir(3, "it = it + 1;")
+        self.emitir(2, "}")
+        for nome in self.variaveis[:5]:
+            self.emitir(2, f"System.out.println({nome});")
+        self.emitir(1, "}")
+        self.emitir(0, "}")
+        return "\n".join(self.linhas) + "\n"
+
+
+def gerar_programa(variaveis=50, comandos=200, profundidade=4, tamanho_expressao=8,
+                   iteracoes=1000, semente=0):
+    """Devolve o texto de um programa válido com as dimensões pedidas."""
+    return Gerador(variaveis, comandos, profundidade, tamanho_expressao, iteracoes, semente).gerar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um programa sintético para o p1.py.")
+    parser.add_argument("-o", "--saida", default=None, help="arquivo de saída (padrão: stdout)")
+    parser.add_argument("--variaveis", type=int, default=50, help="número de variáveis double")
+    parser.add_argument("--comandos", type=int, default=200, help="comandos no corpo do laço externo")
+    parser.add_argument("--profundidade", type=int, default=4, help="aninhamento máximo de if/else e while")
+    parser.add_argument("--tamanho-expressao", type=int, default=8, help="máximo de operandos por expressão")
+    parser.add_argument("--iteracoes", type=int, default=1000, help="voltas do laço externo")
+    parser.add_argument("--semente", type=int, default=0)
+    opcoes = parser.parse_args()
+
+    texto = gerar_programa(opcoes.variaveis, opcoes.comandos, opcoes.profundidade,
+                           opcoes.tamanho_expressao, opcoes.iteracoes, opcoes.semente)
+    if opcoes.saida:
+        with open(opcoes.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto, end="")
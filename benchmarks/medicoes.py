@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import p1
+import p2
+from biblioteca import tabela_densa
+from estatisticas import Estatisticas
+from perfilador import perfilar
+
+
+# Medições isoladas de cada estágio. Cada função devolve um dicionário
+# {nome da métrica: valor}; todas as métricas são vazões (maior é melhor)
+# e cada medição é o melhor de `repeticoes` execuções. Uma execução
+# repete a função até somar pelo menos DURACAO_MINIMA segundos, para que
+# programas pequenos não fiquem à mercê da resolução do relógio.
+
+DURACAO_MINIMA = 0.05
+
+
+def _melhor(funcao, repeticoes):
+    """Menor tempo por chamada de funcao entre `repeticoes` execuções."""
+    melhor = None
+    for _ in range(repeticoes):
+        chamadas = 0
+        inicio = time.perf_counter()
+        while True:
+            funcao()
+            chamadas += 1
+            duracao = time.perf_counter() - inicio
+            if duracao >= DURACAO_MINIMA:
+                break
+        duracao /= chamadas
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor
+
+
+def lexar(fonte, motor="regex"):
+    return list(p1.tokens_de_linhas(fonte.splitlines(keepends=True), motor))
+
+
+def analisar(tokens, estatisticas=None):
+    """Roda o analisador denso com um gerador novo; devolve o gerador."""
+    gerador = p1.GeradorDeCodigo()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = p1.analisar_denso(tokens, tabela_densa(), gerador=gerador, estatisticas=estatisticas)
+    if not ok:
+        raise Exception("programa de benchmark não compilou")
+    return gerador
+
+
+def medir_lexico(fonte, repeticoes=5):
+    n = len(lexar(fonte))
+    return {
+        f"lexico_{motor}_tokens_s": n / _melhor(lambda: lexar(fonte, motor), repeticoes)
+        for motor in ("regex", "referencia")
+    }
+
+
+def medir_analise(fonte, repeticoes=5):
+    tokens = lexar(fonte)
+    resultado = {"analise_tokens_s": len(tokens) / _melhor(lambda: analisar(tokens), repeticoes)}
+
+    # Separação entre o laço do analisador e as ações de geração de código,
+    # com as ações cronometradas pelo --stats (os dois números incluem o
+    # custo da medição, mas são comparáveis entre execuções)
+    melhor_sintatico = melhor_acoes = None
+    for _ in range(repeticoes):
+        est = Estatisticas()
+        inicio = time.perf_counter()
+        gerador = analisar(tokens, est)
+        sintatico = time.perf_counter() - inicio - est.tempo_acoes
+        melhor_sintatico = sintatico if melhor_sintatico is None else min(melhor_sintatico, sintatico)
+        melhor_acoes = est.tempo_acoes if melhor_acoes is None else min(melhor_acoes, est.tempo_acoes)
+    resultado["sintatico_tokens_s"] = len(tokens) / max(melhor_sintatico, 1e-9)
+    resultado["geracao_instrucoes_s"] = len(gerador) / max(melhor_acoes, 1e-9)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        texto = os.path.join(diretorio, "codigo.txt")
+        binario = os.path.join(diretorio, "codigo.bin")
+        n = len(gerador)
+        resultado["escrita_texto_instrucoes_s"] = n / _melhor(lambda: gerador.salvar(texto), repeticoes)
+        resultado["escrita_binaria_instrucoes_s"] = n / _melhor(lambda: gerador.salvar_binario(binario),
+                                                                repeticoes)
+    return resultado
+
+
+MOTORES_VM = (
+    ("despacho", "despacho", False),
+    ("superinstrucoes", "despacho", True),
+    ("aot", "aot", False),
+)
+
+def medir_vm(fonte, repeticoes=5):
+    """Passos da MaqHipo por segundo, contados no código sem superinstruções."""
+    gerador = analisar(lexar(fonte))
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "codigo.txt")
+        gerador.salvar(arquivo)
+        programas = {False: p2.carregar_programa(arquivo), True: p2.carregar_programa(arquivo, True)}
+
+    descartar = lambda valor: None
+    passos = sum(perfilar(programas[False], "contagem", escrever=descartar).contagem)
+    resultado = {}
+    for nome, motor, superinstrucoes in MOTORES_VM:
+        C = programas[superinstrucoes]
+        duracao = _melhor(lambda: p2.executar(C, motor, escrever=descartar), repeticoes)
+        resultado[f"vm_{nome}_passos_s"] = passos / duracao
+    return resultado
@@ -0,0 +1,93 @@
+import threading
+
+import p1
+from gramatica import ARQUIVO_CACHE, carregar_tabela
+from avaliador import avaliar_gerador
+from fluxo import otimizar_fluxo_gerador
+from otimizador import PASSES, otimizar_gerador
+from p2 import executar
+from verificador import verificar
+
+
+# Compilação e execução em memória, como biblioteca
+#
+#   C = compilar(texto)             -> Programa (ver codigo_objeto)
+#   saidas = rodar(C, [1.0, 2.0])   -> lista com os valores de IMPR
+#
+# Cada chamada de compilar usa um GeradorDeCodigo e pilhas semânticas
+# novos, e as mensagens do analisador vão para a exceção em vez do
+# stdout; nada é compartilhado entre chamadas além da tabela LL(1), que
+# só é lida. O Programa vai direto para o motor do p2.py, sem o arquivo
+# codigoCompilado.txt no meio; gravar o código objeto é opcional.
+
+
+class ErroDeCompilacao(Exception):
+    def __init__(self, mensagens):
+        erros = [m for m in mensagens if m.startswith("Erro")]
+        super().__init__(erros[-1] if erros else "o programa não compilou")
+        self.mensagens = mensagens
+
+
+_densa = None
+_trava = threading.Lock()
+
+def tabela_densa(cache=ARQUIVO_CACHE):
+    """A TabelaDensa do processo, montada na primeira chamada."""
+    global _densa
+    with _trava:
+        if _densa is None:
+            _densa = p1.TabelaDensa(carregar_tabela(cache))
+    return _densa
+
+
+def compilar(texto, otimizar=False, passes=PASSES, saida=None, binario=False, fluxo=(),
+             avaliar=False):
+    """Compila o texto do fonte e devolve o Programa.
+
+    Com saida, o código objeto também é gravado nesse arquivo, em texto ou
+    (binario=True) no formato binário. fluxo são os passes do otimizador de
+    fluxo (ver fluxo.py), que rodam antes do peephole. Levanta
+    ErroDeCompilacao, com as mensagens do analisador, se o fonte não
+    compilar.
+    """
+    gerador = p1.GeradorDeCodigo()
+    mensagens = []
+    ok = p1.analisar_denso(p1.tokens_de_linhas(texto.splitlines(keepends=True)), tabela_densa(),
+                           gerador=gerador, relatar=mensagens.append)
+    if not ok:
+        raise ErroDeCompilacao(mensagens)
+    if avaliar:
+        avaliar_gerador(gerador)
+    if fluxo:
+        otimizar_fluxo_gerador(gerador, fluxo)
+    if otimizar:
+        otimizar_gerador(gerador, passes)
+    if saida is not None:
+        if binario:
+            gerador.salvar_binario(saida)
+        else:
+            gerador.salvar(saida)
+
+    C = gerador.programa()
+    # Verificado uma vez aqui, o programa roda sem checagens em cada rodar()
+    C.verificado = not verificar(C)
+    return C
+
+def compilar_arquivo(fonte, **opcoes):
+    with open(fonte, "r", encoding="utf-8") as f:
+        return compilar(f.read(), **opcoes)
+
+
+def rodar(C, entradas=(), motor="despacho", memoria="lista"):
+    """Executa C com os doubles de entradas para LEIT; devolve os valores de IMPR."""
+    valores = iter(entradas)
+
+    def ler():
+        try:
+            return float(next(valores))
+        except StopIteration:
+            raise EOFError("as entradas terminaram antes do programa") from None
+
+    saidas = []
+    executar(C, motor, ler, saidas.append, memoria)
+    return saidas
@@ -0,0 +1,213 @@
+import mmap
+import sys
+from array import array
+
+
+# Canais de entrada e saída para LEIT e IMPR
+#
+# Os motores do p2.py recebem duas funções: ler() -> double e
+# escrever(valor). Os canais daqui fornecem essas funções (os métodos ler
+# e escrever) lendo e escrevendo em blocos grandes, em vez de um input()
+# e um print() por instrução:
+#
+#   texto:   doubles separados por espaço em branco, lidos em blocos e
+#            convertidos de uma vez; na saída, um valor por linha, igual
+#            ao print() do modo interativo
+#   binario: doubles IEEE 754 de 8 bytes, little-endian, sem separador
+#
+# Com mmap=True o arquivo de entrada é mapeado em memória em vez de lido;
+# no formato binário os valores são lidos direto do mapeamento, sem cópia.
+# A origem/destino "-" é a entrada/saída padrão.
+
+TAMANHO_BLOCO = 1 << 20
+VALORES_POR_ESCRITA = 1 << 14
+
+FORMATOS = ("texto", "binario")
+
+# Os doubles binários são little-endian; nas máquinas big-endian é preciso inverter
+INVERTER_BYTES = sys.byteorder != "little"
+
+
+class _Canal:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        pass
+
+
+def _abrir_leitura(origem, usar_mmap):
+    """Devolve (arquivo binário, mapeamento ou None, se deve fechar o arquivo)."""
+    if origem == "-":
+        arquivo = sys.stdin.buffer
+        proprio = False
+    else:
+        arquivo = open(origem, "rb")
+        proprio = True
+    mapa = None
+    if usar_mmap:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Pipes e arquivos vazios não podem ser mapeados: lê em blocos
+            mapa = None
+    return arquivo, mapa, proprio
+
+
+class _Entrada(_Canal):
+    def __init__(self, origem="-", usar_mmap=False):
+        self.origem = origem
+        self.arquivo, self.mapa, self.proprio = _abrir_leitura(origem, usar_mmap)
+        self.valores = iter(self._doubles())
+
+    def ler(self):
+        try:
+            return next(self.valores)
+        except StopIteration:
+            nome = "entrada padrão" if self.origem == "-" else self.origem
+            raise EOFError(f"{nome} terminou antes do programa") from None
+
+    def fechar(self):
+        self.valores = iter(())
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+        if self.proprio:
+            self.arquivo.close()
+
+    def _blocos(self):
+        fonte = self.mapa if self.mapa is not None else self.arquivo
+        while True:
+            bloco = fonte.read(TAMANHO_BLOCO)
+            if not bloco:
+                return
+            yield bloco
+
+
+class EntradaTexto(_Entrada):
+    """Doubles separados por espaço em branco, convertidos bloco a bloco."""
+
+    def _doubles(self):
+        resto = b""
+        for bloco in self._blocos():
+            partes = (resto + bloco).split()
+            # Um número pode ter sido cortado no fim do bloco
+            resto = partes.pop() if partes and not bloco[-1:].isspace() else b""
+            yield from map(float, partes)
+        if resto:
+            yield float(resto)
+
+
+class EntradaBinaria(_Entrada):
+    """Doubles de 8 bytes little-endian."""
+
+    def _doubles(self):
+        if self.mapa is not None and not INVERTER_BYTES:
+            if len(self.mapa) % 8:
+                raise Exception(f"Entrada binária com tamanho que não é múltiplo de 8: {self.origem}")
+            visao = memoryview(self.mapa).cast("d")
+            try:
+                yield from visao
+            finally:
+                visao.release()
+            return
+
+        resto = b""
+        for bloco in self._blocos():
+            bloco = resto + bloco
+            util = len(bloco) - len(bloco) % 8
+            valores = array("d", bloco[:util])
+            resto = bloco[util:]
+            if INVERTER_BYTES:
+                valores.byteswap()
+            yield from valores
+        if resto:
+            raise Exception(f"Entrada binária com tamanho que não é múltiplo de 8: {self.origem}")
+
+
+class EntradaInterativa(_Canal):
+    """O comportamento original: pede cada valor no console."""
+
+    def ler(self):
+        print('Digite um valor: ')
+        return float(input())
+
+
+class _Saida(_Canal):
+    def __init__(self, destino="-", valores_por_escrita=VALORES_POR_ESCRITA):
+        self.destino = destino
+        if destino == "-":
+            sys.stdout.flush()
+            self.arquivo = sys.stdout.buffer
+            self.proprio = False
+        else:
+            self.arquivo = open(destino, "wb")
+            self.proprio = True
+        self.limite = valores_por_escrita
+        self.pendentes = []
+
+    def escrever(self, valor):
+        pendentes = self.pendentes
+        pendentes.append(valor)
+        if len(pendentes) >= self.limite:
+            self.descarregar()
+
+    def descarregar(self):
+        if self.pendentes:
+            self.arquivo.write(self._codificar(self.pendentes))
+            self.pendentes = []
+        self.arquivo.flush()
+
+    def fechar(self):
+        if self.arquivo is None:
+            return
+        self.descarregar()
+        if self.proprio:
+            self.arquivo.close()
+        self.arquivo = None
+
+
+class SaidaTexto(_Saida):
+    """Um valor por linha, no mesmo formato do print()."""
+
+    def _codificar(self, valores):
+        return ("\n".join(map(str, valores)) + "\n").encode("utf-8")
+
+
+class SaidaBinaria(_Saida):
+    """Doubles de 8 bytes little-endian."""
+
+    def _codificar(self, valores):
+        valores = array("d", map(float, valores))
+        if INVERTER_BYTES:
+            valores.byteswap()
+        return valores.tobytes()
+
+
+class SaidaConsole(_Canal):
+    """O comportamento original: um print() por IMPR."""
+
+    def escrever(self, valor):
+        print(valor)
+
+
+def abrir_entrada(origem="-", formato="texto", usar_mmap=False, interativo=False):
+    if interativo:
+        return EntradaInterativa()
+    if formato == "texto":
+        return EntradaTexto(origem, usar_mmap)
+    if formato == "binario":
+        return EntradaBinaria(origem, usar_mmap)
+    raise ValueError(f"Formato de entrada desconhecido: {formato}")
+
+def abrir_saida(destino="-", formato="texto", interativo=False):
+    if interativo and destino == "-" and formato == "texto":
+        return SaidaConsole()
+    if formato == "texto":
+        return SaidaTexto(destino)
+    if formato == "binario":
+        return SaidaBinaria(destino)
+    raise ValueError(f"Formato de saída desconhecido: {formato}")
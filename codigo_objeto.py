@@ -0,0 +1,303 @@
+import mmap
+import struct
+import sys
+from array import array
+
+
+# Formato binário do código objeto da MaqHipo
+#
+#   cabeçalho  : MAGICO (4 bytes), versão (u16), reservado (u16),
+#                nº de instruções (u32), nº de constantes (u32),
+#                memória (u32), pilha (u32), nº de inteiros (u32)
+#   instruções : um par (opcode i32, argumento i32) por instrução
+#   constantes : nº de constantes doubles (f64)
+#   inteiros   : nº de inteiros constantes (i64)
+#
+# Tudo em little-endian. O argumento de CRCT é o índice da constante em um
+# pool só: abaixo do nº de constantes é um double, a partir dele é o
+# inteiro de índice (argumento - nº de constantes). Assim um CRCT 10 volta
+# como int, como no formato texto, e o programa imprime o mesmo nos dois
+# formatos. Nas instruções sem argumento ele vale 0 e é ignorado. memória
+# é o total de posições alocadas por ALME e pilha a altura máxima da pilha
+# de operandos. A versão 1 (sem memória e pilha) e a versão 2 (sem
+# inteiros, todas as constantes double) ainda são lidas.
+#
+# No formato texto as mesmas informações vão em linhas de comentário no
+# início do arquivo ("#MEMORIA n" e "#PILHA n"), que versões antigas do
+# p2.py simplesmente ignoram.
+
+MAGICO = b"MQH\x00"
+VERSAO = 3
+CABECALHO_V1 = struct.Struct("<4sHHII")
+CABECALHO_V2 = struct.Struct("<4sHHIIII")
+CABECALHO = struct.Struct("<4sHHIIIII")
+
+# Faixa dos inteiros que cabem no pool de i64
+MENOR_I64, MAIOR_I64 = -2 ** 63, 2 ** 63 - 1
+
+OPCODES = [
+    'INPP', 'ALME', 'CRCT', 'CRVL', 'SOMA', 'SUBT', 'MULT', 'DIVI', 'INVE',
+    'CONJ', 'DISJ', 'NEGA', 'CPME', 'CPMA', 'CPIG', 'CDES', 'CPMI', 'CMAI',
+    'ARMZ', 'DSVI', 'DSVF', 'LEIT', 'IMPR', 'PARA',
+]
+OP = {nome: codigo for codigo, nome in enumerate(OPCODES)}
+OP_DESCONHECIDO = -1
+
+COM_ARGUMENTO = {OP['ALME'], OP['CRCT'], OP['CRVL'], OP['ARMZ'], OP['DSVI'], OP['DSVF']}
+
+# Variação da altura da pilha de operandos causada por cada instrução
+EFEITO_PILHA = {
+    'INPP': 0, 'ALME': 0, 'CRCT': 1, 'CRVL': 1,
+    'SOMA': -1, 'SUBT': -1, 'MULT': -1, 'DIVI': -1, 'INVE': 0,
+    'CONJ': -1, 'DISJ': -1, 'NEGA': 0,
+    'CPME': -1, 'CPMA': -1, 'CPIG': -1, 'CDES': -1, 'CPMI': -1, 'CMAI': -1,
+    'ARMZ': -1, 'DSVI': 0, 'DSVF': -1, 'LEIT': 1, 'IMPR': -1, 'PARA': 0,
+}
+# Quantos operandos cada instrução consome do topo
+CONSUMO_PILHA = {nome: 0 for nome in EFEITO_PILHA}
+for _nome in ('SOMA', 'SUBT', 'MULT', 'DIVI', 'CONJ', 'DISJ',
+              'CPME', 'CPMA', 'CPIG', 'CDES', 'CPMI', 'CMAI'):
+    CONSUMO_PILHA[_nome] = 2
+for _nome in ('INVE', 'NEGA', 'ARMZ', 'DSVF', 'IMPR'):
+    CONSUMO_PILHA[_nome] = 1
+
+
+class Instrucao:
+    def __init__(self, instrucao, argumento=None):
+        self.instrucao = instrucao
+        self.argumento = argumento
+
+    def __repr__(self):
+        return f"Instrucao({self.instrucao!r}, {self.argumento!r})"
+
+
+def converter_argumento(texto):
+    """Argumento do código objeto em texto: int, float ou, se não for número, o próprio texto."""
+    try:
+        return int(texto)
+    except ValueError:
+        try:
+            return float(texto)
+        except ValueError:
+            return texto
+
+
+class Programa(list):
+    """Lista de Instrucao com as dimensões lidas do cabeçalho (None se ausentes)."""
+
+    def __init__(self, instrucoes=(), memoria=None, pilha=None):
+        super().__init__(instrucoes)
+        self.memoria = memoria
+        self.pilha = pilha
+
+
+def alturas_de_pilha(nomes, args):
+    """Altura da pilha de operandos antes de cada instrução (None se inalcançável).
+
+    Percorre o grafo de fluxo a partir do endereço 0. Levanta Exception se
+    a pilha ficar negativa ou se dois caminhos chegarem a um mesmo endereço
+    com alturas diferentes.
+    """
+    fim = len(nomes)
+    alturas = [None] * fim
+    if not fim:
+        return alturas
+    alturas[0] = 0
+    pendentes = [0]
+    while pendentes:
+        i = pendentes.pop()
+        nome, altura = nomes[i], alturas[i]
+        if nome not in EFEITO_PILHA:
+            raise Exception(f"Instrução desconhecida no endereço {i}: {nome}")
+        if altura < CONSUMO_PILHA[nome]:
+            raise Exception(f"Pilha insuficiente para {nome} no endereço {i} (altura {altura})")
+        depois = 0 if nome == 'INPP' else altura + EFEITO_PILHA[nome]
+
+        if nome == 'PARA':
+            sucessores = ()
+        elif nome == 'DSVI':
+            sucessores = (args[i],)
+        elif nome == 'DSVF':
+            sucessores = (i + 1, args[i])
+        else:
+            sucessores = (i + 1,)
+        for j in sucessores:
+            if not isinstance(j, int) or not 0 <= j <= fim:
+                raise Exception(f"Desvio para endereço inválido no endereço {i}: {j}")
+            if j == fim:
+                continue
+            if alturas[j] is None:
+                alturas[j] = depois
+                pendentes.append(j)
+            elif alturas[j] != depois:
+                raise Exception(
+                    f"Alturas de pilha diferentes no endereço {j}: {alturas[j]} e {depois}")
+    return alturas
+
+def profundidade_maxima(nomes, args):
+    """Maior altura da pilha de operandos em qualquer ponto do programa."""
+    maximo = 0
+    for nome, altura in zip(nomes, alturas_de_pilha(nomes, args)):
+        if altura is not None:
+            maximo = max(maximo, altura + max(EFEITO_PILHA[nome], 0))
+    return maximo
+
+def total_alocado(nomes, args):
+    return sum(arg for nome, arg in zip(nomes, args) if nome == 'ALME')
+
+def dimensoes(C):
+    """(memória, pilha) de C: do cabeçalho, se houver, ou calculadas a partir do código."""
+    memoria = getattr(C, "memoria", None)
+    pilha = getattr(C, "pilha", None)
+    if memoria is None or pilha is None:
+        nomes = [C[i].instrucao for i in range(len(C))]
+        args = [C[i].argumento for i in range(len(C))]
+        if memoria is None:
+            memoria = total_alocado(nomes, args)
+        if pilha is None:
+            pilha = profundidade_maxima(nomes, args)
+    return memoria, pilha
+
+
+def eh_binario(arquivo):
+    with open(arquivo, "rb") as f:
+        return f.read(len(MAGICO)) == MAGICO
+
+
+def escrever_binario(arquivo, instrucoes, memoria=0, pilha=0):
+    """Grava uma sequência de (nome, argumento) no formato binário."""
+    codigo = array("i")
+    constantes = array("d")
+    inteiros = array("q")
+    indices = {}
+    indices_inteiros = {}
+    crct = []
+    for nome, argumento in instrucoes:
+        if nome not in OP:
+            raise Exception(f"Erro Interno: instrução desconhecida: {nome}")
+        op = OP[nome]
+        if op == OP['CRCT']:
+            valor = converter_argumento(argumento) if isinstance(argumento, str) else argumento
+            if isinstance(valor, int) and not isinstance(valor, bool) and MENOR_I64 <= valor <= MAIOR_I64:
+                if valor not in indices_inteiros:
+                    indices_inteiros[valor] = len(inteiros)
+                    inteiros.append(valor)
+                # O índice final só se sabe depois de ver todos os doubles
+                crct.append(len(codigo) + 1)
+                argumento = indices_inteiros[valor]
+            else:
+                try:
+                    valor = float(valor)
+                except (TypeError, ValueError):
+                    raise Exception(f"Erro Interno: argumento inválido: {nome} {argumento}")
+                if valor not in indices:
+                    indices[valor] = len(constantes)
+                    constantes.append(valor)
+                argumento = indices[valor]
+        elif op in COM_ARGUMENTO:
+            try:
+                argumento = int(argumento)
+            except (TypeError, ValueError):
+                raise Exception(f"Erro Interno: argumento inválido: {nome} {argumento}")
+        else:
+            argumento = 0
+        codigo.append(op)
+        codigo.append(argumento)
+    for i in crct:
+        codigo[i] += len(constantes)
+
+    if sys.byteorder != "little":
+        codigo.byteswap()
+        constantes.byteswap()
+        inteiros.byteswap()
+
+    with open(arquivo, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, 0, len(codigo) // 2, len(constantes), memoria, pilha,
+                               len(inteiros)))
+        f.write(codigo.tobytes())
+        f.write(constantes.tobytes())
+        f.write(inteiros.tobytes())
+
+
+class ObjetoBinario:
+    """Código objeto mapeado em memória.
+
+    ops, args, constantes e inteiros são memoryviews sobre o arquivo, sem
+    cópia nem parsing. Indexar o objeto devolve instâncias de Instrucao, para que o
+    interpretador de referência também consiga executá-lo.
+    """
+
+    def __init__(self, arquivo):
+        with open(arquivo, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < CABECALHO_V1.size:
+            raise Exception(f"Arquivo objeto truncado: {arquivo}")
+        magico, versao, _, n_instr, n_const = CABECALHO_V1.unpack_from(self._mm, 0)
+        if magico != MAGICO:
+            raise Exception(f"Arquivo objeto inválido: {arquivo}")
+        cabecalho = {1: CABECALHO_V1, 2: CABECALHO_V2, VERSAO: CABECALHO}.get(versao)
+        if cabecalho is None:
+            raise Exception(f"Versão de código objeto não suportada: {versao}")
+        if len(self._mm) < cabecalho.size:
+            raise Exception(f"Arquivo objeto truncado: {arquivo}")
+        campos = cabecalho.unpack_from(self._mm, 0)
+        self.memoria, self.pilha = campos[5:7] if versao >= 2 else (None, None)
+        n_int = campos[7] if versao >= 3 else 0
+
+        inicio_codigo = cabecalho.size
+        inicio_const = inicio_codigo + 8 * n_instr
+        inicio_int = inicio_const + 8 * n_const
+        if len(self._mm) < inicio_int + 8 * n_int:
+            raise Exception(f"Arquivo objeto truncado: {arquivo}")
+
+        visao = memoryview(self._mm)
+        codigo = visao[inicio_codigo:inicio_const]
+        constantes = visao[inicio_const:inicio_int]
+        inteiros = visao[inicio_int:inicio_int + 8 * n_int]
+        if sys.byteorder == "little":
+            codigo = codigo.cast("i")
+            self.constantes = constantes.cast("d")
+            self.inteiros = inteiros.cast("q")
+        else:
+            codigo = array("i", codigo.tobytes())
+            codigo.byteswap()
+            self.constantes = array("d", constantes.tobytes())
+            self.constantes.byteswap()
+            self.inteiros = array("q", inteiros.tobytes())
+            self.inteiros.byteswap()
+
+        self.ops = codigo[0::2]
+        self.args = codigo[1::2]
+
+    def __len__(self):
+        return len(self.ops)
+
+    def argumento(self, i):
+        op = self.ops[i]
+        if op == OP['CRCT']:
+            return self.constante(self.args[i])
+        if op in COM_ARGUMENTO:
+            return self.args[i]
+        return None
+
+    def constante(self, indice):
+        """Valor do índice indice do pool: double ou, depois dos doubles, inteiro."""
+        n = len(self.constantes)
+        return self.constantes[indice] if indice < n else self.inteiros[indice - n]
+
+    def __getitem__(self, i):
+        return Instrucao(OPCODES[self.ops[i]], self.argumento(i))
+
+    def decodificar(self):
+        """Devolve (opcodes, argumentos) já com as constantes resolvidas."""
+        ops = self.ops.tolist()
+        args = self.args.tolist()
+        constante = self.constante
+        crct = OP['CRCT']
+        for i, op in enumerate(ops):
+            if op == crct:
+                args[i] = constante(args[i])
+            elif op not in COM_ARGUMENTO:
+                args[i] = None
+        return ops, args
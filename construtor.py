@@ -0,0 +1,187 @@
+import argparse
+import filecmp
+import fnmatch
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import p1
+from biblioteca import tabela_densa
+from executor import tamanho_de_lote
+from gramatica import hash_gramatica
+from otimizador import PASSES, ler_passes, otimizar_gerador
+
+
+# Compilação em lote de uma árvore de fontes
+#
+# Cada fonte encontrado sob a raiz é compilado em um pool de processos,
+# com um GeradorDeCodigo próprio, e o código objeto vai para o diretório
+# de saída espelhando os caminhos relativos. O resultado também fica em um
+# cache endereçado pelo sha256 de (versão do compilador, opções, texto do
+# fonte); a versão do compilador cobre a gramática e o código dos módulos
+# do compilador. Fontes cuja chave já está no cache não são recompilados:
+# o objeto é só copiado para a saída, se lá estiver diferente.
+
+MODULOS_DO_COMPILADOR = ("p1.py", "gramatica.py", "otimizador.py", "codigo_objeto.py")
+
+EXTENSAO = {False: ".maq", True: ".bin"}
+
+
+def versao_compilador():
+    h = hashlib.sha256(hash_gramatica().encode("ascii"))
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    for nome in MODULOS_DO_COMPILADOR:
+        with open(os.path.join(diretorio, nome), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def chave_cache(fonte_bytes, versao, binario=False, otimizar=False, passes=PASSES):
+    opcoes = f"{versao}|binario={int(binario)}|otimizar={int(otimizar)}|passes={','.join(passes)}|"
+    return hashlib.sha256(opcoes.encode("utf-8") + fonte_bytes).hexdigest()
+
+
+class Resultado:
+    def __init__(self, fonte, destino, estado, mensagens=""):
+        self.fonte = fonte
+        self.destino = destino
+        self.estado = estado  # "compilado", "em cache" ou "erro"
+        self.mensagens = mensagens
+
+
+def encontrar_fontes(raiz, padrao="*.txt", ignorar=()):
+    ignorar = {os.path.abspath(d) for d in ignorar if d}
+    fontes = []
+    for diretorio, subdiretorios, arquivos in os.walk(raiz):
+        subdiretorios[:] = sorted(d for d in subdiretorios
+                                  if os.path.abspath(os.path.join(diretorio, d)) not in ignorar)
+        for nome in sorted(arquivos):
+            if fnmatch.fnmatch(nome, padrao):
+                fontes.append(os.path.join(diretorio, nome))
+    return fontes
+
+
+def compilar_para_objeto(fonte, destino, binario=False, otimizar=False, passes=PASSES):
+    """Compila fonte para destino com um gerador próprio; devolve (ok, mensagens)."""
+    gerador = p1.GeradorDeCodigo()
+    mensagens = []
+    with open(fonte, "r", encoding="utf-8") as f:
+        try:
+            ok = p1.analisar_denso(p1.tokens_de_linhas(f), tabela_densa(), gerador=gerador,
+                                   relatar=mensagens.append)
+        except UnicodeDecodeError as e:
+            mensagens.append(f"Erro ao ler o arquivo {fonte}: {e}")
+            ok = False
+    if ok and otimizar:
+        removidas = otimizar_gerador(gerador, passes)
+        mensagens.append(f"Otimização: {removidas} instruções removidas.")
+    texto = "".join(f"{m}\n" for m in mensagens)
+    if not ok:
+        return False, texto
+
+    # Grava em um temporário e renomeia, para o cache nunca ter objeto pela metade
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    if binario:
+        gerador.salvar_binario(temporario)
+    else:
+        gerador.salvar(temporario)
+    os.replace(temporario, destino)
+    return True, texto
+
+def _compilar_tarefa(tarefa):
+    fonte, destino, binario, otimizar, passes = tarefa
+    try:
+        return compilar_para_objeto(fonte, destino, binario, otimizar, passes)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}\n"
+
+
+def _copiar_se_diferente(origem, destino):
+    if os.path.exists(destino) and filecmp.cmp(origem, destino, shallow=False):
+        return
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    shutil.copyfile(origem, destino)
+
+
+def construir(raiz, saida, padrao="*.txt", cache=None, processos=None,
+              binario=False, otimizar=False, passes=PASSES, usar_cache=True):
+    """Compila os fontes de raiz para saida; devolve um Resultado por fonte."""
+    if cache is None:
+        cache = os.path.join(saida, ".cache")
+    os.makedirs(cache, exist_ok=True)
+    passes = tuple(passes)
+    versao = versao_compilador()
+
+    resultados = []
+    pendentes = []
+    for fonte in encontrar_fontes(raiz, padrao, ignorar=(saida, cache)):
+        relativo = os.path.splitext(os.path.relpath(fonte, raiz))[0] + EXTENSAO[binario]
+        destino = os.path.join(saida, relativo)
+        with open(fonte, "rb") as f:
+            chave = chave_cache(f.read(), versao, binario, otimizar, passes)
+        objeto = os.path.join(cache, chave)
+
+        resultado = Resultado(fonte, destino, "em cache")
+        resultados.append(resultado)
+        if usar_cache and os.path.exists(objeto):
+            _copiar_se_diferente(objeto, destino)
+        else:
+            pendentes.append((resultado, objeto))
+
+    if pendentes:
+        tarefas = [(r.fonte, objeto, binario, otimizar, passes) for r, objeto in pendentes]
+        processos = min(processos or os.cpu_count() or 1, len(tarefas))
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            saidas = pool.map(_compilar_tarefa, tarefas,
+                              chunksize=tamanho_de_lote(len(tarefas), processos))
+            for (resultado, objeto), (ok, mensagens) in zip(pendentes, saidas):
+                resultado.mensagens = mensagens
+                if ok:
+                    resultado.estado = "compilado"
+                    _copiar_se_diferente(objeto, resultado.destino)
+                else:
+                    resultado.estado = "erro"
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compila em paralelo todos os fontes de uma árvore de diretórios, com cache.")
+    parser.add_argument("raiz", help="diretório com os fontes")
+    parser.add_argument("-o", "--saida", default="compilados", help="diretório dos códigos objeto")
+    parser.add_argument("--padrao", default="*.txt", help="padrão dos nomes de fonte (padrão: *.txt)")
+    parser.add_argument("--cache", default=None, help="diretório do cache (padrão: SAIDA/.cache)")
+    parser.add_argument("--sem-cache", action="store_true", help="recompila tudo, mas atualiza o cache")
+    parser.add_argument("-j", "--processos", type=int, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--binario", action="store_true", help="gera o código objeto no formato binário")
+    parser.add_argument("-O", "--otimizar", action="store_true", help="aplica o otimizador peephole")
+    parser.add_argument("--passes", default=",".join(PASSES),
+                        help=f"passes do otimizador separados por vírgula (padrão: {','.join(PASSES)})")
+    parser.add_argument("-q", "--quieto", action="store_true", help="só lista os fontes com erro")
+    opcoes = parser.parse_args()
+    try:
+        passes = ler_passes(opcoes.passes)
+    except ValueError as e:
+        parser.error(str(e))
+
+    inicio = time.perf_counter()
+    resultados = construir(opcoes.raiz, opcoes.saida, opcoes.padrao, opcoes.cache, opcoes.processos,
+                           opcoes.binario, opcoes.otimizar, passes, not opcoes.sem_cache)
+    total = time.perf_counter() - inicio
+
+    contagem = {"compilado": 0, "em cache": 0, "erro": 0}
+    for r in resultados:
+        contagem[r.estado] += 1
+        if r.estado == "erro":
+            print(f"ERRO      {r.fonte}")
+            for linha in r.mensagens.splitlines():
+                if linha.startswith("Erro"):
+                    print(f"          {linha}")
+        elif not opcoes.quieto:
+            print(f"{r.estado:<9} {r.fonte} -> {r.destino}")
+    print(f"{len(resultados)} fontes em {total:.2f} s: {contagem['compilado']} compilados, "
+          f"{contagem['em cache']} em cache, {contagem['erro']} com erro")
+    if contagem["erro"]:
+        exit(1)
@@ -0,0 +1,171 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Estatísticas por fase do compilador (python p1.py --stats)
+#
+# Fases medidas pelo p1.py:
+#   tabela     : construir_tabela (cache em disco ou FIRST/FOLLOW)
+#   lexico     : geração dos tokens
+#   sintatico  : o laço do analisador, sem o léxico e sem as ações
+#   acoes      : ações GERAR_CODIGO_ e empilhamentos semânticos
+#   otimizacao : otimizador peephole (com -O)
+#   salvar     : gravação do código objeto
+# No modo streaming o léxico, o sintático e as ações se intercalam: o
+# tempo de parede de cada um vem de envolver os tokens e as ações com
+# relógios, e tempo de CPU e pico de memória só existem para a análise
+# como um todo (o sintático fica com o resto, incluindo o custo dessas
+# medições). O pico de memória vem do tracemalloc, que é ligado só com
+# --stats-memoria porque deixa a compilação várias vezes mais lenta.
+# Nada disso é feito quando --stats não é usado.
+
+PILHAS_SEMANTICAS = ("ids", "numeros", "ops", "dsvfPilha", "dsviPilha", "whileComecoPilha")
+
+
+class Estatisticas:
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.fases = {}
+        self.tokens = 0
+        self.tempo_lexico = 0.0
+        self.tempo_acoes = 0.0
+        self.chamadas_acoes = 0
+        self.expansoes = 0
+        self.pilha_maxima = 0
+        self.pilhas_semanticas = {nome: 0 for nome in PILHAS_SEMANTICAS}
+        self.instrucoes_emitidas = 0
+        self.instrucoes_finais = 0
+        self.streaming = False
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def fase(self, nome):
+        if self.memoria:
+            tracemalloc.reset_peak()
+        parede, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            pico = tracemalloc.get_traced_memory()[1] if self.memoria else None
+            self.fases[nome] = {
+                "parede_s": time.perf_counter() - parede,
+                "cpu_s": time.process_time() - cpu,
+                "memoria_pico_bytes": pico,
+            }
+
+    def medir_tokens(self, tokens):
+        """Envolve o iterador de tokens, contando-os e cronometrando o léxico."""
+        relogio = time.perf_counter
+        tokens = iter(tokens)
+        while True:
+            inicio = relogio()
+            token = next(tokens, None)
+            self.tempo_lexico += relogio() - inicio
+            if token is None:
+                return
+            self.tokens += 1
+            yield token
+
+    def medir_analise(self, sem):
+        """Chamado pelos analisadores antes de ligar as ações: envolve as de sem."""
+        for nome, funcao in sem.acoes.items():
+            sem.acoes[nome] = self._medir(funcao, sem, PILHAS_SEMANTICAS[3:], True)
+        for tipo, funcao in sem.empilhar.items():
+            sem.empilhar[tipo] = self._medir(funcao, sem, PILHAS_SEMANTICAS[:3], False)
+
+    def expandiu(self, altura):
+        """Chamado pelos analisadores a cada produção expandida, com a altura da pilha."""
+        self.expansoes += 1
+        if altura > self.pilha_maxima:
+            self.pilha_maxima = altura
+
+    def _medir(self, funcao, sem, nomes_pilhas, eh_acao):
+        relogio = time.perf_counter
+        maximos = self.pilhas_semanticas
+        # Ações só fazem crescer as pilhas de desvio; empilhamentos, as de valores
+        pilhas = [(nome, getattr(sem, nome)) for nome in nomes_pilhas]
+
+        def medida(*args):
+            inicio = relogio()
+            try:
+                return funcao(*args)
+            finally:
+                self.tempo_acoes += relogio() - inicio
+                if eh_acao:
+                    self.chamadas_acoes += 1
+                for nome, lista in pilhas:
+                    if len(lista) > maximos[nome]:
+                        maximos[nome] = len(lista)
+        return medida
+
+    def relatorio(self):
+        fases = {}
+        for nome in ("tabela", "lexico", "analise", "otimizacao", "salvar"):
+            if nome in self.fases:
+                fases[nome] = dict(self.fases[nome])
+
+        # Separa o tempo da análise em léxico (se intercalado), sintático e ações
+        if "analise" in fases:
+            analise = fases.pop("analise")
+            parede, cpu = analise["parede_s"], analise["cpu_s"]
+            if self.streaming:
+                fases["lexico"] = {"parede_s": self.tempo_lexico, "cpu_s": None,
+                                   "memoria_pico_bytes": None}
+                parede -= self.tempo_lexico
+            fases["sintatico"] = {"parede_s": parede - self.tempo_acoes, "cpu_s": None,
+                                  "memoria_pico_bytes": analise["memoria_pico_bytes"]}
+            fases["acoes"] = {"parede_s": self.tempo_acoes, "cpu_s": None,
+                              "memoria_pico_bytes": None}
+            fases["analise"] = analise
+        ordem = ("tabela", "lexico", "analise", "sintatico", "acoes", "otimizacao", "salvar")
+        fases = {nome: fases[nome] for nome in ordem if nome in fases}
+
+        # "analise" já soma o sintático, as ações e, em streaming, o léxico
+        inteiras = [f for nome, f in fases.items() if nome not in ("sintatico", "acoes")
+                    and not (nome == "lexico" and self.streaming)]
+        picos = [f["memoria_pico_bytes"] for f in inteiras if f["memoria_pico_bytes"] is not None]
+        return {
+            "fases": fases,
+            "total": {
+                "parede_s": sum(f["parede_s"] for f in inteiras),
+                "cpu_s": sum(f["cpu_s"] for f in inteiras),
+                "memoria_pico_bytes": max(picos) if picos else None,
+            },
+            "tokens": self.tokens,
+            # Cada passo do laço do analisador casa um token, expande uma produção ou executa uma ação
+            "passos_analisador": self.tokens + self.expansoes + self.chamadas_acoes,
+            "expansoes": self.expansoes,
+            "pilha_analisador_max": self.pilha_maxima,
+            "chamadas_acoes": self.chamadas_acoes,
+            "pilhas_semanticas_max": dict(self.pilhas_semanticas),
+            "instrucoes_emitidas": self.instrucoes_emitidas,
+            "instrucoes_finais": self.instrucoes_finais,
+        }
+
+    def texto(self):
+        r = self.relatorio()
+        linhas = ["--- Estatísticas ---",
+                  f"{'fase':<12}{'parede (ms)':>13}{'cpu (ms)':>11}{'pico (KiB)':>12}"]
+        for nome, f in list(r["fases"].items()) + [("total", r["total"])]:
+            if nome in ("sintatico", "acoes") or (nome == "lexico" and self.streaming):
+                nome = "  " + nome
+            pico = f["memoria_pico_bytes"]
+            pico = f"{pico / 1024:.1f}" if pico is not None else "-"
+            cpu = f"{f['cpu_s'] * 1000:.2f}" if f["cpu_s"] is not None else "-"
+            linhas.append(f"{nome:<12}{f['parede_s'] * 1000:>13.2f}{cpu:>11}{pico:>12}")
+        linhas.append(f"tokens: {r['tokens']}   passos do analisador: {r['passos_analisador']}   "
+                      f"pilha do analisador (máx): {r['pilha_analisador_max']}")
+        linhas.append("pilhas semânticas (máx): "
+                      + ", ".join(f"{nome} {n}" for nome, n in r["pilhas_semanticas_max"].items()))
+        linhas.append(f"instruções emitidas: {r['instrucoes_emitidas']}   "
+                      f"após otimização: {r['instrucoes_finais']}")
+        if self.memoria:
+            linhas.append("(tempos medidos com o tracemalloc ligado)")
+        return "\n".join(linhas)
+
+    def salvar_json(self, arquivo):
+        with open(arquivo, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, indent=1)
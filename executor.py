@@ -0,0 +1,127 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from canais import EntradaTexto, SaidaTexto
+from p2 import MOTORES, carregar_programa, executar
+
+
+# Executor em lote de muitos programas e conjuntos de entrada
+#
+# O manifesto tem uma tarefa por linha: "programa entrada saida". A entrada
+# é um arquivo de doubles separados por espaço (um por LEIT, em ordem) e a
+# saída recebe um valor por linha, como o IMPR do p2.py. As tarefas rodam
+# em um pool de processos; cada processo carrega cada programa uma única
+# vez e as tarefas vão em lotes para reduzir a comunicação entre processos.
+
+class Tarefa:
+    def __init__(self, programa, entrada, saida):
+        self.programa = programa
+        self.entrada = entrada
+        self.saida = saida
+
+    def __repr__(self):
+        return f"Tarefa({self.programa!r}, {self.entrada!r}, {self.saida!r})"
+
+
+class Resultado:
+    def __init__(self, indice, tarefa, tempo, erro=None):
+        self.indice = indice
+        self.tarefa = tarefa
+        self.tempo = tempo
+        self.erro = erro
+
+
+def ler_manifesto(arquivo):
+    tarefas = []
+    with open(arquivo, "r", encoding="utf-8") as f:
+        for numero, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
+                continue
+            partes = linha.split()
+            if len(partes) != 3:
+                raise Exception(f"Manifesto inválido na linha {numero}: esperado 'programa entrada saida'")
+            tarefas.append(Tarefa(*partes))
+    return tarefas
+
+
+# Cache por processo: cada programa é carregado uma vez em cada trabalhador
+_programas = {}
+
+def _programa(arquivo):
+    if arquivo not in _programas:
+        _programas[arquivo] = carregar_programa(arquivo)
+    return _programas[arquivo]
+
+def executar_tarefa(tarefa, motor="despacho"):
+    C = _programa(tarefa.programa)
+    with EntradaTexto(tarefa.entrada) as entrada, SaidaTexto(tarefa.saida) as saida:
+        executar(C, motor, entrada.ler, saida.escrever)
+
+def _executar_lote(lote, motor):
+    resultados = []
+    for indice, tarefa in lote:
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            executar_tarefa(tarefa, motor)
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        resultados.append((indice, time.perf_counter() - inicio, erro))
+    return resultados
+
+
+def tamanho_de_lote(tarefas, processos):
+    """Tarefas por lote para dividir `tarefas` entre `processos` processos."""
+    # Uns quatro lotes por processo equilibram carga e custo de IPC
+    return max(1, tarefas // (processos * 4))
+
+
+def executar_manifesto(tarefas, processos=None, tamanho_lote=None, motor="despacho"):
+    """Roda as tarefas em paralelo e devolve um Resultado por tarefa, na ordem dada."""
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconhecido: {motor}")
+    processos = processos or os.cpu_count() or 1
+    if tamanho_lote is None:
+        tamanho_lote = tamanho_de_lote(len(tarefas), processos)
+
+    # Tarefas do mesmo programa ficam no mesmo lote sempre que possível
+    ordenadas = sorted(enumerate(tarefas), key=lambda item: item[1].programa)
+    lotes = [ordenadas[i:i + tamanho_lote] for i in range(0, len(ordenadas), tamanho_lote)]
+
+    resultados = [None] * len(tarefas)
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        for parcial in pool.map(_executar_lote, lotes, [motor] * len(lotes)):
+            for indice, tempo, erro in parcial:
+                resultados[indice] = Resultado(indice, tarefas[indice], tempo, erro)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa em paralelo as tarefas de um manifesto.")
+    parser.add_argument("manifesto", help="uma tarefa por linha: programa entrada saida")
+    parser.add_argument("-j", "--processos", type=int, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--lote", type=int, default=None, help="tarefas por lote enviado a um processo")
+    parser.add_argument("--motor", choices=sorted(MOTORES), default="despacho")
+    parser.add_argument("-q", "--quieto", action="store_true", help="não lista o tempo de cada tarefa")
+    opcoes = parser.parse_args()
+
+    tarefas = ler_manifesto(opcoes.manifesto)
+    inicio = time.perf_counter()
+    resultados = executar_manifesto(tarefas, opcoes.processos, opcoes.lote, opcoes.motor)
+    total = time.perf_counter() - inicio
+
+    falhas = 0
+    for r in resultados:
+        if r.erro:
+            falhas += 1
+            print(f"ERRO  {r.tempo * 1000:9.2f} ms  {r.tarefa.programa} {r.tarefa.entrada}: {r.erro}")
+        elif not opcoes.quieto:
+            print(f"ok    {r.tempo * 1000:9.2f} ms  {r.tarefa.programa} {r.tarefa.entrada} -> {r.tarefa.saida}")
+    print(f"{len(resultados)} tarefas ({falhas} com erro) em {total:.2f} s: "
+          f"{len(resultados) / total if total else 0:.1f} tarefas/s")
+    if falhas:
+        exit(1)
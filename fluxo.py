@@ -0,0 +1,635 @@
+from codigo_objeto import alturas_de_pilha, converter_argumento
+from otimizador import SALTOS
+
+
+# Otimizador sobre o grafo de fluxo de controle (CFG) do código da MaqHipo
+#
+# O código é dividido em blocos básicos (um líder em 0, em cada destino de
+# DSVF/DSVI e depois de cada desvio ou PARA) ligados pelas arestas de
+# fluxo. Sobre o grafo rodam as análises clássicas:
+#
+#   vivas       : variáveis (endereços de ALME) lidas por CRVL antes de
+#                 serem escritas por ARMZ em algum caminho a partir do ponto
+#   alcance     : definições (ARMZ, ou o zero inicial de ALME) que chegam a
+#                 cada ponto sem serem sobrescritas
+#   disponiveis : cópias "CRVL a ARMZ b" / "CRCT k ARMZ b" válidas em todos
+#                 os caminhos até o ponto
+#   dominadores e laços naturais (arestas de retorno para o cabeçalho)
+#
+# e os passes:
+#
+#   copias                : CRVL b vira CRVL a (ou CRCT k) onde a cópia
+#                           b = a (ou b = k) está disponível
+#   invariantes           : subexpressões de um laço cujas variáveis só têm
+#                           definições de fora do laço são calculadas uma vez
+#                           antes dele, em uma temporária nova (ALME 1)
+#   armazenamentos_mortos : ARMZ x com x morta depois dele sai, junto com a
+#                           expressão que calculou o valor, se ela for pura
+#
+# Uma expressão é pura quando não tem LEIT nem DIVI por algo que não seja
+# uma constante diferente de zero: calculá-la a mais ou a menos não muda
+# nada que o programa observe. Todo desvio que o p1.py gera acontece com a
+# pilha de operandos vazia; código em que algum bloco começa com a pilha
+# não vazia volta intacto.
+
+PASSES_FLUXO = ("copias", "invariantes", "armazenamentos_mortos")
+
+BINARIAS = {
+    "SOMA", "SUBT", "MULT", "DIVI", "CONJ", "DISJ",
+    "CPME", "CPMA", "CPIG", "CDES", "CPMI", "CMAI",
+}
+UNARIAS = {"INVE", "NEGA"}
+
+
+class Bloco:
+    def __init__(self, indice, inicio, fim):
+        self.indice = indice
+        self.inicio = inicio
+        self.fim = fim  # exclusivo
+        self.sucessores = []
+        self.predecessores = []
+
+    def __repr__(self):
+        return f"Bloco({self.indice}, [{self.inicio}, {self.fim}))"
+
+
+class GrafoDeFluxo:
+    def __init__(self, instrucoes):
+        self.instrucoes = instrucoes
+        n = len(instrucoes)
+
+        lideres = {0} if n else set()
+        for i, (nome, arg) in enumerate(instrucoes):
+            if nome in SALTOS:
+                if arg < n:
+                    lideres.add(arg)
+                if i + 1 < n:
+                    lideres.add(i + 1)
+            elif nome == "PARA" and i + 1 < n:
+                lideres.add(i + 1)
+        inicios = sorted(lideres)
+
+        self.blocos = []
+        self.bloco_de = [0] * n
+        for k, inicio in enumerate(inicios):
+            fim = inicios[k + 1] if k + 1 < len(inicios) else n
+            self.blocos.append(Bloco(k, inicio, fim))
+            for i in range(inicio, fim):
+                self.bloco_de[i] = k
+
+        for bloco in self.blocos:
+            nome, arg = instrucoes[bloco.fim - 1]
+            if nome == "PARA":
+                destinos = ()
+            elif nome == "DSVI":
+                destinos = (arg,)
+            elif nome == "DSVF":
+                destinos = (bloco.fim, arg)
+            else:
+                destinos = (bloco.fim,)
+            for destino in destinos:
+                # Desviar para n (ou cair nele) é sair do programa
+                if destino < n:
+                    sucessor = self.blocos[self.bloco_de[destino]]
+                    if sucessor not in bloco.sucessores:
+                        bloco.sucessores.append(sucessor)
+                        sucessor.predecessores.append(bloco)
+
+    def pilha_vazia_nas_bordas(self):
+        """Se todo bloco alcançável começa com a pilha de operandos vazia."""
+        nomes = [nome for nome, _ in self.instrucoes]
+        args = [arg for _, arg in self.instrucoes]
+        try:
+            alturas = alturas_de_pilha(nomes, args)
+        except Exception:
+            return False
+        return all(alturas[b.inicio] in (None, 0) for b in self.blocos)
+
+    def alcancaveis(self):
+        vistos = set()
+        pendentes = [self.blocos[0]] if self.blocos else []
+        while pendentes:
+            bloco = pendentes.pop()
+            if bloco.indice in vistos:
+                continue
+            vistos.add(bloco.indice)
+            pendentes.extend(bloco.sucessores)
+        return vistos
+
+    # Análises
+
+    def vivas(self):
+        """(vivas na entrada, vivas na saída) de cada bloco."""
+        usa = []
+        define = []
+        for bloco in self.blocos:
+            u, d = set(), set()
+            for nome, arg in self.instrucoes[bloco.inicio:bloco.fim]:
+                if nome == "CRVL" and arg not in d:
+                    u.add(arg)
+                elif nome == "ARMZ":
+                    d.add(arg)
+            usa.append(u)
+            define.append(d)
+
+        entrada = [set() for _ in self.blocos]
+        saida = [set() for _ in self.blocos]
+        mudou = True
+        while mudou:
+            mudou = False
+            for bloco in reversed(self.blocos):
+                k = bloco.indice
+                novo_saida = set()
+                for s in bloco.sucessores:
+                    novo_saida |= entrada[s.indice]
+                novo_entrada = usa[k] | (novo_saida - define[k])
+                if novo_entrada != entrada[k] or novo_saida != saida[k]:
+                    entrada[k], saida[k] = novo_entrada, novo_saida
+                    mudou = True
+        return entrada, saida
+
+    def alcance(self):
+        """Definições que chegam à entrada de cada bloco, como conjuntos de bits.
+
+        O bit i ligado quer dizer que o ARMZ do endereço i chega; o valor
+        inicial da variável x (zero, de ALME) é o bit len(instrucoes) + x,
+        que chega à entrada do programa.
+        """
+        n = len(self.instrucoes)
+        definicoes = {}
+        for i, (nome, arg) in enumerate(self.instrucoes):
+            if nome == "ARMZ":
+                definicoes[arg] = definicoes.get(arg, 1 << (n + arg)) | (1 << i)
+
+        gera = []
+        mata = []
+        for bloco in self.blocos:
+            g, m = {}, 0
+            for i in range(bloco.inicio, bloco.fim):
+                nome, arg = self.instrucoes[i]
+                if nome == "ARMZ":
+                    g[arg] = 1 << i
+                    m |= definicoes[arg]
+            gera.append(sum(g.values()))
+            mata.append(m)
+
+        iniciais = ((1 << self._variaveis()) - 1) << n
+        entrada = [0] * len(self.blocos)
+        saida = [0] * len(self.blocos)
+        mudou = True
+        while mudou:
+            mudou = False
+            for bloco in self.blocos:
+                k = bloco.indice
+                novo_entrada = iniciais if k == 0 else 0
+                for p in bloco.predecessores:
+                    novo_entrada |= saida[p.indice]
+                novo_saida = gera[k] | (novo_entrada & ~mata[k])
+                if novo_entrada != entrada[k] or novo_saida != saida[k]:
+                    entrada[k], saida[k] = novo_entrada, novo_saida
+                    mudou = True
+        return entrada
+
+    def _variaveis(self):
+        return sum(arg for nome, arg in self.instrucoes if nome == "ALME")
+
+    def copias(self):
+        """{endereço do ARMZ: (destino, ("var", a) ou ("const", k))} de cada cópia."""
+        copias = {}
+        for bloco in self.blocos:
+            for i in range(bloco.inicio + 1, bloco.fim):
+                nome, destino = self.instrucoes[i]
+                anterior, origem = self.instrucoes[i - 1]
+                if nome != "ARMZ":
+                    continue
+                if anterior == "CRVL" and origem != destino:
+                    copias[i] = (destino, ("var", origem))
+                elif anterior == "CRCT":
+                    copias[i] = (destino, ("const", origem))
+        return copias
+
+    def disponiveis(self, copias):
+        """Cópias disponíveis na entrada de cada bloco (interseção sobre os caminhos).
+
+        Conjuntos de bits: o bit i ligado quer dizer que a cópia cujo ARMZ
+        está no endereço i vale.
+        """
+        mortas_por = {x: sum(1 << i for i in indices) for x, indices in _indice_de_copias(copias).items()}
+        todas = sum(1 << i for i in copias)
+        alcancaveis = self.alcancaveis()
+        gera = []
+        mata = []
+        for bloco in self.blocos:
+            g = m = 0
+            for i in range(bloco.inicio, bloco.fim):
+                nome, arg = self.instrucoes[i]
+                if nome != "ARMZ":
+                    continue
+                mortas = mortas_por.get(arg, 0)
+                g &= ~mortas
+                m |= mortas
+                if i in copias:
+                    g |= 1 << i
+                    m &= ~(1 << i)
+            gera.append(g)
+            mata.append(m)
+
+        entrada = [0 if b.indice == 0 or b.indice not in alcancaveis else todas for b in self.blocos]
+        saida = [gera[k] | (entrada[k] & ~mata[k]) for k in range(len(self.blocos))]
+        mudou = True
+        while mudou:
+            mudou = False
+            for bloco in self.blocos:
+                k = bloco.indice
+                if k == 0 or k not in alcancaveis:
+                    continue
+                novo_entrada = todas
+                for p in bloco.predecessores:
+                    if p.indice in alcancaveis:
+                        novo_entrada &= saida[p.indice]
+                if novo_entrada != entrada[k]:
+                    entrada[k] = novo_entrada
+                    saida[k] = gera[k] | (novo_entrada & ~mata[k])
+                    mudou = True
+        return entrada
+
+    def dominadores(self):
+        """Dominador imediato de cada bloco alcançável (o do bloco 0 é ele mesmo).
+
+        Algoritmo iterativo de Cooper, Harvey e Kennedy, em pós-ordem reversa.
+        """
+        ordem = []
+        vistos = set()
+        if self.blocos:
+            pilha = [(self.blocos[0], iter(self.blocos[0].sucessores))]
+            vistos.add(0)
+            while pilha:
+                bloco, sucessores = pilha[-1]
+                for s in sucessores:
+                    if s.indice not in vistos:
+                        vistos.add(s.indice)
+                        pilha.append((s, iter(s.sucessores)))
+                        break
+                else:
+                    pilha.pop()
+                    ordem.append(bloco.indice)
+        ordem.reverse()
+        posicao = {k: n for n, k in enumerate(ordem)}
+
+        idom = {0: 0} if ordem else {}
+        mudou = True
+        while mudou:
+            mudou = False
+            for k in ordem[1:]:
+                novo = None
+                for p in self.blocos[k].predecessores:
+                    p = p.indice
+                    if p not in idom:
+                        continue
+                    if novo is None:
+                        novo = p
+                        continue
+                    a, b = p, novo
+                    while a != b:
+                        while posicao[a] > posicao[b]:
+                            a = idom[a]
+                        while posicao[b] > posicao[a]:
+                            b = idom[b]
+                    novo = a
+                if idom.get(k) != novo:
+                    idom[k] = novo
+                    mudou = True
+        return idom
+
+    def domina(self, idom, a, b):
+        """Se o bloco a domina o bloco b."""
+        while True:
+            if b == a:
+                return True
+            if b == 0:
+                return False
+            b = idom[b]
+
+    def lacos(self):
+        """{cabeçalho: blocos do laço natural}, dos laços menores para os maiores."""
+        idom = self.dominadores()
+        lacos = {}
+        for k in idom:
+            for sucessor in self.blocos[k].sucessores:
+                h = sucessor.indice
+                if not self.domina(idom, h, k):
+                    continue
+                # Aresta de retorno k -> h: o laço é h mais quem chega a k sem passar por h
+                corpo = lacos.setdefault(h, {h})
+                pendentes = [k]
+                while pendentes:
+                    b = pendentes.pop()
+                    if b in corpo:
+                        continue
+                    corpo.add(b)
+                    pendentes.extend(p.indice for p in self.blocos[b].predecessores)
+        return dict(sorted(lacos.items(), key=lambda item: len(item[1])))
+
+    # Expressões dentro de um bloco
+
+    def expressoes(self, bloco, invariante=None):
+        """Simula a pilha de operandos do bloco, que começa vazia.
+
+        Devolve (consumidos, fechadas): consumidos[i] é a lista dos valores
+        tirados da pilha pela instrução i e fechadas as expressões
+        invariantes maximais (só quando invariante é dado). Cada valor é
+        uma Expressao com o intervalo [inicio, fim] de instruções que o
+        calcularam. invariante(i, x) diz se o CRVL x em i é invariante.
+        """
+        pilha = []
+        consumidos = {}
+        fechadas = []
+        for i in range(bloco.inicio, bloco.fim):
+            nome, arg = self.instrucoes[i]
+            if nome == "CRCT":
+                pilha.append(Expressao(i, i, True, True, 0, False, converter_argumento(arg)))
+            elif nome == "CRVL":
+                pilha.append(Expressao(i, i, True, invariante is not None and invariante(i, arg), 0, True))
+            elif nome == "LEIT":
+                pilha.append(Expressao(i, i, False, False, 0, False))
+            elif nome in UNARIAS:
+                a = pilha.pop()
+                consumidos[i] = [a]
+                pilha.append(Expressao(a.inicio, i, a.pura, a.invariante, a.operacoes + 1, a.le_variavel))
+            elif nome in BINARIAS:
+                b = pilha.pop()
+                a = pilha.pop()
+                consumidos[i] = [a, b]
+                pura = a.pura and b.pura
+                if nome == "DIVI" and not (b.constante is not None and b.constante != 0):
+                    pura = False
+                pilha.append(Expressao(a.inicio, i, pura, pura and a.invariante and b.invariante,
+                                       a.operacoes + b.operacoes + 1, a.le_variavel or b.le_variavel))
+            elif nome in ("ARMZ", "IMPR", "DSVF"):
+                consumidos[i] = [pilha.pop()]
+            elif nome == "INPP":
+                pilha.clear()
+            else:
+                continue
+            if invariante is not None:
+                novo = pilha[-1] if nome in UNARIAS or nome in BINARIAS else None
+                for valor in consumidos.get(i, ()):
+                    # Expressões só de constantes ficam para o dobramento do otimizador peephole
+                    if (valor.invariante and valor.operacoes and valor.le_variavel
+                            and not (novo and novo.invariante)):
+                        fechadas.append(valor)
+        return consumidos, fechadas
+
+
+class Expressao:
+    def __init__(self, inicio, fim, pura, invariante, operacoes, le_variavel, constante=None):
+        self.inicio = inicio
+        self.fim = fim
+        self.pura = pura
+        self.invariante = invariante
+        self.operacoes = operacoes
+        self.le_variavel = le_variavel
+        self.constante = constante
+
+
+def _indice_de_copias(copias):
+    """{variável: cópias que deixam de valer quando ela é escrita}."""
+    indice = {}
+    for i, (destino, (tipo, origem)) in copias.items():
+        indice.setdefault(destino, set()).add(i)
+        if tipo == "var":
+            indice.setdefault(origem, set()).add(i)
+    return indice
+
+
+def _reescrever(instrucoes, trocas, insercoes=None, internos=()):
+    """Monta o novo código com os destinos dos desvios remapeados.
+
+    trocas[i] é a lista de instruções que substitui a instrução i (vazia
+    remove) e insercoes[i] a lista inserida antes dela. Um desvio para i
+    passa a entrar antes do que foi inserido, exceto os desvios cujo
+    endereço está em internos, que vão direto para a instrução i.
+    Instruções que não mudam são compartilhadas com o código antigo.
+    """
+    insercoes = insercoes or {}
+    antes = []
+    proprio = []
+    novo = []
+    saltos = []
+    for i, instr in enumerate(instrucoes):
+        antes.append(len(novo))
+        if i in insercoes:
+            novo.extend([nome, arg] for nome, arg in insercoes[i])
+        proprio.append(len(novo))
+        troca = trocas.get(i)
+        if troca is not None:
+            novo.extend(troca)
+        elif instr[0] in SALTOS:
+            saltos.append((len(novo), i))
+            novo.append(list(instr))
+        else:
+            novo.append(instr)
+    antes.append(len(novo))
+    proprio.append(len(novo))
+    for j, i in saltos:
+        destino = instrucoes[i][1]
+        novo[j][1] = (proprio if i in internos else antes)[destino]
+    return novo
+
+
+# Passes. Cada um recebe o grafo e o número de variáveis e devolve
+# (instruções, quantas transformações fez, número de variáveis).
+
+def propagar_copias(grafo, variaveis):
+    copias = grafo.copias()
+    if not copias:
+        return grafo.instrucoes, 0, variaveis
+    entrada = grafo.disponiveis(copias)
+    mortas_por = {x: sum(1 << i for i in indices) for x, indices in _indice_de_copias(copias).items()}
+    por_destino = {}
+    for i, (destino, _) in copias.items():
+        por_destino[destino] = por_destino.get(destino, 0) | (1 << i)
+    trocas = {}
+    for bloco in grafo.blocos:
+        disponiveis = entrada[bloco.indice]
+        for i in range(bloco.inicio, bloco.fim):
+            nome, arg = grafo.instrucoes[i]
+            if nome == "CRVL" and arg in por_destino:
+                # Duas cópias para a mesma variável nunca valem juntas
+                bits = disponiveis & por_destino[arg]
+                if bits:
+                    tipo, origem = copias[bits.bit_length() - 1][1]
+                    trocas[i] = [["CRVL" if tipo == "var" else "CRCT", origem]]
+            elif nome == "ARMZ":
+                disponiveis &= ~mortas_por.get(arg, 0)
+                if i in copias:
+                    disponiveis |= 1 << i
+    if not trocas:
+        return grafo.instrucoes, 0, variaveis
+    return _reescrever(grafo.instrucoes, trocas), len(trocas), variaveis
+
+
+def eliminar_armazenamentos_mortos(grafo, variaveis):
+    _, saida = grafo.vivas()
+    alcancaveis = grafo.alcancaveis()
+    trocas = {}
+    removidos = 0
+    for bloco in grafo.blocos:
+        if bloco.indice not in alcancaveis:
+            continue
+        consumidos, _ = grafo.expressoes(bloco)
+        vivas = set(saida[bloco.indice])
+        i = bloco.fim - 1
+        while i >= bloco.inicio:
+            nome, arg = grafo.instrucoes[i]
+            if nome == "ARMZ":
+                valor = consumidos[i][0]
+                if arg not in vivas and valor.pura:
+                    for j in range(valor.inicio, i + 1):
+                        trocas[j] = []
+                    removidos += 1
+                    i = valor.inicio - 1
+                    continue
+                vivas.discard(arg)
+            elif nome == "CRVL":
+                vivas.add(arg)
+            i -= 1
+    if not trocas:
+        return grafo.instrucoes, 0, variaveis
+    return _reescrever(grafo.instrucoes, trocas), removidos, variaveis
+
+
+def mover_invariantes(grafo, variaveis):
+    """Move as subexpressões invariantes dos laços para antes dos cabeçalhos.
+
+    Cada chamada trata laços disjuntos entre si, dos mais internos para os
+    mais externos; o que sai de um laço interno para dentro de um externo
+    é movido de novo na chamada seguinte.
+    """
+    alcance = None
+    tratados = set()
+    temporarias = {}
+    trocas = {}
+    insercoes = {}
+    internos = set()
+    movidas = 0
+    for h, corpo in grafo.lacos().items():
+        if corpo & tratados:
+            continue
+        cabecalho = grafo.blocos[h]
+        # Só dá para inserir antes do cabeçalho se nenhum bloco do laço cai nele
+        anterior = cabecalho.inicio - 1
+        if (anterior >= 0 and grafo.bloco_de[anterior] in corpo
+                and grafo.instrucoes[anterior][0] not in ("DSVI", "PARA")):
+            continue
+        if alcance is None:
+            alcance = grafo.alcance()
+
+        # Um CRVL x é invariante se nenhuma definição de x feita dentro do laço chega a ele
+        definicoes_no_laco = {}
+        for k in corpo:
+            bloco = grafo.blocos[k]
+            for i in range(bloco.inicio, bloco.fim):
+                nome, arg = grafo.instrucoes[i]
+                if nome == "ARMZ":
+                    definicoes_no_laco[arg] = definicoes_no_laco.get(arg, 0) | (1 << i)
+        fechadas = []
+        for k in sorted(corpo):
+            bloco = grafo.blocos[k]
+            variantes = {x for x, bits in definicoes_no_laco.items() if alcance[k] & bits}
+            invariante = _invariancia(grafo, bloco, variantes)
+            fechadas.extend(grafo.expressoes(bloco, invariante)[1])
+        if not fechadas:
+            continue
+        tratados |= corpo
+
+        preambulo = []
+        locais = {}
+        for expressao in fechadas:
+            codigo = tuple((nome, arg) for nome, arg in grafo.instrucoes[expressao.inicio:expressao.fim + 1])
+            if codigo not in locais:
+                locais[codigo] = variaveis + len(temporarias)
+                temporarias[(h, codigo)] = locais[codigo]
+                preambulo.extend(codigo)
+                preambulo.append(("ARMZ", locais[codigo]))
+            trocas[expressao.inicio] = [["CRVL", locais[codigo]]]
+            for j in range(expressao.inicio + 1, expressao.fim + 1):
+                trocas[j] = []
+        insercoes[cabecalho.inicio] = preambulo
+        for k in corpo:
+            bloco = grafo.blocos[k]
+            nome, arg = grafo.instrucoes[bloco.fim - 1]
+            if nome in SALTOS and arg == cabecalho.inicio:
+                internos.add(bloco.fim - 1)
+        movidas += len(fechadas)
+
+    if not movidas:
+        return grafo.instrucoes, 0, variaveis
+    # As temporárias são alocadas logo depois do INPP, antes de qualquer uso
+    inicio = 1 if grafo.instrucoes[0][0] == "INPP" else 0
+    insercoes[inicio] = [("ALME", 1)] * len(temporarias) + insercoes.get(inicio, [])
+    novo = _reescrever(grafo.instrucoes, trocas, insercoes, internos)
+    return novo, movidas, variaveis + len(temporarias)
+
+def _invariancia(grafo, bloco, variantes):
+    """invariante(i, x) para os CRVL do bloco, que é parte do laço.
+
+    variantes são as variáveis com alguma definição de dentro do laço
+    chegando à entrada do bloco; um ARMZ no próprio bloco também é de
+    dentro do laço.
+    """
+    invariantes = set()
+    escritas = set(variantes)
+    for i in range(bloco.inicio, bloco.fim):
+        nome, arg = grafo.instrucoes[i]
+        if nome == "CRVL" and arg not in escritas:
+            invariantes.add(i)
+        elif nome == "ARMZ":
+            escritas.add(arg)
+    return lambda i, x: i in invariantes
+
+
+FUNCOES_PASSES = {
+    "copias": propagar_copias,
+    "invariantes": mover_invariantes,
+    "armazenamentos_mortos": eliminar_armazenamentos_mortos,
+}
+
+
+def otimizar_fluxo_instrucoes(instrucoes, variaveis, passes=PASSES_FLUXO, max_rodadas=4):
+    """Otimiza pares (nome, argumento), com endereços e destinos em int.
+
+    Devolve (nova lista de [nome, argumento], número de variáveis,
+    {passe: transformações}). As temporárias criadas pelo passe
+    invariantes ficam depois das variáveis existentes. Código com saltos
+    não resolvidos ou pilha não vazia no começo de algum bloco volta
+    intacto.
+    """
+    for nome in passes:
+        if nome not in FUNCOES_PASSES:
+            raise ValueError(f"Passe de otimização desconhecido: {nome}")
+    contagem = dict.fromkeys(passes, 0)
+    instrucoes = [[nome, arg] for nome, arg in instrucoes]
+    for nome, arg in instrucoes:
+        if nome in SALTOS and not isinstance(arg, int):
+            return instrucoes, variaveis, contagem
+    if not GrafoDeFluxo(instrucoes).pilha_vazia_nas_bordas():
+        return instrucoes, variaveis, contagem
+
+    for _ in range(max_rodadas):
+        mudou = False
+        for nome in passes:
+            instrucoes, feitas, variaveis = FUNCOES_PASSES[nome](GrafoDeFluxo(instrucoes), variaveis)
+            contagem[nome] += feitas
+            mudou = mudou or bool(feitas)
+        if not mudou:
+            break
+    return instrucoes, variaveis, contagem
+
+
+def otimizar_fluxo_gerador(gerador, passes=PASSES_FLUXO):
+    """Aplica otimizar_fluxo_instrucoes() ao código do gerador; devolve {passe: transformações}."""
+    instrucoes, gerador.contadorEndRel, contagem = otimizar_fluxo_instrucoes(
+        gerador.instrucoes(), gerador.contadorEndRel, passes)
+    gerador.substituir(instrucoes)
+    return contagem
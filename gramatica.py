@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+
+
+# Gramática LL(1) da linguagem
+#
+# Declarada uma única vez como produções. FIRST, FOLLOW e a tabela
+# preditiva são calculados a partir dela; ações GERAR_CODIGO_ são
+# transparentes (anuláveis) para FIRST e FOLLOW.
+
+GRAMATICA: List[Tuple[str, List[str]]] = [
+    # PROG -> public class id { public static void main ( String [ ] id ) { GERAR_CODIGO_INPP CMDS GERAR_CODIGO_PARA } }
+    ("PROG", [
+        "KEYWORD_PUBLIC","KEYWORD_CLASS","KEYWORD_ID","KEYWORD_LBRACE",
+        "KEYWORD_PUBLIC","KEYWORD_STATIC","KEYWORD_VOID","KEYWORD_MAIN",
+        "KEYWORD_LPAR","KEYWORD_STRING","KEYWORD_LCOL","KEYWORD_RCOL","KEYWORD_ID","KEYWORD_RPAR",
+        "KEYWORD_LBRACE","GERAR_CODIGO_INPP","CMDS","GERAR_CODIGO_PARA","KEYWORD_RBRACE","KEYWORD_RBRACE"
+    ]),
+
+    # DC -> VAR MAIS_CMDS
+    ("DC", ["VAR","MAIS_CMDS"]),
+
+    # VAR -> TIPO VARS
+    ("VAR", ["TIPO","VARS"]),
+
+    # VARS -> id GERAR_CODIGO_DECL_VAR MAIS_VAR
+    ("VARS", ["KEYWORD_ID","GERAR_CODIGO_DECL_VAR","MAIS_VAR"]),
+
+    # MAIS_VAR -> , VARS | λ
+    ("MAIS_VAR", ["KEYWORD_COMMA","VARS"]),
+    ("MAIS_VAR", []),
+
+    # TIPO -> double
+    ("TIPO", ["KEYWORD_TDOUBLE"]),
+
+    # CMDS -> CMD MAIS_CMDS | CMD_COND CMDS | DC | λ
+    ("CMDS", ["CMD","MAIS_CMDS"]),
+    ("CMDS", ["CMD_COND","CMDS"]),
+    ("CMDS", ["DC"]),
+    ("CMDS", []),
+
+    # MAIS_CMDS -> ; CMDS
+    ("MAIS_CMDS", ["KEYWORD_SEMICOLON","CMDS"]),
+
+    # CMD_COND -> if ( CONDICAO ) GERAR_CODIGO_DSVF { CMDS } GERAR_CODIGO_DSVI GERAR_CODIGO_BACKPATCH_DSVF PFALSA
+    ("CMD_COND", [
+        "KEYWORD_IF","KEYWORD_LPAR","CONDICAO","KEYWORD_RPAR",
+        "GERAR_CODIGO_DSVF",
+        "KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE",
+        "GERAR_CODIGO_DSVI","GERAR_CODIGO_BACKPATCH_DSVF","PFALSA"
+    ]),
+    # CMD_COND -> while ( CONDICAO ) GERAR_CODIGO_DSVF_WHILE { CMDS } GERAR_CODIGO_DSVI_WHILE GERAR_CODIGO_BACKPATCH_DSVF
+    ("CMD_COND", [
+        "KEYWORD_WHILE",
+        "GERAR_CODIGO_MARQUE_WHILE_START",
+        "KEYWORD_LPAR","CONDICAO","KEYWORD_RPAR",
+        "GERAR_CODIGO_DSVF_WHILE",
+        "KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE",
+        "GERAR_CODIGO_DSVI_WHILE","GERAR_CODIGO_BACKPATCH_DSVF"
+    ]),
+
+    # CMD -> System.out.println ( EXPRESSAO ) GERAR_CODIGO_IMPR | id RESTO_IDENT
+    ("CMD", ["KEYWORD_PRINT","KEYWORD_LPAR","EXPRESSAO","KEYWORD_RPAR","GERAR_CODIGO_IMPR"]),
+    ("CMD", ["KEYWORD_ID","RESTO_IDENT"]),
+
+    # PFALSA -> else { CMDS } GERAR_CODIGO_BACKPATCH_DSVI | GERAR_CODIGO_BACKPATCH_DSVI
+    ("PFALSA", ["KEYWORD_ELSE","KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE","GERAR_CODIGO_BACKPATCH_DSVI"]),
+    ("PFALSA", ["GERAR_CODIGO_BACKPATCH_DSVI"]),
+
+    # RESTO_IDENT -> = EXP_IDENT GERAR_CODIGO_ARMZ
+    ("RESTO_IDENT", ["KEYWORD_ATBR","EXP_IDENT","GERAR_CODIGO_ARMZ"]),
+
+    # EXP_IDENT -> lerDouble() GERAR_CODIGO_LEIT | EXPRESSAO
+    ("EXP_IDENT", ["KEYWORD_READ","KEYWORD_LPAR","KEYWORD_RPAR","GERAR_CODIGO_LEIT"]),
+    ("EXP_IDENT", ["EXPRESSAO"]),
+
+    # CONDICAO -> EXPRESSAO RELACAO EXPRESSAO GERAR_CODIGO_REL
+    ("CONDICAO", ["EXPRESSAO","RELACAO","EXPRESSAO","GERAR_CODIGO_REL"]),
+
+    # RELACAO -> == | != | >= | <= | > | <
+    ("RELACAO", ["KEYWORD_EQUAL"]),
+    ("RELACAO", ["KEYWORD_DIF"]),
+    ("RELACAO", ["KEYWORD_GE"]),
+    ("RELACAO", ["KEYWORD_LE"]),
+    ("RELACAO", ["KEYWORD_G"]),
+    ("RELACAO", ["KEYWORD_L"]),
+
+    # EXPRESSAO -> TERMO OUTROS_TERMOS
+    ("EXPRESSAO", ["TERMO","OUTROS_TERMOS"]),
+
+    # TERMO -> FATOR_UN MAIS_FATORES
+    ("TERMO", ["FATOR_UN","MAIS_FATORES"]),
+
+    # FATOR_UN -> - FATOR GERAR_CODIGO_INVE | FATOR
+    ("FATOR_UN", ["KEYWORD_SUB","FATOR","GERAR_CODIGO_INVE"]),
+    ("FATOR_UN", ["FATOR"]),
+
+    # FATOR -> id GERAR_CODIGO_CRVL | numero_real GERAR_CODIGO_CRCT | ( EXPRESSAO )
+    ("FATOR", ["KEYWORD_ID","GERAR_CODIGO_CRVL"]),
+    ("FATOR", ["KEYWORD_NUMBER","GERAR_CODIGO_CRCT"]),
+    ("FATOR", ["KEYWORD_LPAR","EXPRESSAO","KEYWORD_RPAR"]),
+
+    # OUTROS_TERMOS -> OP_AD TERMO GERAR_CODIGO_OP_AD OUTROS_TERMOS | λ
+    ("OUTROS_TERMOS", ["OP_AD","TERMO","GERAR_CODIGO_OP_AD","OUTROS_TERMOS"]),
+    ("OUTROS_TERMOS", []),
+
+    # OP_AD -> + | -
+    ("OP_AD", ["KEYWORD_SUB"]),
+    ("OP_AD", ["KEYWORD_PLUS"]),
+
+    # MAIS_FATORES -> OP_MUL FATOR GERAR_CODIGO_OP_MUL MAIS_FATORES | λ
+    ("MAIS_FATORES", ["OP_MUL","FATOR","GERAR_CODIGO_OP_MUL","MAIS_FATORES"]),
+    ("MAIS_FATORES", []),
+
+    # OP_MUL -> * | /
+    ("OP_MUL", ["KEYWORD_MULT"]),
+    ("OP_MUL", ["KEYWORD_DIV"]),
+]
+
+SIMBOLO_INICIAL = "PROG"
+FIM = "END_OF_FILE"
+
+VERSAO_CACHE = 1
+ARQUIVO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tabela_ll1.cache.json")
+
+
+def eh_terminal(simbolo):
+    return simbolo.startswith("KEYWORD_") or simbolo == FIM
+
+def eh_acao(simbolo):
+    return simbolo.startswith("GERAR_CODIGO_")
+
+
+def _first_da_sequencia(simbolos, first, anulaveis):
+    """FIRST de uma sequência e se ela inteira é anulável."""
+    resultado = set()
+    for simbolo in simbolos:
+        if eh_acao(simbolo):
+            continue
+        if eh_terminal(simbolo):
+            resultado.add(simbolo)
+            return resultado, False
+        resultado |= first[simbolo]
+        if simbolo not in anulaveis:
+            return resultado, False
+    return resultado, True
+
+def calcular_first(gramatica=GRAMATICA):
+    first = {nt: set() for nt, _ in gramatica}
+    anulaveis = set()
+    mudou = True
+    while mudou:
+        mudou = False
+        for nt, producao in gramatica:
+            conjunto, anulavel = _first_da_sequencia(producao, first, anulaveis)
+            if not conjunto <= first[nt]:
+                first[nt] |= conjunto
+                mudou = True
+            if anulavel and nt not in anulaveis:
+                anulaveis.add(nt)
+                mudou = True
+    return first, anulaveis
+
+def calcular_follow(gramatica=GRAMATICA, first=None, anulaveis=None):
+    if first is None:
+        first, anulaveis = calcular_first(gramatica)
+    follow = {nt: set() for nt, _ in gramatica}
+    follow[gramatica[0][0]].add(FIM)
+    mudou = True
+    while mudou:
+        mudou = False
+        for nt, producao in gramatica:
+            for i, simbolo in enumerate(producao):
+                if eh_terminal(simbolo) or eh_acao(simbolo):
+                    continue
+                conjunto, anulavel = _first_da_sequencia(producao[i + 1:], first, anulaveis)
+                if anulavel:
+                    conjunto = conjunto | follow[nt]
+                if not conjunto <= follow[simbolo]:
+                    follow[simbolo] |= conjunto
+                    mudou = True
+    return follow
+
+
+def gerar_tabela(gramatica=GRAMATICA):
+    """Constrói a tabela preditiva. Devolve (tabela, conflitos)."""
+    first, anulaveis = calcular_first(gramatica)
+    follow = calcular_follow(gramatica, first, anulaveis)
+
+    tabela: Dict[Tuple[str, str], List[str]] = {}
+    conflitos = []
+    for nt, producao in gramatica:
+        conjunto, anulavel = _first_da_sequencia(producao, first, anulaveis)
+        if anulavel:
+            conjunto = conjunto | follow[nt]
+        for terminal in sorted(conjunto):
+            chave = (nt, terminal)
+            if chave in tabela and tabela[chave] != producao:
+                conflitos.append((nt, terminal, tabela[chave], producao))
+                continue
+            tabela[chave] = list(producao)
+    return tabela, conflitos
+
+
+def hash_gramatica(gramatica=GRAMATICA):
+    texto = json.dumps([VERSAO_CACHE, gramatica], separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def _ler_cache(arquivo, esperado):
+    try:
+        with open(arquivo, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if dados.get("versao") != VERSAO_CACHE or dados.get("hash") != esperado:
+        return None
+    return {(nt, terminal): producao for nt, terminal, producao in dados["tabela"]}
+
+def salvar_cache(tabela, arquivo=ARQUIVO_CACHE, gramatica=GRAMATICA):
+    dados = {
+        "versao": VERSAO_CACHE,
+        "hash": hash_gramatica(gramatica),
+        "tabela": [[nt, terminal, producao] for (nt, terminal), producao in tabela.items()],
+    }
+    temporario = f"{arquivo}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, separators=(",", ":"))
+    os.replace(temporario, arquivo)
+
+def carregar_tabela(arquivo=ARQUIVO_CACHE, gramatica=GRAMATICA):
+    """Lê a tabela do cache; se ele faltar ou estiver desatualizado, reconstrói e regrava."""
+    tabela = _ler_cache(arquivo, hash_gramatica(gramatica)) if arquivo else None
+    if tabela is not None:
+        return tabela
+
+    tabela, conflitos = gerar_tabela(gramatica)
+    if conflitos:
+        descricao = "; ".join(f"({nt}, {t})" for nt, t, _, _ in conflitos)
+        raise Exception(f"Erro Interno: gramática não é LL(1), conflitos em {descricao}")
+    if arquivo:
+        try:
+            salvar_cache(tabela, arquivo, gramatica)
+        except OSError:
+            pass
+    return tabela
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera a tabela LL(1) a partir da gramática.")
+    parser.add_argument("--cache", default=ARQUIVO_CACHE)
+    parser.add_argument("--mostrar", action="store_true", help="imprime FIRST e FOLLOW")
+    opcoes = parser.parse_args()
+
+    if opcoes.mostrar:
+        first, _ = calcular_first()
+        follow = calcular_follow()
+        for nt in first:
+            print(f"FIRST({nt}) = {{{', '.join(sorted(first[nt]))}}}")
+            print(f"FOLLOW({nt}) = {{{', '.join(sorted(follow[nt]))}}}")
+
+    tabela, conflitos = gerar_tabela()
+    for nt, terminal, anterior, nova in conflitos:
+        print(f"Conflito em ({nt}, {terminal}): {anterior} x {nova}")
+    if conflitos:
+        exit(1)
+    salvar_cache(tabela, opcoes.cache)
+    print(f"Tabela com {len(tabela)} entradas gravada em {opcoes.cache}")
@@ -0,0 +1,176 @@
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from codigo_objeto import OP
+from p2 import carregar_programa, decodificar
+
+
+# Execução em lote (lockstep) com NumPy
+#
+# Um mesmo programa roda sobre N registros de entrada de uma só vez: cada
+# posição de D vira um vetor de N raias e cada instrução é aplicada a
+# todas as raias que estão no mesmo endereço. Quando um DSVF diverge, as
+# raias seguem com pc diferentes; a cada passo executa-se o menor pc entre
+# as raias ativas (com a máscara das raias que estão nele), o que faz os
+# caminhos se reencontrarem no fim do if ou do while. Raias que chegam a
+# PARA são aposentadas. Cada raia tem o seu topo de pilha em s, já que um
+# ALME dentro de um bloco só executa nas raias que entram nele.
+#
+# Todos os valores são float64, como o double da linguagem fonte; no
+# interpretador os inteiros vindos de CRCT continuam int. Divisão por zero
+# não levanta exceção: resulta em inf/nan na raia.
+
+def _exigir_numpy():
+    if np is None:
+        raise ImportError("o modo em lote requer NumPy (pip install numpy)")
+
+
+def executar_lote(C, entradas, max_passos=None):
+    """Executa C para cada linha de entradas (matriz N x K de doubles).
+
+    LEIT da raia i lê entradas[i, 0], entradas[i, 1], ... em ordem. Devolve
+    uma lista com N arrays, com os valores impressos por IMPR em cada raia.
+    """
+    _exigir_numpy()
+    entradas = np.asarray(entradas, dtype=np.float64)
+    if entradas.ndim == 1:
+        entradas = entradas.reshape(-1, 1)
+    N, K = entradas.shape
+
+    ops, args = decodificar(C)
+    fim = len(ops)
+
+    D = np.zeros((16, N))
+    pc = np.zeros(N, dtype=np.int64)
+    s = np.zeros(N, dtype=np.int64)
+    lidos = np.zeros(N, dtype=np.int64)
+    ativo = np.ones(N, dtype=bool)
+    eventos = []
+
+    aritmetica = {
+        OP['SOMA']: np.add, OP['SUBT']: np.subtract,
+        OP['MULT']: np.multiply, OP['DIVI']: np.floor_divide,
+    }
+    comparacao = {
+        OP['CPME']: np.less, OP['CPMA']: np.greater, OP['CPIG']: np.equal,
+        OP['CDES']: np.not_equal, OP['CPMI']: np.less_equal, OP['CMAI']: np.greater_equal,
+    }
+
+    passos = 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        while True:
+            ativo &= pc < fim
+            if not ativo.any():
+                break
+            if max_passos is not None and passos >= max_passos:
+                raise RuntimeError(f"limite de {max_passos} passos atingido")
+            passos += 1
+
+            p = int(pc[ativo].min())
+            idx = np.flatnonzero(ativo & (pc == p))
+            # Topo da pilha de cada raia: raias que executaram números
+            # diferentes de ALME chegam a p com alturas diferentes
+            t = s[idx]
+            op, arg = ops[p], args[p]
+            proximo = p + 1
+
+            # Garante espaço para um empilhamento (ou para o ALME) na raia mais alta
+            altura = int(t.max()) + 2 + (arg if op == OP['ALME'] else 0)
+            if altura > D.shape[0]:
+                D = np.concatenate([D, np.zeros((max(altura, D.shape[0]), N))])
+
+            if op == OP['INPP']:
+                s[idx] = -1
+            elif op == OP['ALME']:
+                for k in range(1, arg + 1):
+                    D[t + k, idx] = 0.0
+                s[idx] += arg
+            elif op == OP['CRCT']:
+                D[t + 1, idx] = arg
+                s[idx] += 1
+            elif op == OP['CRVL']:
+                D[t + 1, idx] = D[arg, idx]
+                s[idx] += 1
+            elif op in aritmetica:
+                D[t - 1, idx] = aritmetica[op](D[t - 1, idx], D[t, idx])
+                s[idx] -= 1
+            elif op in comparacao:
+                D[t - 1, idx] = comparacao[op](D[t - 1, idx], D[t, idx])
+                s[idx] -= 1
+            elif op == OP['CONJ']:
+                D[t - 1, idx] = (D[t - 1, idx] == 1) & (D[t, idx] == 1)
+                s[idx] -= 1
+            elif op == OP['DISJ']:
+                D[t - 1, idx] = (D[t - 1, idx] == 1) | (D[t, idx] == 1)
+                s[idx] -= 1
+            elif op == OP['INVE']:
+                D[t, idx] = -D[t, idx]
+            elif op == OP['NEGA']:
+                D[t, idx] = 1 - D[t, idx]
+            elif op == OP['ARMZ']:
+                D[arg, idx] = D[t, idx]
+                s[idx] -= 1
+            elif op == OP['DSVI']:
+                proximo = arg
+            elif op == OP['DSVF']:
+                falsos = D[t, idx] == 0
+                s[idx] -= 1
+                pc[idx] = np.where(falsos, arg, p + 1)
+                continue
+            elif op == OP['LEIT']:
+                if (lidos[idx] >= K).any():
+                    raise EOFError(f"raia sem entrada suficiente para LEIT no endereço {p}")
+                D[t + 1, idx] = entradas[idx, lidos[idx]]
+                lidos[idx] += 1
+                s[idx] += 1
+            elif op == OP['IMPR']:
+                eventos.append((idx, D[t, idx].copy()))
+                s[idx] -= 1
+            elif op == OP['PARA']:
+                ativo[idx] = False
+                continue
+            else:
+                print("ERRO DURANTE A EXECUÇÃO DO PROGRAMA")
+                ativo[idx] = False
+                continue
+
+            pc[idx] = proximo
+
+    return _saidas_por_raia(eventos, N)
+
+
+def _saidas_por_raia(eventos, N):
+    if not eventos:
+        return [np.empty(0) for _ in range(N)]
+    raias = np.concatenate([idx for idx, _ in eventos])
+    valores = np.concatenate([v for _, v in eventos])
+    # Os eventos já estão em ordem de execução; a ordenação estável por raia a preserva
+    ordem = np.argsort(raias, kind="stable")
+    limites = np.cumsum(np.bincount(raias, minlength=N))[:-1]
+    return np.split(valores[ordem], limites)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa um programa da MaqHipo sobre muitos registros de entrada com NumPy.")
+    parser.add_argument("programa", help="código objeto (texto ou binário)")
+    parser.add_argument("entradas", help="um registro por linha, doubles separados por espaço")
+    parser.add_argument("-o", "--saida", default=None,
+                        help="arquivo de saída, uma linha por registro (padrão: stdout)")
+    opcoes = parser.parse_args()
+
+    _exigir_numpy()
+    C = carregar_programa(opcoes.programa)
+    entradas = np.loadtxt(opcoes.entradas, ndmin=2)
+    saidas = executar_lote(C, entradas)
+
+    linhas = "\n".join(" ".join(repr(float(v)) for v in saida) for saida in saidas)
+    if opcoes.saida:
+        with open(opcoes.saida, "w", encoding="utf-8") as f:
+            f.write(linhas + "\n")
+    else:
+        print(linhas)
@@ -0,0 +1,227 @@
+import math
+
+from codigo_objeto import converter_argumento
+
+
+# Otimizador peephole do código da MaqHipo
+#
+# Trabalha sobre as instruções do GeradorDeCodigo, como pares [nome,
+# argumento], depois que a análise termina e antes de salvar. Cada passe
+# marca instruções para remoção; no fim os alvos de DSVF/DSVI são
+# remapeados para a nova numeração.
+
+SALTOS = ("DSVI", "DSVF")
+
+OPERACOES = {
+    "SOMA": lambda a, b: a + b,
+    "SUBT": lambda a, b: a - b,
+    "MULT": lambda a, b: a * b,
+    "DIVI": lambda a, b: a // b,
+    "CPME": lambda a, b: 1 if a < b else 0,
+    "CPMA": lambda a, b: 1 if a > b else 0,
+    "CPIG": lambda a, b: 1 if a == b else 0,
+    "CDES": lambda a, b: 1 if a != b else 0,
+    "CPMI": lambda a, b: 1 if a <= b else 0,
+    "CMAI": lambda a, b: 1 if a >= b else 0,
+}
+
+PASSES = ("dobramento", "saltos", "codigo_morto", "carga_armazenamento")
+
+
+def _alvos(instrucoes):
+    return {arg for nome, arg in instrucoes if nome in SALTOS}
+
+
+def dobrar_constantes(instrucoes, removidas):
+    """CRCT a CRCT b OP -> CRCT (a OP b), CRCT a INVE -> CRCT -a e
+    CRCT k DSVF n -> DSVI n (k == 0) ou nada (k != 0)."""
+    alvos = _alvos(instrucoes)
+    mudou = False
+    ativas = [i for i in range(len(instrucoes)) if i not in removidas]
+    k = 0
+    while k < len(ativas):
+        i = ativas[k]
+        nome, arg = instrucoes[i]
+        if nome != "CRCT":
+            k += 1
+            continue
+
+        if k + 1 < len(ativas):
+            j = ativas[k + 1]
+            if instrucoes[j][0] == "INVE" and j not in alvos:
+                instrucoes[i][1] = repr(-converter_argumento(arg))
+                removidas.add(j)
+                del ativas[k + 1]
+                mudou = True
+                continue
+            if instrucoes[j][0] == "DSVF" and j not in alvos:
+                if converter_argumento(arg) == 0:
+                    instrucoes[i] = ["DSVI", instrucoes[j][1]]
+                    removidas.add(j)
+                else:
+                    removidas.update((i, j))
+                del ativas[k:k + 2]
+                mudou = True
+                continue
+
+        if k + 2 < len(ativas):
+            j, m = ativas[k + 1], ativas[k + 2]
+            if (instrucoes[j][0] == "CRCT" and instrucoes[m][0] in OPERACOES
+                    and j not in alvos and m not in alvos):
+                a, b = converter_argumento(arg), converter_argumento(instrucoes[j][1])
+                try:
+                    resultado = OPERACOES[instrucoes[m][0]](a, b)
+                except ZeroDivisionError:
+                    resultado = None
+                if resultado is not None and math.isfinite(resultado):
+                    instrucoes[i][1] = repr(resultado)
+                    removidas.update((j, m))
+                    del ativas[k + 1:k + 3]
+                    mudou = True
+                    continue
+        k += 1
+    return mudou
+
+
+def encadear_saltos(instrucoes, removidas):
+    """Salto para um DSVI passa a saltar direto para o destino final."""
+    mudou = False
+    for i, (nome, arg) in enumerate(instrucoes):
+        if nome not in SALTOS or i in removidas:
+            continue
+        destino = arg
+        vistos = {i}
+        while (destino < len(instrucoes) and instrucoes[destino][0] == "DSVI"
+               and destino not in vistos):
+            vistos.add(destino)
+            destino = instrucoes[destino][1]
+        if destino != arg:
+            instrucoes[i][1] = destino
+            mudou = True
+
+    # DSVI para a instrução seguinte não faz nada
+    for i, (nome, arg) in enumerate(instrucoes):
+        if nome == "DSVI" and i not in removidas:
+            proxima = i + 1
+            while proxima in removidas:
+                proxima += 1
+            if arg == proxima:
+                removidas.add(i)
+                mudou = True
+    return mudou
+
+
+def remover_codigo_morto(instrucoes, removidas):
+    """Remove o que não é alcançável a partir da instrução 0."""
+    alcancaveis = set()
+    pendentes = [0]
+    while pendentes:
+        i = pendentes.pop()
+        while i < len(instrucoes) and i not in alcancaveis:
+            alcancaveis.add(i)
+            nome, arg = instrucoes[i]
+            if nome == "PARA":
+                break
+            if nome == "DSVI":
+                pendentes.append(arg)
+                break
+            if nome == "DSVF":
+                pendentes.append(arg)
+            i += 1
+
+    mudou = False
+    for i in range(len(instrucoes)):
+        if i not in alcancaveis and i not in removidas:
+            removidas.add(i)
+            mudou = True
+    return mudou
+
+
+def remover_carga_armazenamento(instrucoes, removidas):
+    """CRVL x ARMZ x não altera nada e pode sair."""
+    alvos = _alvos(instrucoes)
+    ativas = [i for i in range(len(instrucoes)) if i not in removidas]
+    mudou = False
+    for i, j in zip(ativas, ativas[1:]):
+        if i in removidas:
+            continue
+        if (instrucoes[i][0] == "CRVL" and instrucoes[j][0] == "ARMZ"
+                and instrucoes[i][1] == instrucoes[j][1] and j not in alvos):
+            removidas.update((i, j))
+            mudou = True
+    return mudou
+
+
+FUNCOES_PASSES = {
+    "dobramento": dobrar_constantes,
+    "saltos": encadear_saltos,
+    "codigo_morto": remover_codigo_morto,
+    "carga_armazenamento": remover_carga_armazenamento,
+}
+
+
+def _compactar(instrucoes, removidas):
+    novo_endereco = []
+    mantidas = 0
+    for i in range(len(instrucoes) + 1):
+        novo_endereco.append(mantidas)
+        if i < len(instrucoes) and i not in removidas:
+            mantidas += 1
+
+    resultado = []
+    for i, (nome, arg) in enumerate(instrucoes):
+        if i in removidas:
+            continue
+        if nome in SALTOS:
+            arg = novo_endereco[arg]
+        resultado.append([nome, arg])
+    return resultado
+
+
+def ler_passes(texto):
+    """Lista de passes de um texto separado por vírgulas, como o de --passes.
+
+    Levanta ValueError se algum nome não for um passe conhecido.
+    """
+    passes = [p for p in texto.split(",") if p]
+    desconhecidos = [p for p in passes if p not in FUNCOES_PASSES]
+    if desconhecidos:
+        raise ValueError(f"passe de otimização desconhecido: {', '.join(desconhecidos)} "
+                         f"(disponíveis: {','.join(PASSES)})")
+    return passes
+
+
+def otimizar_instrucoes(instrucoes, passes=PASSES, max_rodadas=10):
+    """Otimiza pares (nome, argumento), com endereços e destinos em int.
+
+    Devolve (nova lista de [nome, argumento], número de instruções
+    removidas). Se houver algum salto ainda não resolvido
+    (END_A_DECLARAR), as instruções voltam intactas.
+    """
+    for nome in passes:
+        if nome not in FUNCOES_PASSES:
+            raise ValueError(f"Passe de otimização desconhecido: {nome}")
+
+    instrucoes = [[nome, arg] for nome, arg in instrucoes]
+    for nome, arg in instrucoes:
+        if nome in SALTOS and not isinstance(arg, int):
+            return instrucoes, 0
+
+    tamanho_original = len(instrucoes)
+    for _ in range(max_rodadas):
+        removidas = set()
+        mudou = False
+        for nome in passes:
+            mudou = FUNCOES_PASSES[nome](instrucoes, removidas) or mudou
+        instrucoes = _compactar(instrucoes, removidas)
+        if not mudou:
+            break
+
+    return instrucoes, tamanho_original - len(instrucoes)
+
+
+def otimizar_gerador(gerador, passes=PASSES):
+    """Aplica otimizar_instrucoes() ao código do gerador e devolve quantas instruções saíram."""
+    instrucoes, removidas = otimizar_instrucoes(gerador.instrucoes(), passes)
+    gerador.substituir(instrucoes)
+    return removidas
@@ -1,7 +1,19 @@
-from typing import List, Dict, Tuple
+import argparse
+import re
+from array import array
+from typing import Iterable, List, Dict, Tuple
 from collections import deque
+from contextlib import nullcontext
 from enum import Enum, auto
 
+from codigo_objeto import (EFEITO_PILHA, OP, OPCODES, Instrucao, Programa, converter_argumento,
+                           escrever_binario)
+from estatisticas import Estatisticas
+from avaliador import PASSOS, TAMANHO, avaliar_gerador
+from fluxo import otimizar_fluxo_gerador
+from gramatica import ARQUIVO_CACHE, carregar_tabela
+from otimizador import PASSES, ler_passes, otimizar_gerador
+
 
 # Definições de Tipos de Token
 
@@ -42,10 +54,17 @@ class TokenType(Enum):
     END_OF_FILE = auto()
     UNKNOWN = auto()
 
+    # Cada membro é único, então o hash pela identidade basta e evita o
+    # __hash__ em Python do Enum (que faz hash do nome) nos dicionários
+    # indexados por tipo, como TabelaDensa.terminais
+    __hash__ = object.__hash__
+
 
 # Estrutura de Token
 
 class Token:
+    __slots__ = ("tipo", "lexema", "linha")
+
     def __init__(self, tipo, lexema, linha):
         self.tipo = tipo
         self.lexema = lexema
@@ -54,21 +73,48 @@ class Token:
 
 # Gerador de Código (MaqHipo)
 
+# Argumento de DSVF/DSVI até o backpatch
+A_DECLARAR = "END_A_DECLARAR"
+
+# "NOME " de cada opcode, para texto() não formatar o nome a cada linha
+PREFIXOS = [f"{nome} " for nome in OPCODES]
+
 class EntradaTS:
     def __init__(self, lexema, endRel):
         self.lexema = lexema
         self.endRel = endRel
 
 class GeradorDeCodigo:
+    """Código C em duas colunas paralelas: ops (códigos de codigo_objeto.OP)
+    e args (int para endereços, destinos e ALME; o lexema para CRCT; None
+    sem argumento). O backpatch só escreve em args, e o texto só é montado
+    por texto() e salvar(), de uma vez."""
+
     def __init__(self):
-        self.codigo_c = []
+        self.ops = array("B")
+        self.args = []
         self.ts = {}
         self.contadorEndRel = 0
+        # Altura da pilha de operandos ao longo do código emitido. Todo
+        # desvio gerado acontece com a pilha vazia, então acompanhar a
+        # altura em ordem de emissão dá a altura máxima do programa.
+        self.alturaPilha = 0
+        self.alturaMaxima = 0
+
+    def __len__(self):
+        return len(self.ops)
 
-    def adicionar(self, instrucao):
+    def adicionar(self, nome, argumento=None):
         """Adiciona uma instrução ao código C e retorna o endereço da instrução."""
-        self.codigo_c.append(f"{instrucao}")
-        return len(self.codigo_c) - 1
+        self.ops.append(OP[nome])
+        self.args.append(argumento)
+        if nome == "INPP":
+            self.alturaPilha = 0
+        else:
+            self.alturaPilha += EFEITO_PILHA.get(nome, 0)
+            if self.alturaPilha > self.alturaMaxima:
+                self.alturaMaxima = self.alturaPilha
+        return len(self.ops) - 1
 
     def declararVariavel(self, lexema):
         """Registra na TS do gerador e adicionar ALME 1."""
@@ -77,23 +123,67 @@ class GeradorDeCodigo:
         entrada = EntradaTS(lexema, self.contadorEndRel)
         self.ts[lexema] = entrada
         self.contadorEndRel += 1
-        self.adicionar("ALME 1")
+        self.adicionar("ALME", 1)
 
     def buscarEntrada(self, lexema):
         return self.ts.get(lexema)
 
     def backpatch(self, enderecoLinha, destino):
-        instrucao = self.codigo_c[enderecoLinha]
-        partes = instrucao.split()
-        if len(partes) == 2 and partes[1] == 'END_A_DECLARAR':
-            self.codigo_c[enderecoLinha] = f"{partes[0]} {destino}"
-        else:
-            raise Exception(f"Erro Interno: instrução inválida: {instrucao}")
+        if self.args[enderecoLinha] != A_DECLARAR:
+            nome = OPCODES[self.ops[enderecoLinha]]
+            raise Exception(f"Erro Interno: instrução inválida: {nome} {self.args[enderecoLinha]}")
+        self.args[enderecoLinha] = destino
+
+    def instrucoes(self):
+        """Percorre o código C como pares (instrução, argumento ou None)."""
+        return zip(map(OPCODES.__getitem__, self.ops), self.args)
+
+    def substituir(self, instrucoes):
+        """Troca o código C pelos pares (instrução, argumento) dados, como os dos otimizadores.
+
+        Argumentos em texto que não sejam de CRCT (endereços, destinos) viram int.
+        """
+        self.ops = array("B")
+        self.args = []
+        for nome, arg in instrucoes:
+            if isinstance(arg, str) and nome != "CRCT":
+                arg = int(arg)
+            self.ops.append(OP[nome])
+            self.args.append(arg)
+
+    def texto(self):
+        """O código C em linhas de texto, sem as quebras."""
+        return [OPCODES[op] if arg is None else PREFIXOS[op] + str(arg)
+                for op, arg in zip(self.ops, self.args)]
+
+    def dimensoes(self):
+        """(posições alocadas por ALME, altura máxima da pilha de operandos).
+
+        O otimizador peephole só remove instruções e o de fluxo só troca ou
+        move expressões inteiras, então a altura medida na emissão continua
+        sendo um limite válido para o código otimizado. A avaliação parcial
+        pode passar dela e atualiza alturaMaxima.
+        """
+        return self.contadorEndRel, self.alturaMaxima
+
+    def programa(self):
+        """O código como Programa (ver codigo_objeto), para executar sem passar por arquivo."""
+        memoria, pilha = self.dimensoes()
+        instrucoes = (Instrucao(nome, converter_argumento(arg) if isinstance(arg, str) else arg)
+                      for nome, arg in self.instrucoes())
+        return Programa(instrucoes, memoria, pilha)
 
     def salvar(self, nome_arquivo="codigoCompilado.txt"):
+        memoria, pilha = self.dimensoes()
+        linhas = self.texto()
+        linhas.append("")
         with open(nome_arquivo, "w", encoding="utf-8") as f:
-            for instr in self.codigo_c:
-                f.write(instr + "\n")
+            f.write(f"#MEMORIA {memoria}\n#PILHA {pilha}\n" + "\n".join(linhas))
+
+    def salvar_binario(self, nome_arquivo="codigoCompilado.bin"):
+        """Grava o código no formato binário com pool de constantes (ver codigo_objeto)."""
+        memoria, pilha = self.dimensoes()
+        escrever_binario(nome_arquivo, self.instrucoes(), memoria, pilha)
 
 
 # Estados do AFD
@@ -108,25 +198,44 @@ class LexerState(Enum):
 
 # Classe Lexer
 
+PALAVRAS_RESERVADAS = {
+    "public": TokenType.KEYWORD_PUBLIC,
+    "class": TokenType.KEYWORD_CLASS,
+    "static": TokenType.KEYWORD_STATIC,
+    "void": TokenType.KEYWORD_VOID,
+    "main": TokenType.KEYWORD_MAIN,
+    "String": TokenType.KEYWORD_STRING,
+    "double": TokenType.KEYWORD_TDOUBLE,
+    "if": TokenType.KEYWORD_IF,
+    "else": TokenType.KEYWORD_ELSE,
+    "while": TokenType.KEYWORD_WHILE,
+    "System.out.println": TokenType.KEYWORD_PRINT,
+    "lerDouble": TokenType.KEYWORD_READ,
+}
+
+
+PONTUACAO = {
+    '{': TokenType.KEYWORD_LBRACE,
+    '}': TokenType.KEYWORD_RBRACE,
+    '/': TokenType.KEYWORD_DIV,
+    '+': TokenType.KEYWORD_PLUS,
+    ';': TokenType.KEYWORD_SEMICOLON,
+    '(': TokenType.KEYWORD_LPAR,
+    ')': TokenType.KEYWORD_RPAR,
+    '[': TokenType.KEYWORD_LCOL,
+    ']': TokenType.KEYWORD_RCOL,
+    ',': TokenType.KEYWORD_COMMA,
+    '-': TokenType.KEYWORD_SUB,
+    '*': TokenType.KEYWORD_MULT,
+}
+
+
 class Lexer:
     def __init__(self, source):
         self.source = source
         self.index = 0
         self.linha = 1
-        self.keywords = {
-            "public": TokenType.KEYWORD_PUBLIC,
-            "class": TokenType.KEYWORD_CLASS,
-            "static": TokenType.KEYWORD_STATIC,
-            "void": TokenType.KEYWORD_VOID,
-            "main": TokenType.KEYWORD_MAIN,
-            "String": TokenType.KEYWORD_STRING,
-            "double": TokenType.KEYWORD_TDOUBLE,
-            "if": TokenType.KEYWORD_IF,
-            "else": TokenType.KEYWORD_ELSE,
-            "while": TokenType.KEYWORD_WHILE,
-            "System.out.println": TokenType.KEYWORD_PRINT,
-            "lerDouble": TokenType.KEYWORD_READ,
-        }
+        self.keywords = PALAVRAS_RESERVADAS
 
     def verificarPrint(self):
         casoNao = self.index
@@ -160,6 +269,11 @@ class Lexer:
         while not self.fimLexema() and self.peek().isspace():
             self.proximo()
 
+    def tokens(self):
+        """Gera os tokens sob demanda; depois do fim, END_OF_FILE indefinidamente."""
+        while True:
+            yield self.proximoToken()
+
     def proximoToken(self):
         self.ignoraEspaco()
         if self.fimLexema():
@@ -201,20 +315,7 @@ class Lexer:
                     estado = LexerState.OPERADORES_RELACIONAIS
                 else:
                     self.proximo()
-                    return {
-                        '{': Token(TokenType.KEYWORD_LBRACE, '{', linhaToken),
-                        '}': Token(TokenType.KEYWORD_RBRACE, '}', linhaToken),
-                        '/': Token(TokenType.KEYWORD_DIV, '/', linhaToken),
-                        '+': Token(TokenType.KEYWORD_PLUS, '+', linhaToken),
-                        ';': Token(TokenType.KEYWORD_SEMICOLON, ';', linhaToken),
-                        '(': Token(TokenType.KEYWORD_LPAR, '(', linhaToken),
-                        ')': Token(TokenType.KEYWORD_RPAR, ')', linhaToken),
-                        '[': Token(TokenType.KEYWORD_LCOL, '[', linhaToken),
-                        ']': Token(TokenType.KEYWORD_RCOL, ']', linhaToken),
-                        ',': Token(TokenType.KEYWORD_COMMA, ',', linhaToken),
-                        '-': Token(TokenType.KEYWORD_SUB, '-', linhaToken),
-                        '*': Token(TokenType.KEYWORD_MULT, '*', linhaToken),
-                    }.get(c, Token(TokenType.UNKNOWN, c, linhaToken))
+                    return Token(PONTUACAO.get(c, TokenType.UNKNOWN), c, linhaToken)
 
             elif estado == LexerState.IDENTIFICADORES:
                 if c.isalnum() or c == '_':
@@ -259,142 +360,246 @@ class Lexer:
                     return Token(TokenType.KEYWORD_EQUAL, lexema, linhaToken)
                 return Token(TokenType.KEYWORD_ATBR, lexema, linhaToken)
 
+# Lexer por expressão regular
+#
+# Mesma sequência de tokens (tipos, lexemas e linhas) do Lexer acima, mas
+# cada token sai de um único match da expressão mestre, sem percorrer o
+# fonte caractere a caractere. As classes de caracteres do Lexer usam
+# isalpha/isdigit/isspace, que em Unicode vão além do ASCII; por isso
+# fontes que não são ASCII continuam com o Lexer de referência (ver
+# criar_lexer).
+
+PADRAO_TOKEN = re.compile(r"""
+    (?P<espaco>[\x20\t\n\r\x0b\x0c\x1c-\x1f]+)
+  | (?P<print>System\.out\.println)
+  | (?P<id>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<numero>[0-9]+(?:\.[0-9]*)?)
+  | (?P<relacional>[<>!=]=?)
+  | (?P<outro>.)
+""", re.VERBOSE | re.DOTALL)
+
+RELACIONAIS = {
+    '<': TokenType.KEYWORD_L,
+    '>': TokenType.KEYWORD_G,
+    '=': TokenType.KEYWORD_ATBR,
+    '<=': TokenType.KEYWORD_LE,
+    '>=': TokenType.KEYWORD_GE,
+    '==': TokenType.KEYWORD_EQUAL,
+    '!=': TokenType.KEYWORD_DIF,
+}
+
+class LexerRegex:
+    def __init__(self, source):
+        self.source = source
+        self.index = 0
+        self.linha = 1
+        self.keywords = PALAVRAS_RESERVADAS
+        self._tokens = self.tokens()
+
+    def tokens(self):
+        """Gera todos os tokens do fonte, terminando com END_OF_FILE."""
+        source = self.source
+        fim = len(source)
+        keywords = self.keywords
+        ident = TokenType.KEYWORD_ID
+        for m in PADRAO_TOKEN.finditer(source):
+            tipo = m.lastgroup
+            lexema = m.group()
+            self.index = m.end()
+            if tipo == "espaco":
+                self.linha += lexema.count("\n")
+                continue
+            if tipo == "id":
+                yield Token(keywords.get(lexema, ident), lexema, self.linha)
+            elif tipo == "numero":
+                yield Token(TokenType.KEYWORD_NUMBER, lexema, self.linha)
+            elif tipo == "print":
+                yield Token(TokenType.KEYWORD_PRINT, lexema, self.linha)
+            elif tipo == "relacional":
+                # Como no Lexer, um '<', '>' ou '=' sozinho no fim do arquivo vira UNKNOWN
+                if lexema == "!" or (len(lexema) == 1 and self.index == fim):
+                    yield Token(TokenType.UNKNOWN, lexema, self.linha)
+                else:
+                    yield Token(RELACIONAIS[lexema], lexema, self.linha)
+            else:
+                yield Token(PONTUACAO.get(lexema, TokenType.UNKNOWN), lexema, self.linha)
+        while True:
+            yield Token(TokenType.END_OF_FILE, "", self.linha)
+
+    def proximoToken(self):
+        return next(self._tokens)
+
+
+LEXERS = {
+    "referencia": Lexer,
+    "regex": LexerRegex,
+}
+
+def criar_lexer(source, motor="regex"):
+    if motor not in LEXERS:
+        raise ValueError(f"Lexer desconhecido: {motor}")
+    if motor == "regex" and not source.isascii():
+        return Lexer(source)
+    return LEXERS[motor](source)
+
+def tokens_de_linhas(linhas, motor="regex"):
+    """Analisa o fonte linha a linha, em streaming.
+
+    Nenhum token atravessa uma quebra de linha (ela é sempre espaço), então
+    lexar cada linha separadamente dá a mesma sequência do fonte inteiro,
+    com memória limitada ao tamanho da maior linha.
+    """
+    linha = 1
+    for texto in linhas:
+        lexer = criar_lexer(texto, motor)
+        lexer.linha = linha
+        for token in lexer.tokens():
+            if token.tipo == TokenType.END_OF_FILE:
+                break
+            yield token
+        linha = lexer.linha
+    yield Token(TokenType.END_OF_FILE, "", linha)
+
+# Tokens em colunas
+#
+# Uma lista de Token guarda, por token, o objeto, o lexema (uma string
+# própria) e as referências da lista: dezenas de bytes por byte do fonte.
+# BufferDeTokens guarda só quatro arrays paralelos, com o código do tipo
+# (TokenType.value), o início e o fim do lexema no fonte e a linha: de 7
+# a 13 bytes por token, conforme o tamanho do fonte. O lexema é fatiado
+# do fonte só quando alguém o lê, o que o analisador só faz para
+# identificadores e números (e nas mensagens de erro).
+#
+# Percorrer o buffer dá objetos TokenColunar, com a mesma interface de
+# Token, então analisar e analisar_denso o recebem como qualquer outra
+# sequência de tokens.
+
+TIPOS_POR_CODIGO = [None] * (max(t.value for t in TokenType) + 1)
+for _tipo in TokenType:
+    TIPOS_POR_CODIGO[_tipo.value] = _tipo
+
+def _tipo_do_array(maximo):
+    """Menor tipo de array sem sinal que guarda valores até maximo."""
+    for tipo in ("H", "I", "Q"):
+        if maximo < 256 ** array(tipo).itemsize:
+            return tipo
+    raise OverflowError(maximo)
+
+class TokenColunar:
+    __slots__ = ("buffer", "indice")
+
+    def __init__(self, buffer, indice):
+        self.buffer = buffer
+        self.indice = indice
+
+    @property
+    def tipo(self):
+        return TIPOS_POR_CODIGO[self.buffer.tipos[self.indice]]
+
+    @property
+    def lexema(self):
+        return self.buffer.lexema(self.indice)
+
+    @property
+    def linha(self):
+        return self.buffer.linhas[self.indice]
+
+
+class BufferDeTokens:
+    __slots__ = ("fonte", "tipos", "inicios", "fins", "linhas")
+
+    def __init__(self, fonte, motor="regex"):
+        """Lexa o fonte inteiro; termina, como a lista do --modo memoria, em END_OF_FILE."""
+        self.fonte = fonte
+        posicao = _tipo_do_array(len(fonte))
+        self.tipos = array("B")
+        self.inicios = array(posicao)
+        self.fins = array(posicao)
+        self.linhas = array(_tipo_do_array(fonte.count("\n") + 1))
+        if motor not in LEXERS:
+            raise ValueError(f"Lexer desconhecido: {motor}")
+        if motor == "regex" and fonte.isascii():
+            linha = self._lexar_regex()
+        else:
+            linha = self._lexar_referencia()
+        self.adicionar(TokenType.END_OF_FILE.value, len(fonte), len(fonte), linha)
+
+    def adicionar(self, codigo, inicio, fim, linha):
+        self.tipos.append(codigo)
+        self.inicios.append(inicio)
+        self.fins.append(fim)
+        self.linhas.append(linha)
+
+    def _lexar_regex(self):
+        """Mesma classificação de LexerRegex.tokens, sem criar um Token por lexema."""
+        fonte = self.fonte
+        fim = len(fonte)
+        adicionar = self.adicionar
+        keywords = {lexema: tipo.value for lexema, tipo in PALAVRAS_RESERVADAS.items()}
+        pontuacao = {lexema: tipo.value for lexema, tipo in PONTUACAO.items()}
+        relacionais = {lexema: tipo.value for lexema, tipo in RELACIONAIS.items()}
+        ident = TokenType.KEYWORD_ID.value
+        numero = TokenType.KEYWORD_NUMBER.value
+        imprimir = TokenType.KEYWORD_PRINT.value
+        desconhecido = TokenType.UNKNOWN.value
+        linha = 1
+        for m in PADRAO_TOKEN.finditer(fonte):
+            tipo = m.lastgroup
+            inicio, termino = m.span()
+            if tipo == "espaco":
+                linha += fonte.count("\n", inicio, termino)
+                continue
+            if tipo == "id":
+                codigo = keywords.get(fonte[inicio:termino], ident)
+            elif tipo == "numero":
+                codigo = numero
+            elif tipo == "print":
+                codigo = imprimir
+            elif tipo == "relacional":
+                lexema = fonte[inicio:termino]
+                if lexema == "!" or (len(lexema) == 1 and termino == fim):
+                    codigo = desconhecido
+                else:
+                    codigo = relacionais[lexema]
+            else:
+                codigo = pontuacao.get(fonte[inicio], desconhecido)
+            adicionar(codigo, inicio, termino, linha)
+        return linha
+
+    def _lexar_referencia(self):
+        """Pelo AFD de Lexer, que anda por self.index, de onde saem as posições."""
+        lexer = Lexer(self.fonte)
+        while True:
+            lexer.ignoraEspaco()
+            inicio = lexer.index
+            token = lexer.proximoToken()
+            if token.tipo == TokenType.END_OF_FILE:
+                return lexer.linha
+            self.adicionar(token.tipo.value, inicio, lexer.index, token.linha)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __iter__(self):
+        for i in range(len(self.tipos)):
+            yield TokenColunar(self, i)
+
+    def lexema(self, i):
+        return self.fonte[self.inicios[i]:self.fins[i]]
+
+    def bytes_ocupados(self):
+        """Bytes dos quatro arrays, sem contar o fonte, que já existia."""
+        return sum(len(coluna) * coluna.itemsize
+                   for coluna in (self.tipos, self.inicios, self.fins, self.linhas))
+
 # Tabela LL(1) Preditiva
 
 tabela: Dict[Tuple[str, str], List[str]] = {}
 
-def construir_tabela():
+def construir_tabela(cache=ARQUIVO_CACHE):
+    """Preenche tabela a partir de GRAMATICA (ver gramatica.py), usando o cache em disco."""
     tabela.clear()
-
-    # PROG -> public class id { public static void main ( String [ ] id ) { GERAR_CODIGO_INPP CMDS GERAR_CODIGO_PARA } }
-    tabela[("PROG", "KEYWORD_PUBLIC")] = [
-        "KEYWORD_PUBLIC","KEYWORD_CLASS","KEYWORD_ID","KEYWORD_LBRACE",
-        "KEYWORD_PUBLIC","KEYWORD_STATIC","KEYWORD_VOID","KEYWORD_MAIN",
-        "KEYWORD_LPAR","KEYWORD_STRING","KEYWORD_LCOL","KEYWORD_RCOL","KEYWORD_ID","KEYWORD_RPAR",
-        "KEYWORD_LBRACE","GERAR_CODIGO_INPP","CMDS","GERAR_CODIGO_PARA","KEYWORD_RBRACE","KEYWORD_RBRACE"
-    ]
-
-    # DC -> VAR MAIS_CMDS
-    tabela[("DC", "KEYWORD_TDOUBLE")] = ["VAR","MAIS_CMDS"]
-
-    # VAR -> TIPO VARS
-    tabela[("VAR", "KEYWORD_TDOUBLE")] = ["TIPO","VARS"]
-
-    # VARS -> id GERAR_CODIGO_DECL_VAR MAIS_VAR
-    tabela[("VARS", "KEYWORD_ID")] = ["KEYWORD_ID","GERAR_CODIGO_DECL_VAR","MAIS_VAR"]
-
-    # MAIS_VAR -> , VARS | λ
-    tabela[("MAIS_VAR", "KEYWORD_COMMA")] = ["KEYWORD_COMMA","VARS"]
-    tabela[("MAIS_VAR", "KEYWORD_SEMICOLON")] = []  # FOLLOW(MAIS_VAR)
-
-    # TIPO -> double
-    tabela[("TIPO", "KEYWORD_TDOUBLE")] = ["KEYWORD_TDOUBLE"]
-
-    # CMDS -> CMD MAIS_CMDS | CMD_COND CMDS | DC | λ
-    tabela[("CMDS", "KEYWORD_PRINT")] = ["CMD","MAIS_CMDS"]
-    tabela[("CMDS", "KEYWORD_ID")] = ["CMD","MAIS_CMDS"]
-    tabela[("CMDS", "KEYWORD_IF")] = ["CMD_COND","CMDS"]
-    tabela[("CMDS", "KEYWORD_WHILE")] = ["CMD_COND","CMDS"]
-    tabela[("CMDS", "KEYWORD_TDOUBLE")] = ["DC"]
-    tabela[("CMDS", "KEYWORD_RBRACE")] = []  # FOLLOW(CMDS)
-
-    # MAIS_CMDS -> ; CMDS
-    tabela[("MAIS_CMDS", "KEYWORD_SEMICOLON")] = ["KEYWORD_SEMICOLON","CMDS"]
-
-    # CMD_COND -> if ( CONDICAO ) GERAR_CODIGO_DSVF { CMDS } GERAR_CODIGO_DSVI GERAR_CODIGO_BACKPATCH_DSVF PFALSA
-    tabela[("CMD_COND", "KEYWORD_IF")] = [
-        "KEYWORD_IF","KEYWORD_LPAR","CONDICAO","KEYWORD_RPAR",
-        "GERAR_CODIGO_DSVF",
-        "KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE",
-        "GERAR_CODIGO_DSVI","GERAR_CODIGO_BACKPATCH_DSVF","PFALSA"
-    ]
-    # CMD_COND -> while ( CONDICAO ) GERAR_CODIGO_DSVF_WHILE { CMDS } GERAR_CODIGO_DSVI_WHILE GERAR_CODIGO_BACKPATCH_DSVF
-    tabela[("CMD_COND", "KEYWORD_WHILE")] = [
-        "KEYWORD_WHILE",
-        "GERAR_CODIGO_MARQUE_WHILE_START",
-        "KEYWORD_LPAR","CONDICAO","KEYWORD_RPAR",
-        "GERAR_CODIGO_DSVF_WHILE",
-        "KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE",
-        "GERAR_CODIGO_DSVI_WHILE","GERAR_CODIGO_BACKPATCH_DSVF"
-    ]
-
-    # CMD -> System.out.println ( EXPRESSAO ) GERAR_CODIGO_IMPR | id RESTO_IDENT
-    tabela[("CMD", "KEYWORD_PRINT")] = ["KEYWORD_PRINT","KEYWORD_LPAR","EXPRESSAO","KEYWORD_RPAR","GERAR_CODIGO_IMPR"]
-    tabela[("CMD", "KEYWORD_ID")] = ["KEYWORD_ID","RESTO_IDENT"]  # RESTO_IDENT
-
-    # PFALSA -> else { CMDS } | λ
-    tabela[("PFALSA", "KEYWORD_ELSE")] = ["KEYWORD_ELSE","KEYWORD_LBRACE","CMDS","KEYWORD_RBRACE","GERAR_CODIGO_BACKPATCH_DSVI"]
-    # FOLLOW(PFALSA)
-    for tk in ["KEYWORD_PRINT","KEYWORD_ID","KEYWORD_IF","KEYWORD_WHILE","KEYWORD_TDOUBLE","KEYWORD_RBRACE"]:
-        tabela.setdefault(("PFALSA", tk), [])
-
-    # RESTO_IDENT -> = EXP_IDENT GERAR_CODIGO_ARMZ
-    tabela[("RESTO_IDENT", "KEYWORD_ATBR")] = ["KEYWORD_ATBR","EXP_IDENT","GERAR_CODIGO_ARMZ"]
-
-    # EXP_IDENT -> lerDouble() GERAR_CODIGO_LEIT | EXPRESSAO
-    tabela[("EXP_IDENT", "KEYWORD_READ")] = ["KEYWORD_READ","KEYWORD_LPAR","KEYWORD_RPAR","GERAR_CODIGO_LEIT"]
-    tabela[("EXP_IDENT", "KEYWORD_SUB")] = ["EXPRESSAO"]
-    tabela[("EXP_IDENT", "KEYWORD_ID")] = ["EXPRESSAO"]
-    tabela[("EXP_IDENT", "KEYWORD_NUMBER")] = ["EXPRESSAO"]
-    tabela[("EXP_IDENT", "KEYWORD_LPAR")] = ["EXPRESSAO"]
-
-    # CONDICAO -> EXPRESSAO RELACAO EXPRESSAO GERAR_CODIGO_REL
-    tabela[("CONDICAO", "KEYWORD_SUB")] = ["EXPRESSAO","RELACAO","EXPRESSAO","GERAR_CODIGO_REL"]
-    tabela[("CONDICAO", "KEYWORD_ID")] = ["EXPRESSAO","RELACAO","EXPRESSAO","GERAR_CODIGO_REL"]
-    tabela[("CONDICAO", "KEYWORD_NUMBER")] = ["EXPRESSAO","RELACAO","EXPRESSAO","GERAR_CODIGO_REL"]
-    tabela[("CONDICAO", "KEYWORD_LPAR")] = ["EXPRESSAO","RELACAO","EXPRESSAO","GERAR_CODIGO_REL"]
-
-    # RELACAO -> == | != | >= | <= | > | <
-    tabela[("RELACAO", "KEYWORD_EQUAL")] = ["KEYWORD_EQUAL"]
-    tabela[("RELACAO", "KEYWORD_DIF")] = ["KEYWORD_DIF"]
-    tabela[("RELACAO", "KEYWORD_GE")] = ["KEYWORD_GE"]
-    tabela[("RELACAO", "KEYWORD_LE")] = ["KEYWORD_LE"]
-    tabela[("RELACAO", "KEYWORD_G")] = ["KEYWORD_G"]
-    tabela[("RELACAO", "KEYWORD_L")] = ["KEYWORD_L"]
-
-    # EXPRESSAO -> TERMO OUTROS_TERMOS
-    tabela[("EXPRESSAO", "KEYWORD_SUB")] = ["TERMO","OUTROS_TERMOS"]
-    tabela[("EXPRESSAO", "KEYWORD_ID")] = ["TERMO","OUTROS_TERMOS"]
-    tabela[("EXPRESSAO", "KEYWORD_NUMBER")] = ["TERMO","OUTROS_TERMOS"]
-    tabela[("EXPRESSAO", "KEYWORD_LPAR")] = ["TERMO","OUTROS_TERMOS"]
-
-    # TERMO -> OP_UN FATOR MAIS_FATORES
-    tabela[("TERMO", "KEYWORD_SUB")] = ["OP_UN","FATOR","MAIS_FATORES"]
-    tabela[("TERMO", "KEYWORD_ID")] = ["OP_UN","FATOR","MAIS_FATORES"]
-    tabela[("TERMO", "KEYWORD_NUMBER")] = ["OP_UN","FATOR","MAIS_FATORES"]
-    tabela[("TERMO", "KEYWORD_LPAR")] = ["OP_UN","FATOR","MAIS_FATORES"]
-
-    # OP_UN -> - | λ
-    tabela[("OP_UN", "KEYWORD_SUB")] = ["KEYWORD_SUB"]
-    for tk in ["KEYWORD_ID","KEYWORD_NUMBER","KEYWORD_LPAR"]:
-        tabela[("OP_UN", tk)] = []
-
-    # FATOR -> id GERAR_CODIGO_CRVL | numero_real GERAR_CODIGO_CRCT | ( EXPRESSAO )
-    tabela[("FATOR", "KEYWORD_ID")] = ["KEYWORD_ID","GERAR_CODIGO_CRVL"]
-    tabela[("FATOR", "KEYWORD_NUMBER")] = ["KEYWORD_NUMBER","GERAR_CODIGO_CRCT"]
-    tabela[("FATOR", "KEYWORD_LPAR")] = ["KEYWORD_LPAR","EXPRESSAO","KEYWORD_RPAR"]
-
-    # OUTROS_TERMOS -> OP_AD TERMO GERAR_CODIGO_OP_AD OUTROS_TERMOS | λ
-    tabela[("OUTROS_TERMOS", "KEYWORD_SUB")] = ["OP_AD","TERMO","GERAR_CODIGO_OP_AD","OUTROS_TERMOS"]
-    tabela[("OUTROS_TERMOS", "KEYWORD_PLUS")] = ["OP_AD","TERMO","GERAR_CODIGO_OP_AD","OUTROS_TERMOS"]
-    # FOLLOW(OUTROS_TERMOS)
-    for tk in ["KEYWORD_EQUAL","KEYWORD_DIF","KEYWORD_GE","KEYWORD_LE","KEYWORD_G","KEYWORD_L","KEYWORD_RPAR","KEYWORD_SEMICOLON"]:
-        tabela[("OUTROS_TERMOS", tk)] = []
-
-    # OP_AD -> + | -
-    tabela[("OP_AD", "KEYWORD_SUB")] = ["KEYWORD_SUB"]
-    tabela[("OP_AD", "KEYWORD_PLUS")] = ["KEYWORD_PLUS"]
-
-    # MAIS_FATORES -> OP_MUL FATOR GERAR_CODIGO_OP_MUL MAIS_FATORES | λ
-    tabela[("MAIS_FATORES", "KEYWORD_MULT")] = ["OP_MUL","FATOR","GERAR_CODIGO_OP_MUL","MAIS_FATORES"]
-    tabela[("MAIS_FATORES", "KEYWORD_DIV")] = ["OP_MUL","FATOR","GERAR_CODIGO_OP_MUL","MAIS_FATORES"]
-    # FOLLOW(MAIS_FATORES)
-    for tk in ["KEYWORD_SUB","KEYWORD_PLUS","KEYWORD_EQUAL","KEYWORD_DIF","KEYWORD_GE","KEYWORD_LE","KEYWORD_G","KEYWORD_L","KEYWORD_RPAR","KEYWORD_SEMICOLON"]:
-        tabela[("MAIS_FATORES", tk)] = []
-
-    # OP_MUL -> * | /
-    tabela[("OP_MUL", "KEYWORD_MULT")] = ["KEYWORD_MULT"]
-    tabela[("OP_MUL", "KEYWORD_DIV")] = ["KEYWORD_DIV"]
+    tabela.update(carregar_tabela(cache))
 
 
 # Analisador Sintatico + O resto
@@ -404,51 +609,52 @@ gerador = GeradorDeCodigo()
 def token_tipo_to_string(tipo):
     return tipo.name
 
-def analisar(tokens: List[Token]) -> bool:
-    tokens = deque(tokens)
-    tokens.append(Token(TokenType.END_OF_FILE, "", tokens[-1].linha if tokens else 1))
+def analisar(tokens: Iterable[Token], depurar=False, gerador: GeradorDeCodigo = None,
+             estatisticas=None, relatar=print) -> bool:
+    # Sem gerador explícito, o código vai para o gerador global do módulo;
+    # as mensagens de erro e de sucesso vão para relatar
+    if gerador is None:
+        gerador = globals()["gerador"]
+    # Os tokens são consumidos sob demanda; LL(1) só precisa de um de lookahead
+    tokens = iter(tokens)
+    tokenAtual = next(tokens, None) or Token(TokenType.END_OF_FILE, "", 1)
 
     pilha = deque()
     pilha.append("$")
     pilha.append("PROG")
 
-    semPilha = []            
-    dsvfPilha = []          
-    dsviPilha = []           
-    whileComecoPilha = []    
+    sem = AcoesSemanticas(gerador, depurar)
+    if estatisticas is not None:
+        estatisticas.medir_analise(sem)
 
     processandoDeclaracao = False
 
     while pilha:
         topo = pilha[-1]
-        tokenAtual = tokens[0]
         atual = token_tipo_to_string(tokenAtual.tipo)
 
         # Se topo for um GERAR_CODIGO_
         if isinstance(topo, str) and topo.startswith("GERAR_CODIGO_"):
             pilha.pop()
             try:
-                executar_acao(topo, semPilha, dsvfPilha, dsviPilha, whileComecoPilha, tokens, gerador)
+                sem.acoes[topo]()
             except Exception as e:
-                print(f"Erro de ação '{topo}': {e}")
+                relatar(f"Erro de ação '{topo}': {e}")
                 return False
             continue
 
         # Se topo for símbolo terminal
         if isinstance(topo, str) and (topo.startswith("KEYWORD_") or topo == "END_OF_FILE"):
             if topo == atual:
-                if tokenAtual.tipo == TokenType.KEYWORD_ID:
-                    semPilha.append(("ID", tokenAtual.lexema, tokenAtual.linha))
-                elif tokenAtual.tipo == TokenType.KEYWORD_NUMBER:
-                    semPilha.append(("NUMBER", tokenAtual.lexema, tokenAtual.linha))
-                elif tokenAtual.tipo in (TokenType.KEYWORD_PLUS, TokenType.KEYWORD_SUB,
-                                          TokenType.KEYWORD_MULT, TokenType.KEYWORD_DIV,
-                                          TokenType.KEYWORD_EQUAL, TokenType.KEYWORD_DIF,
-                                          TokenType.KEYWORD_GE, TokenType.KEYWORD_LE,
-                                          TokenType.KEYWORD_G, TokenType.KEYWORD_L):
-                    semPilha.append(("OP", tokenAtual.lexema, tokenAtual.linha))
+                empilhar = sem.empilhar.get(tokenAtual.tipo)
+                if empilhar is not None:
+                    try:
+                        empilhar((tokenAtual.lexema, tokenAtual.linha))
+                    except Exception as e:
+                        relatar(f"Erro de ação '{topo}': {e}")
+                        return False
                 pilha.pop()
-                tokens.popleft()
+                tokenAtual = next(tokens, None) or Token(TokenType.END_OF_FILE, "", tokenAtual.linha)
 
                 if topo in ["VAR", "TIPO"]:
                     processandoDeclaracao = True
@@ -456,12 +662,11 @@ def analisar(tokens: List[Token]) -> bool:
                     processandoDeclaracao = False
                 continue
             else:
-                print(f"Erro de sintaxe: token inesperado '{atual}' ('{tokenAtual.lexema}'), esperado '{topo}' na linha {tokenAtual.linha}")
+                relatar(f"Erro de sintaxe: token inesperado '{atual}' ('{tokenAtual.lexema}'), esperado '{topo}' na linha {tokenAtual.linha}")
                 return False
             
         if topo == "$" and atual == "END_OF_FILE":
-            gerador.salvar("codigoCompilado.txt")
-            print("Análise concluída com sucesso!")
+            relatar("Análise concluída com sucesso!")
             break
 
         # Se topo é um não-terminal
@@ -473,174 +678,469 @@ def analisar(tokens: List[Token]) -> bool:
                 for simbolo in reversed(producao):
                     if simbolo != "":
                         pilha.append(simbolo)
+                if estatisticas is not None:
+                    estatisticas.expandiu(len(pilha))
                 continue
             else:
-                print(f"Erro de sintaxe: nenhuma regra para topo '{topo}' com token '{atual}' na linha {tokenAtual.linha}")
+                relatar(f"Erro de sintaxe: nenhuma regra para topo '{topo}' com token '{atual}' na linha {tokenAtual.linha}")
                 return False
 
-        print(f"Erro interno: tipo desconhecido no topo da pilha '{topo}'")
+        relatar(f"Erro interno: tipo desconhecido no topo da pilha '{topo}'")
         return False
 
     return True
 
 
-# Implementação de GERAR_CODIGO_
+# Analisador com tabela densa
+#
+# Todos os símbolos de tabela viram inteiros pequenos, em faixas:
+#   [0, T)        terminais (o próprio TokenType.value)
+#   [T, T + N)    não-terminais, incluindo "$" (linha sem regras)
+#   [T + N, ...)  ações GERAR_CODIGO_
+# Assim classificar o topo da pilha é só comparar com T e T + N, e a
+# escolha da produção é um índice em uma lista plana de N * T posições.
+
+OPERADORES = {
+    TokenType.KEYWORD_PLUS, TokenType.KEYWORD_SUB,
+    TokenType.KEYWORD_MULT, TokenType.KEYWORD_DIV,
+    TokenType.KEYWORD_EQUAL, TokenType.KEYWORD_DIF,
+    TokenType.KEYWORD_GE, TokenType.KEYWORD_LE,
+    TokenType.KEYWORD_G, TokenType.KEYWORD_L,
+}
+
+class TabelaDensa:
+    def __init__(self, tabela):
+        self.T = max(t.value for t in TokenType) + 1
+
+        nao_terminais = ["$"]
+        acoes = []
+        for (nt, _), producao in tabela.items():
+            if nt not in nao_terminais:
+                nao_terminais.append(nt)
+            for simbolo in producao:
+                if simbolo.startswith("GERAR_CODIGO_") and simbolo not in acoes:
+                    acoes.append(simbolo)
+        for (_, producao) in tabela.items():
+            for simbolo in producao:
+                if (simbolo and not simbolo.startswith(("GERAR_CODIGO_", "KEYWORD_"))
+                        and simbolo != "END_OF_FILE" and simbolo not in nao_terminais):
+                    nao_terminais.append(simbolo)
+
+        self.N = len(nao_terminais)
+        self.nomes = [""] * self.T + nao_terminais + acoes
+        for t in TokenType:
+            self.nomes[t.value] = t.name
+        self.codigo = {nome: i for i, nome in enumerate(self.nomes) if nome}
+
+        self.acoes = acoes
+        self.DOLAR = self.codigo["$"]
+        self.EOF = TokenType.END_OF_FILE.value
+        # Código inteiro de cada TokenType, para o analisador não ler .value a cada token
+        self.terminais = {t: t.value for t in TokenType}
+
+        self.producoes = []
+        self.densa = [-1] * (self.N * self.T)
+        indices = {}
+        for (nt, terminal), producao in tabela.items():
+            simbolos = tuple(self.codigo[s] for s in reversed(producao) if s != "")
+            if simbolos not in indices:
+                indices[simbolos] = len(self.producoes)
+                self.producoes.append(simbolos)
+            linha = self.codigo[nt] - self.T
+            self.densa[linha * self.T + self.codigo[terminal]] = indices[simbolos]
+
+
+
+def analisar_denso(tokens: Iterable[Token], densa: TabelaDensa = None, depurar=False,
+                   gerador: GeradorDeCodigo = None, estatisticas=None, relatar=print) -> bool:
+    if gerador is None:
+        gerador = globals()["gerador"]
+    if densa is None:
+        densa = TabelaDensa(tabela)
+    T = densa.T
+    limite_nt = T + densa.N
+    tabela_plana = densa.densa
+    producoes = densa.producoes
+    nomes = densa.nomes
+    DOLAR = densa.DOLAR
+    EOF = densa.EOF
+    terminais = densa.terminais
+
+    tokens = iter(tokens)
+    tokenAtual = next(tokens, None) or Token(TokenType.END_OF_FILE, "", 1)
+    atual = terminais[tokenAtual.tipo]
+
+    pilha = [DOLAR, densa.codigo["PROG"]]
+
+    # Ações e empilhamentos semânticos ligados uma vez, indexados por inteiro
+    sem = AcoesSemanticas(gerador, depurar)
+    if estatisticas is not None:
+        estatisticas.medir_analise(sem)
+    acoes = [sem.acoes[nome] for nome in densa.acoes]
+    empilhar = [None] * T
+    for tipo, funcao in sem.empilhar.items():
+        empilhar[tipo.value] = funcao
 
-def executar_acao(acao, semPilha, dsvfPilha, dsviPilha, whileComecoPilha, tokens, gerador):
-
-    def popId():
-        for i in range(len(semPilha)-1, -1, -1):
-            tag, lex, ln = semPilha[i]
-            if tag == "ID":
-                semPilha.pop(i)
-                return lex, ln
-        raise Exception("ID esperado na pilha semântica para ação")
-
-    def popNumber():
-        for i in range(len(semPilha)-1, -1, -1):
-            tag, lex, ln = semPilha[i]
-            if tag == "NUMBER":
-                semPilha.pop(i)
-                return lex, ln
-        raise Exception("NUMBER esperado na pilha semântica para ação")
-
-    def popOp():
-        for i in range(len(semPilha)-1, -1, -1):
-            tag, lex, ln = semPilha[i]
-            if tag == "OP":
-                semPilha.pop(i)
-                return lex
-        raise Exception("OP esperado na pilha semântica para ação")
-
-    if acao == "GERAR_CODIGO_INPP":
-        gerador.adicionar("INPP")
-
-    elif acao == "GERAR_CODIGO_PARA":
-        gerador.adicionar("PARA")
-
-    elif acao == "GERAR_CODIGO_DECL_VAR":
-        idlex, ln = popId()
-        gerador.declararVariavel(idlex)
-
-    elif acao == "GERAR_CODIGO_CRVL":
-        idlex, ln = popId()
-        entrada = gerador.buscarEntrada(idlex)
-        if not entrada:
-            raise Exception(f"Erro semântico (gerador): variável '{idlex}' não declarada (linha {ln})")
-        gerador.adicionar(f"CRVL {entrada.endRel}")
+    while pilha:
+        topo = pilha[-1]
+
+        if topo < T:
+            if topo != atual:
+                relatar(f"Erro de sintaxe: token inesperado '{nomes[atual]}' ('{tokenAtual.lexema}'), esperado '{nomes[topo]}' na linha {tokenAtual.linha}")
+                return False
+            funcao = empilhar[atual]
+            if funcao is not None:
+                try:
+                    funcao((tokenAtual.lexema, tokenAtual.linha))
+                except Exception as e:
+                    relatar(f"Erro de ação '{nomes[topo]}': {e}")
+                    return False
+            pilha.pop()
+            tokenAtual = next(tokens, None) or Token(TokenType.END_OF_FILE, "", tokenAtual.linha)
+            atual = terminais[tokenAtual.tipo]
+
+        elif topo < limite_nt:
+            if topo == DOLAR and atual == EOF:
+                relatar("Análise concluída com sucesso!")
+                break
+            indice = tabela_plana[(topo - T) * T + atual]
+            if indice < 0:
+                relatar(f"Erro de sintaxe: nenhuma regra para topo '{nomes[topo]}' com token '{nomes[atual]}' na linha {tokenAtual.linha}")
+                return False
+            pilha.pop()
+            pilha.extend(producoes[indice])
+            if estatisticas is not None:
+                estatisticas.expandiu(len(pilha))
+
+        else:
+            pilha.pop()
+            try:
+                acoes[topo - limite_nt]()
+            except Exception as e:
+                relatar(f"Erro de ação '{nomes[topo]}': {e}")
+                return False
+
+    return True
+
+
+PARSERS = {
+    "referencia": analisar,
+    "densa": analisar_denso,
+}
 
-    elif acao == "GERAR_CODIGO_CRCT":
-        numlex, ln = popNumber()
-        gerador.adicionar(f"CRCT {numlex}")
 
-    elif acao == "GERAR_CODIGO_IMPR":
-        gerador.adicionar("IMPR")
+# Implementação de GERAR_CODIGO_
 
-    elif acao == "GERAR_CODIGO_LEIT":
-        gerador.adicionar("LEIT")
+class AcoesSemanticas:
+    """Pilhas semânticas tipadas e as ações GERAR_CODIGO_.
+
+    Cada tipo de atributo (ID, NUMBER, OP) tem a sua pilha, então empilhar
+    e desempilhar custam O(1). As ações ficam ligadas uma única vez em
+    self.acoes e o analisador só as chama. Com depurar=True, o fim de cada
+    comando (';' ou '}') confere se as pilhas de valores estão vazias e
+    GERAR_CODIGO_PARA confere as pilhas de desvios.
+    """
+
+    def __init__(self, gerador, depurar=False):
+        self.gerador = gerador
+        self.ids = []
+        self.numeros = []
+        self.ops = []
+        self.dsvfPilha = []
+        self.dsviPilha = []
+        self.whileComecoPilha = []
+        self.depurar = depurar
+
+        self.empilhar = {
+            TokenType.KEYWORD_ID: self.ids.append,
+            TokenType.KEYWORD_NUMBER: self.numeros.append,
+        }
+        for tipo in OPERADORES:
+            self.empilhar[tipo] = self.ops.append
+        if depurar:
+            self.empilhar[TokenType.KEYWORD_SEMICOLON] = self.verificarFimDeComando
+            self.empilhar[TokenType.KEYWORD_RBRACE] = self.verificarFimDeComando
+
+        self.acoes = {
+            "GERAR_CODIGO_INPP": self.inpp,
+            "GERAR_CODIGO_PARA": self.para,
+            "GERAR_CODIGO_DECL_VAR": self.declVar,
+            "GERAR_CODIGO_CRVL": self.crvl,
+            "GERAR_CODIGO_CRCT": self.crct,
+            "GERAR_CODIGO_INVE": self.inve,
+            "GERAR_CODIGO_IMPR": self.impr,
+            "GERAR_CODIGO_LEIT": self.leit,
+            "GERAR_CODIGO_ARMZ": self.armz,
+            "GERAR_CODIGO_OP_AD": self.opAd,
+            "GERAR_CODIGO_OP_MUL": self.opMul,
+            "GERAR_CODIGO_REL": self.rel,
+            "GERAR_CODIGO_DSVF": self.dsvf,
+            "GERAR_CODIGO_DSVI": self.dsvi,
+            "GERAR_CODIGO_BACKPATCH_DSVF": self.backpatchDsvf,
+            "GERAR_CODIGO_BACKPATCH_DSVI": self.backpatchDsvi,
+            "GERAR_CODIGO_MARQUE_WHILE_START": self.marqueWhileStart,
+            "GERAR_CODIGO_DSVF_WHILE": self.dsvf,
+            "GERAR_CODIGO_DSVI_WHILE": self.dsviWhile,
+        }
 
-    elif acao == "GERAR_CODIGO_ARMZ":
-        idlex, ln = popId()
-        entrada = gerador.buscarEntrada(idlex)
+    def popId(self):
+        if not self.ids:
+            raise Exception("ID esperado na pilha semântica para ação")
+        return self.ids.pop()
+
+    def popNumber(self):
+        if not self.numeros:
+            raise Exception("NUMBER esperado na pilha semântica para ação")
+        return self.numeros.pop()
+
+    def popOp(self):
+        if not self.ops:
+            raise Exception("OP esperado na pilha semântica para ação")
+        return self.ops.pop()[0]
+
+    def verificarFimDeComando(self, token):
+        lexema, ln = token
+        if self.ids or self.numeros or self.ops:
+            raise Exception(
+                f"Pilha semântica desbalanceada ao fim do comando (linha {ln}): "
+                f"{len(self.ids)} ID, {len(self.numeros)} NUMBER, {len(self.ops)} OP")
+
+    def entradaDeclarada(self, idlex, ln):
+        entrada = self.gerador.buscarEntrada(idlex)
         if not entrada:
             raise Exception(f"Erro semântico (gerador): variável '{idlex}' não declarada (linha {ln})")
-        gerador.adicionar(f"ARMZ {entrada.endRel}")
-
-    elif acao == "GERAR_CODIGO_OP_AD":
-        op = popOp()
+        return entrada
+
+    def inpp(self):
+        # Os IDs do cabeçalho (nome da classe e do parâmetro de main) não são usados
+        self.ids.clear()
+        self.gerador.adicionar("INPP")
+
+    def para(self):
+        self.gerador.adicionar("PARA")
+        if self.depurar and (self.dsvfPilha or self.dsviPilha or self.whileComecoPilha):
+            raise Exception(
+                f"Pilhas de desvio desbalanceadas ao fim do programa: {len(self.dsvfPilha)} DSVF, "
+                f"{len(self.dsviPilha)} DSVI, {len(self.whileComecoPilha)} while")
+
+    def declVar(self):
+        idlex, ln = self.popId()
+        self.gerador.declararVariavel(idlex)
+
+    def crvl(self):
+        idlex, ln = self.popId()
+        entrada = self.entradaDeclarada(idlex, ln)
+        self.gerador.adicionar("CRVL", entrada.endRel)
+
+    def crct(self):
+        numlex, ln = self.popNumber()
+        self.gerador.adicionar("CRCT", numlex)
+
+    def inve(self):
+        self.popOp()
+        self.gerador.adicionar("INVE")
+
+    def impr(self):
+        self.gerador.adicionar("IMPR")
+
+    def leit(self):
+        self.gerador.adicionar("LEIT")
+
+    def armz(self):
+        idlex, ln = self.popId()
+        entrada = self.entradaDeclarada(idlex, ln)
+        self.gerador.adicionar("ARMZ", entrada.endRel)
+
+    def opAd(self):
+        op = self.popOp()
         if op == '+':
-            gerador.adicionar("SOMA")
+            self.gerador.adicionar("SOMA")
         elif op == '-':
-            gerador.adicionar("SUBT")
+            self.gerador.adicionar("SUBT")
         else:
             raise Exception(f"Operador ad inválido: {op}")
 
-    elif acao == "GERAR_CODIGO_OP_MUL":
-        op = popOp()
+    def opMul(self):
+        op = self.popOp()
         if op == '*':
-            gerador.adicionar("MULT")
+            self.gerador.adicionar("MULT")
         elif op == '/':
-            gerador.adicionar("DIVI")
+            self.gerador.adicionar("DIVI")
         else:
             raise Exception(f"Operador mul inválido: {op}")
 
-    elif acao == "GERAR_CODIGO_REL":
-        rel = popOp()
-        op_map = {
-            '<': 'CPME', '>': 'CPMA', '==': 'CPIG',
-            '!=': 'CDES', '<=': 'CPMI', '>=': 'CMAI'
-        }
-        if rel not in op_map:
+    OP_REL = {
+        '<': 'CPME', '>': 'CPMA', '==': 'CPIG',
+        '!=': 'CDES', '<=': 'CPMI', '>=': 'CMAI'
+    }
+
+    def rel(self):
+        rel = self.popOp()
+        if rel not in self.OP_REL:
             raise Exception(f"Operador relacional desconhecido: {rel}")
-        gerador.adicionar(op_map[rel])
+        self.gerador.adicionar(self.OP_REL[rel])
 
-    elif acao == "GERAR_CODIGO_DSVF":
-        addr = gerador.adicionar("DSVF END_A_DECLARAR")
-        dsvfPilha.append(addr)
+    def dsvf(self):
+        addr = self.gerador.adicionar("DSVF", A_DECLARAR)
+        self.dsvfPilha.append(addr)
 
-    elif acao == "GERAR_CODIGO_DSVI":
-        addr = gerador.adicionar("DSVI END_A_DECLARAR")
-        dsviPilha.append(addr)
+    def dsvi(self):
+        addr = self.gerador.adicionar("DSVI", A_DECLARAR)
+        self.dsviPilha.append(addr)
 
-    elif acao == "GERAR_CODIGO_BACKPATCH_DSVF":
-        if not dsvfPilha:
+    def backpatchDsvf(self):
+        if not self.dsvfPilha:
             raise Exception("Backpatch DSVF sem endereço pendente.")
-        addr = dsvfPilha.pop()
-        destino = len(gerador.codigo_c)
-        gerador.backpatch(addr, destino)
+        addr = self.dsvfPilha.pop()
+        destino = len(self.gerador)
+        self.gerador.backpatch(addr, destino)
 
-    elif acao == "GERAR_CODIGO_BACKPATCH_DSVI":
-        if not dsviPilha:
+    def backpatchDsvi(self):
+        if not self.dsviPilha:
             return
-        addr = dsviPilha.pop()
-        destino = len(gerador.codigo_c)
-        gerador.backpatch(addr, destino)
-
-    elif acao == "GERAR_CODIGO_MARQUE_WHILE_START":
-        start = len(gerador.codigo_c)
-        whileComecoPilha.append(start)
+        addr = self.dsviPilha.pop()
+        destino = len(self.gerador)
+        self.gerador.backpatch(addr, destino)
 
-    elif acao == "GERAR_CODIGO_DSVF_WHILE":
-        addr = gerador.adicionar("DSVF END_A_DECLARAR")
-        dsvfPilha.append(addr)
+    def marqueWhileStart(self):
+        start = len(self.gerador)
+        self.whileComecoPilha.append(start)
 
-    elif acao == "GERAR_CODIGO_DSVI_WHILE":
-        if not whileComecoPilha:
+    def dsviWhile(self):
+        if not self.whileComecoPilha:
             raise Exception("GERAR_CODIGO_DSVI_WHILE sem marca de início do while.")
-        start_addr = whileComecoPilha.pop()
-        gerador.adicionar(f"DSVI {start_addr}")
-
-    else:
-        raise Exception(f"Ação desconhecida: {acao}")
+        start_addr = self.whileComecoPilha.pop()
+        self.gerador.adicionar("DSVI", start_addr)
 
 # Execução Principal (script)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila um programa para a MaqHipo.")
+    parser.add_argument("fonte", nargs="?", default="codigoPraCompilar.txt")
+    parser.add_argument("-o", "--saida", default=None,
+                        help="arquivo objeto (padrão: codigoCompilado.txt ou codigoCompilado.bin)")
+    parser.add_argument("--binario", action="store_true",
+                        help="gera o código objeto no formato binário")
+    parser.add_argument("--lexer", choices=sorted(LEXERS), default="regex",
+                        help="'referencia' usa o AFD original, caractere a caractere")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="densa",
+                        help="'referencia' usa a tabela indexada por strings diretamente")
+    parser.add_argument("--modo", choices=["streaming", "memoria", "colunar"], default="streaming",
+                        help="'memoria' lê o fonte inteiro e gera a lista de tokens antes da análise; "
+                             "'colunar' guarda os tokens em um BufferDeTokens")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="reconstrói a tabela LL(1) sem ler nem gravar o cache")
+    parser.add_argument("--depurar-pilhas", action="store_true",
+                        help="confere o balanceamento das pilhas semânticas a cada comando")
+    parser.add_argument("-O", "--otimizar", action="store_true",
+                        help="aplica o otimizador peephole antes de salvar")
+    parser.add_argument("--passes", default=",".join(PASSES),
+                        help=f"passes do otimizador separados por vírgula (padrão: {','.join(PASSES)})")
+    parser.add_argument("--propagar-copias", action="store_true",
+                        help="troca leituras de cópias (b = a; b = k) pela origem, sobre o grafo de fluxo")
+    parser.add_argument("--mover-invariantes", action="store_true",
+                        help="calcula as subexpressões invariantes de cada laço uma vez, antes dele")
+    parser.add_argument("--eliminar-armazenamentos", action="store_true",
+                        help="remove atribuições a variáveis que não são lidas depois")
+    parser.add_argument("--avaliar-parcialmente", action="store_true",
+                        help="executa em tempo de compilação o que não depende de lerDouble")
+    parser.add_argument("--orcamento-passos", type=int, default=PASSOS,
+                        help=f"instruções executadas pela avaliação parcial (padrão: {PASSOS})")
+    parser.add_argument("--orcamento-codigo", type=int, default=TAMANHO,
+                        help=f"instruções do código residual da avaliação parcial (padrão: {TAMANHO})")
+    parser.add_argument("--stats", action="store_true",
+                        help="mostra tempo de parede e de CPU, memória e contadores de cada fase")
+    parser.add_argument("--stats-json", default=None, metavar="ARQUIVO",
+                        help="grava as estatísticas em JSON")
+    parser.add_argument("--stats-memoria", action="store_true",
+                        help="com --stats, mede o pico de memória de cada fase com o tracemalloc (bem mais lento)")
+    opcoes = parser.parse_args()
     try:
-        with open("codigoPraCompilar.txt", "r", encoding="utf-8") as f:
-            code = f.read()
-    except FileNotFoundError:
-        print("Erro ao abrir o arquivo codigoPraCompilar.txt")
-        exit(1)
-
-    # Analise Lexica
-    lexer = Lexer(code)
-    tokensGerados = []
-    while True:
-        token = lexer.proximoToken()
-        tokensGerados.append(token)
-        if token.tipo == TokenType.END_OF_FILE:
-            break
+        passes = ler_passes(opcoes.passes)
+    except ValueError as e:
+        parser.error(str(e))
 
-    construir_tabela()
+    est = None
+    if opcoes.stats or opcoes.stats_json or opcoes.stats_memoria:
+        est = Estatisticas(memoria=opcoes.stats_memoria)
+    fase = est.fase if est else (lambda nome: nullcontext())
 
-    # print("--- Tokens ---")
-    # for t in tokensGerados:
-    #     print(t)
+    try:
+        f = open(opcoes.fonte, "r", encoding="utf-8")
+    except FileNotFoundError:
+        print(f"Erro ao abrir o arquivo {opcoes.fonte}")
+        exit(1)
 
-    print("--- Análise Sintática, Semântica e Geração de Código ---")
-    resultado = analisar(tokensGerados)
+    with f:
+        # Analise Lexica
+        if opcoes.modo == "streaming":
+            tokensGerados = tokens_de_linhas(f, opcoes.lexer)
+            if est:
+                est.streaming = True
+                tokensGerados = est.medir_tokens(tokensGerados)
+        elif opcoes.modo == "colunar":
+            with fase("lexico"):
+                tokensGerados = BufferDeTokens(f.read(), opcoes.lexer)
+            if est:
+                est.tokens = len(tokensGerados)
+        else:
+            with fase("lexico"):
+                code = f.read()
+                lexer = criar_lexer(code, opcoes.lexer)
+                tokensGerados = []
+                while True:
+                    token = lexer.proximoToken()
+                    tokensGerados.append(token)
+                    if token.tipo == TokenType.END_OF_FILE:
+                        break
+            if est:
+                est.tokens = len(tokensGerados)
+
+        with fase("tabela"):
+            construir_tabela(None if opcoes.sem_cache else ARQUIVO_CACHE)
+
+        # print("--- Tokens ---")
+        # for t in tokensGerados:
+        #     print(t)
+
+        print("--- Análise Sintática, Semântica e Geração de Código ---")
+        with fase("analise"):
+            resultado = PARSERS[opcoes.parser](tokensGerados, depurar=opcoes.depurar_pilhas,
+                                               estatisticas=est)
+    if est:
+        est.instrucoes_emitidas = len(gerador)
     if resultado:
+        fluxo = [nome for nome, ativo in (("copias", opcoes.propagar_copias),
+                                          ("invariantes", opcoes.mover_invariantes),
+                                          ("armazenamentos_mortos", opcoes.eliminar_armazenamentos))
+                 if ativo]
+        if opcoes.avaliar_parcialmente or fluxo or opcoes.otimizar:
+            # O de fluxo roda antes: as constantes que ele propaga alimentam o dobramento
+            with fase("otimizacao"):
+                if opcoes.avaliar_parcialmente:
+                    avaliador = avaliar_gerador(gerador, opcoes.orcamento_passos, opcoes.orcamento_codigo)
+                if fluxo:
+                    contagem = otimizar_fluxo_gerador(gerador, fluxo)
+                if opcoes.otimizar:
+                    removidas = otimizar_gerador(gerador, passes)
+            if opcoes.avaliar_parcialmente:
+                print(avaliador.resumo())
+            if fluxo:
+                print("Otimização de fluxo: " + ", ".join(f"{nome} {n}" for nome, n in contagem.items()) + ".")
+            if opcoes.otimizar:
+                print(f"Otimização: {removidas} instruções removidas.")
+        with fase("salvar"):
+            if opcoes.binario:
+                gerador.salvar_binario(opcoes.saida or "codigoCompilado.bin")
+            else:
+                gerador.salvar(opcoes.saida or "codigoCompilado.txt")
         print("\nCódigo compilado com sucesso.")
     else:
         print("\nOcorreu um erro.")
+
+    if est:
+        est.instrucoes_finais = len(gerador)
+        if opcoes.stats or opcoes.stats_memoria:
+            print(est.texto())
+        if opcoes.stats_json:
+            est.salvar_json(opcoes.stats_json)
@@ -1,41 +1,78 @@
-class Instrucao:
-    def __init__(self, instrucao, argumento=None):
-        self.instrucao = instrucao
-        self.argumento = argumento
-
-    def __repr__(self):
-        return f"Instrucao({self.instrucao!r}, {self.argumento!r})"
-    
+import argparse
+import operator
+import sys
+from array import array
+
+from canais import FORMATOS, abrir_entrada, abrir_saida
+from codigo_objeto import (CONSUMO_PILHA, EFEITO_PILHA, Instrucao, ObjetoBinario, OPCODES, OP,
+                           OP_DESCONHECIDO, Programa, converter_argumento, dimensoes, eh_binario)
+from superinstrucoes import SUPERINSTRUCOES, fundir
+from traducao import NaoEstruturado, compilar_funcao
+from verificador import verificar
+
+
+def ler_codigo(linhas):
+    """Monta o Programa a partir das linhas do código objeto em texto."""
+    C = Programa()
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha:
+            continue
+        if linha.startswith("#"):
+            # Cabeçalho gerado pelo p1.py; outros comentários são ignorados
+            partes = linha[1:].split()
+            if len(partes) == 2 and partes[0] in ("MEMORIA", "PILHA") and partes[1].isdigit():
+                setattr(C, partes[0].lower(), int(partes[1]))
+            continue
+
+        partes = linha.split()
+        argumento = converter_argumento(partes[1]) if len(partes) > 1 else None
+        C.append(Instrucao(partes[0], argumento))
+    return C
 
 def carregar_codigo(arquivo):
-    C = []
     with open(arquivo, "r", encoding="utf-8") as f:
-        for linha in f:
-            linha = linha.strip()
-            if not linha or linha.startswith("#"):
-                continue  
-
-            partes = linha.split()
-            instrucao = partes[0]
-            argumento = None
-
-            if len(partes) > 1:
-                token = partes[1]
-                try:
-                    argumento = int(token)  
-                except ValueError:
-                    argumento = token       
-
-            C.append(Instrucao(instrucao, argumento))
+        return ler_codigo(f)
+
+def carregar_programa(arquivo, superinstrucoes=False):
+    """Carrega o código objeto em texto ou, se for o caso, mapeia o binário.
+
+    Com superinstrucoes=True as sequências frequentes são fundidas (ver
+    superinstrucoes.py); o resultado só roda no motor de despacho.
+    """
+    if eh_binario(arquivo):
+        C = ObjetoBinario(arquivo)
+    else:
+        C = carregar_codigo(arquivo)
+    if superinstrucoes:
+        # A verificação e as dimensões valem para as instruções originais
+        problemas = verificar(C)
+        if problemas:
+            raise Exception(f"Superinstruções exigem código verificado: {problemas[0]}")
+        memoria, pilha = dimensoes(C)
+        fundido = Programa(fundir([C[i] for i in range(len(C))]), memoria, pilha)
+        fundido.verificado = True
+        return fundido
     return C
 
-if __name__ == "__main__":
-    C = carregar_codigo("codigoCompilado.txt")
 
+# Entrada e saída padrão (interativas; ver canais.py para os canais em bloco)
+
+def ler_console():
+    print('Digite um valor: ')
+    return float(input())
+
+def escrever_console(valor):
+    print(valor)
+
+
+# Interpretador de referência (cadeia de if/elif)
+
+def executar_referencia(C, ler=ler_console, escrever=escrever_console):
     D = []
 
-    i = 0 
-    s = 0 
+    i = 0
+    s = 0
 
     while i < len(C):
 
@@ -48,7 +85,7 @@ if __name__ == "__main__":
 
         elif C[i].instrucao == 'CRCT':
             s = s + 1
-            D.append(C[i].argumento) 
+            D.append(C[i].argumento)
 
         elif C[i].instrucao == 'CRVL':
             s = s + 1
@@ -160,11 +197,10 @@ if __name__ == "__main__":
 
         elif C[i].instrucao == 'LEIT':
             s = s + 1
-            print('Digite um valor: ')
-            D.append(float(input()))
+            D.append(ler())
 
         elif C[i].instrucao == 'IMPR':
-            print(D[s])
+            escrever(D[s])
             D.pop()
             s = s - 1
 
@@ -174,4 +210,515 @@ if __name__ == "__main__":
             print("ERRO DURANTE A EXECUÇÃO DO PROGRAMA")
             break
 
-        i += 1
\ No newline at end of file
+        i += 1
+
+
+# Motor de despacho pré-decodificado
+#
+# Cada instrução é decodificada uma única vez em um código de operação
+# inteiro e em uma closure que executa a operação e devolve o endereço da
+# próxima instrução. O laço principal apenas chama C[pc]().
+# D é alocado uma única vez com o tamanho do cabeçalho do programa
+# (variáveis + altura máxima da pilha, ver codigo_objeto.dimensoes) e as
+# instruções só movem o índice do topo; nada é criado ou removido de D
+# durante a execução.
+# As superinstruções recebem os códigos logo depois dos de OPCODES.
+
+OP_SUPER = {nome: len(OPCODES) + i for i, nome in enumerate(SUPERINSTRUCOES)}
+OP_TODOS = {**OP, **OP_SUPER}
+
+ARITMETICA = {
+    'SOMA': operator.add, 'SUBT': operator.sub,
+    'MULT': operator.mul, 'DIVI': operator.floordiv,
+}
+COMPARACAO = {
+    'CPME': operator.lt, 'CPMA': operator.gt, 'CPIG': operator.eq,
+    'CDES': operator.ne, 'CPMI': operator.le, 'CMAI': operator.ge,
+}
+
+def decodificar(C):
+    """Converte a lista de Instrucao em (opcodes inteiros, argumentos)."""
+    if isinstance(C, ObjetoBinario):
+        return C.decodificar()
+    ops = [OP_TODOS.get(instr.instrucao, OP_DESCONHECIDO) for instr in C]
+    args = [instr.argumento for instr in C]
+    return ops, args
+
+def _gerar_handlers(D, base, ler, escrever, fim):
+    """Fábricas de closures, indexadas pelo código de operação.
+
+    D tem tamanho fixo: [0, base) são as variáveis e a pilha de operandos
+    começa em base. s é o índice do topo, compartilhado pelas closures.
+    """
+    s = base - 1
+
+    def inpp(arg, prox):
+        def f():
+            nonlocal s
+            s = base - 1
+            return prox
+        return f
+
+    def alme(arg, prox):
+        # As posições de todas as variáveis já existem, zeradas, desde o início
+        def f():
+            return prox
+        return f
+
+    def crct(arg, prox):
+        def f():
+            nonlocal s
+            s += 1
+            D[s] = arg
+            return prox
+        return f
+
+    def crvl(arg, prox):
+        def f():
+            nonlocal s
+            s += 1
+            D[s] = D[arg]
+            return prox
+        return f
+
+    def soma(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = D[t] + D[s]
+            s = t
+            return prox
+        return f
+
+    def subt(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = D[t] - D[s]
+            s = t
+            return prox
+        return f
+
+    def mult(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = D[t] * D[s]
+            s = t
+            return prox
+        return f
+
+    def divi(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = D[t] // D[s]
+            s = t
+            return prox
+        return f
+
+    def inve(arg, prox):
+        def f():
+            D[s] = -D[s]
+            return prox
+        return f
+
+    def conj(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if (D[t] == 1 and D[s] == 1) else 0
+            s = t
+            return prox
+        return f
+
+    def disj(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if (D[t] == 1 or D[s] == 1) else 0
+            s = t
+            return prox
+        return f
+
+    def nega(arg, prox):
+        def f():
+            D[s] = 1 - D[s]
+            return prox
+        return f
+
+    def cpme(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] < D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def cpma(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] > D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def cpig(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] == D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def cdes(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] != D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def cpmi(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] <= D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def cmai(arg, prox):
+        def f():
+            nonlocal s
+            t = s - 1
+            D[t] = 1 if D[t] >= D[s] else 0
+            s = t
+            return prox
+        return f
+
+    def armz(arg, prox):
+        def f():
+            nonlocal s
+            D[arg] = D[s]
+            s -= 1
+            return prox
+        return f
+
+    def dsvi(arg, prox):
+        def f():
+            return arg
+        return f
+
+    def dsvf(arg, prox):
+        def f():
+            nonlocal s
+            s -= 1
+            if D[s + 1] == 0:
+                return arg
+            return prox
+        return f
+
+    def leit(arg, prox):
+        def f():
+            nonlocal s
+            s += 1
+            D[s] = ler()
+            return prox
+        return f
+
+    def impr(arg, prox):
+        def f():
+            nonlocal s
+            escrever(D[s])
+            s -= 1
+            return prox
+        return f
+
+    def para(arg, prox):
+        def f():
+            return fim
+        return f
+
+    def desconhecido(arg, prox):
+        def f():
+            print("ERRO DURANTE A EXECUÇÃO DO PROGRAMA")
+            return fim
+        return f
+
+    # Superinstruções
+
+    def crvl_crvl_cmp_dsvf(arg, prox):
+        a, b, cmp, alvo = arg
+        compara = COMPARACAO[cmp]
+        def f():
+            if compara(D[a], D[b]):
+                return prox
+            return alvo
+        return f
+
+    def crvl_crct_cmp_dsvf(arg, prox):
+        a, k, cmp, alvo = arg
+        compara = COMPARACAO[cmp]
+        def f():
+            if compara(D[a], k):
+                return prox
+            return alvo
+        return f
+
+    def crvl_crvl_op_armz(arg, prox):
+        a, b, op, x = arg
+        calcula = ARITMETICA[op]
+        def f():
+            D[x] = calcula(D[a], D[b])
+            return prox
+        return f
+
+    def crvl_crct_op_armz(arg, prox):
+        a, k, op, x = arg
+        calcula = ARITMETICA[op]
+        def f():
+            D[x] = calcula(D[a], k)
+            return prox
+        return f
+
+    def crvl_crvl_op(arg, prox):
+        a, b, op = arg
+        calcula = ARITMETICA[op]
+        def f():
+            nonlocal s
+            s += 1
+            D[s] = calcula(D[a], D[b])
+            return prox
+        return f
+
+    def crvl_crct_op(arg, prox):
+        a, k, op = arg
+        calcula = ARITMETICA[op]
+        def f():
+            nonlocal s
+            s += 1
+            D[s] = calcula(D[a], k)
+            return prox
+        return f
+
+    def crvl_impr(arg, prox):
+        a, = arg
+        def f():
+            escrever(D[a])
+            return prox
+        return f
+
+    def crvl_armz(arg, prox):
+        a, x = arg
+        def f():
+            D[x] = D[a]
+            return prox
+        return f
+
+    def crct_armz(arg, prox):
+        k, x = arg
+        def f():
+            D[x] = k
+            return prox
+        return f
+
+    def leit_armz(arg, prox):
+        x, = arg
+        def f():
+            D[x] = ler()
+            return prox
+        return f
+
+    handlers = [
+        inpp, alme, crct, crvl, soma, subt, mult, divi, inve,
+        conj, disj, nega, cpme, cpma, cpig, cdes, cpmi, cmai,
+        armz, dsvi, dsvf, leit, impr, para,
+    ]
+    super_handlers = {
+        'CRVL_CRVL_CMP_DSVF': crvl_crvl_cmp_dsvf,
+        'CRVL_CRCT_CMP_DSVF': crvl_crct_cmp_dsvf,
+        'CRVL_CRVL_OP_ARMZ': crvl_crvl_op_armz,
+        'CRVL_CRCT_OP_ARMZ': crvl_crct_op_armz,
+        'CRVL_CRVL_OP': crvl_crvl_op,
+        'CRVL_CRCT_OP': crvl_crct_op,
+        'CRVL_IMPR': crvl_impr,
+        'CRVL_ARMZ': crvl_armz,
+        'CRCT_ARMZ': crct_armz,
+        'LEIT_ARMZ': leit_armz,
+    }
+    handlers.extend(super_handlers[nome] for nome in SUPERINSTRUCOES)
+
+    # Usadas só pelo modo com checagens (ver _checado)
+    def altura():
+        return s - base + 1
+
+    def garantir(altura):
+        falta = base + altura - len(D)
+        if falta > 0:
+            D.extend([0] * falta)
+
+    return handlers, desconhecido, altura, garantir
+
+def alocar_memoria(tamanho, tipo="lista"):
+    """Área de dados fixa: lista de objetos Python ou array('d') de doubles."""
+    if tipo == "lista":
+        return [0] * tamanho
+    if tipo == "array":
+        return array("d", bytes(8 * tamanho))
+    raise ValueError(f"Tipo de memória desconhecido: {tipo}")
+
+def _erro_de_execucao(mensagem):
+    def f():
+        raise Exception(f"Erro de execução: {mensagem}")
+    return f
+
+def _checado(f, pc, nome, arg, variaveis, fim, altura, garantir):
+    """Envolve a closure f com as checagens que o verificador faria na carga."""
+    if nome in ('CRVL', 'ARMZ') and not (isinstance(arg, int) and 0 <= arg < variaveis):
+        return _erro_de_execucao(f"{nome} {arg} fora da memória alocada no endereço {pc}")
+    if nome in ('DSVI', 'DSVF') and not (isinstance(arg, int) and 0 <= arg <= fim):
+        return _erro_de_execucao(f"{nome} para endereço inválido {arg} no endereço {pc}")
+    consome = CONSUMO_PILHA.get(nome, 0)
+    cresce = max(EFEITO_PILHA.get(nome, 0), 0)
+
+    def g():
+        h = altura()
+        if h < consome:
+            raise Exception(f"Erro de execução: pilha vazia para {nome} no endereço {pc}")
+        if cresce:
+            garantir(h + cresce)
+        return f()
+    return g
+
+def montar_despacho(C, ler=ler_console, escrever=escrever_console, memoria="lista", verificado=None,
+                    instrumentar=None):
+    """Decodifica C e devolve a lista de closures do motor de despacho.
+
+    Código verificado (ver verificador.py) roda sem nenhuma checagem por
+    passo. Código que não passou na verificação roda com cada instrução
+    checada antes de executar: pilha suficiente, endereços dentro da
+    memória e destinos de desvio válidos.
+
+    instrumentar(pc, f), se dado, é chamada na carga para cada closure e
+    devolve a closure que vai de fato para o laço (ver perfilador.py).
+    Cada closure devolve o próximo pc; o programa termina em len(C).
+    """
+    if verificado is None:
+        verificado = getattr(C, "verificado", None)
+    if verificado is None:
+        problemas = verificar(C)
+        verificado = not problemas
+        if problemas:
+            print(f"Aviso: o código objeto não passou na verificação ({problemas[0]}); "
+                  "executando com checagens.", file=sys.stderr)
+
+    ops, args = decodificar(C)
+    fim = len(C)
+    if verificado:
+        variaveis, pilha = dimensoes(C)
+    else:
+        variaveis = sum(arg for op, arg in zip(ops, args)
+                        if op == OP['ALME'] and isinstance(arg, int) and arg > 0)
+        pilha = 0
+    D = alocar_memoria(variaveis + pilha, memoria)
+    handlers, desconhecido, altura, garantir = _gerar_handlers(D, variaveis, ler, escrever, fim)
+
+    codigo = []
+    for pc, (op, arg) in enumerate(zip(ops, args)):
+        fabrica = handlers[op] if op != OP_DESCONHECIDO else desconhecido
+        f = fabrica(arg, pc + 1)
+        if not verificado and op != OP_DESCONHECIDO:
+            f = _checado(f, pc, C[pc].instrucao, arg, variaveis, fim, altura, garantir)
+        if instrumentar is not None:
+            f = instrumentar(pc, f)
+        codigo.append(f)
+    return codigo
+
+def executar_despacho(C, ler=ler_console, escrever=escrever_console, memoria="lista", verificado=None,
+                      instrumentar=None):
+    """Executa C no motor de despacho (ver montar_despacho)."""
+    codigo = montar_despacho(C, ler, escrever, memoria, verificado, instrumentar)
+    fim = len(codigo)
+    pc = 0
+    while pc < fim:
+        pc = codigo[pc]()
+
+
+# Tradução antecipada para uma função Python (ver traducao.py)
+
+def executar_aot(C, ler=ler_console, escrever=escrever_console):
+    try:
+        programa = compilar_funcao(C)
+    except NaoEstruturado:
+        # Desvio fora dos moldes de if/while: volta para o interpretador
+        return executar_despacho(C, ler, escrever)
+    programa(ler, escrever)
+
+
+MOTORES = {
+    "referencia": executar_referencia,
+    "despacho": executar_despacho,
+    "aot": executar_aot,
+}
+
+MEMORIAS = ("lista", "array")
+
+def executar(C, motor="despacho", ler=ler_console, escrever=escrever_console, memoria="lista"):
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconhecido: {motor}")
+    if motor == "despacho":
+        executar_despacho(C, ler, escrever, memoria)
+    elif memoria != "lista":
+        raise ValueError(f"memoria={memoria!r} só vale para o motor de despacho")
+    else:
+        MOTORES[motor](C, ler, escrever)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa o código objeto da MaqHipo.")
+    parser.add_argument("arquivo", nargs="?", default="codigoCompilado.txt",
+                        help="código objeto em texto ou no formato binário")
+    parser.add_argument("--motor", choices=sorted(MOTORES), default="despacho",
+                        help="'referencia' usa a cadeia de if/elif original")
+    parser.add_argument("--superinstrucoes", action="store_true",
+                        help="funde sequências frequentes na carga (só no motor de despacho)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="só verifica o código objeto e lista os problemas encontrados")
+    parser.add_argument("--memoria", choices=MEMORIAS, default="lista",
+                        help="área de dados do motor de despacho: lista de objetos ou array('d') de doubles")
+    parser.add_argument("-i", "--interativo", action="store_true",
+                        help="pede cada valor lido no console e imprime cada valor na hora")
+    parser.add_argument("--entrada", default="-",
+                        help="arquivo com os valores lidos por LEIT (padrão: entrada padrão)")
+    parser.add_argument("--saida", default="-",
+                        help="arquivo que recebe os valores de IMPR (padrão: saída padrão)")
+    parser.add_argument("--formato-entrada", choices=FORMATOS, default="texto",
+                        help="'texto': doubles separados por espaço; 'binario': doubles de 8 bytes")
+    parser.add_argument("--formato-saida", choices=FORMATOS, default="texto",
+                        help="'texto': um valor por linha; 'binario': doubles de 8 bytes")
+    parser.add_argument("--mmap", action="store_true", help="mapeia o arquivo de entrada em memória")
+    opcoes = parser.parse_args()
+    if opcoes.superinstrucoes and opcoes.motor != "despacho":
+        parser.error("--superinstrucoes requer --motor despacho")
+    if opcoes.memoria != "lista" and opcoes.motor != "despacho":
+        parser.error("--memoria requer --motor despacho")
+    if opcoes.interativo and opcoes.entrada != "-":
+        parser.error("--interativo lê do console; não use com --entrada")
+
+    if opcoes.verificar:
+        # O verificador conhece só as instruções da MaqHipo: verifica o
+        # programa antes da fusão, como faz carregar_programa()
+        problemas = verificar(carregar_programa(opcoes.arquivo))
+        for problema in problemas:
+            print(problema)
+        print(f"{len(problemas)} problema(s) encontrados." if problemas else "Código objeto verificado.")
+        exit(1 if problemas else 0)
+    C = carregar_programa(opcoes.arquivo, opcoes.superinstrucoes)
+    with abrir_entrada(opcoes.entrada, opcoes.formato_entrada, opcoes.mmap, opcoes.interativo) as entrada, \
+            abrir_saida(opcoes.saida, opcoes.formato_saida, opcoes.interativo) as saida:
+        executar(C, opcoes.motor, entrada.ler, saida.escrever, opcoes.memoria)
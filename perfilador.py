@@ -0,0 +1,224 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from canais import abrir_entrada, abrir_saida
+from p2 import carregar_programa, executar_despacho, ler_console, escrever_console
+
+
+# Perfilador do motor de despacho da MaqHipo
+#
+# Três modos:
+#   contagem   : cada closure é envolvida por um contador de execuções
+#   tempo      : além da contagem, mede o tempo de cada instrução
+#   amostragem : as closures ficam intactas; uma thread lê periodicamente
+#                a variável pc do laço de executar_despacho e conta em que
+#                endereço o programa está. O custo é o de acordar a thread
+#                a cada intervalo, alguns por cento no máximo.
+# Sem perfil, executar_despacho não envolve nada e o laço não muda.
+#
+# Os laços quentes vêm dos DSVI que voltam no código (arestas de retorno):
+# o laço [cabeçalho, DSVI] roda uma vez para cada execução do DSVI.
+
+MODOS = ("contagem", "tempo", "amostragem")
+
+
+class Perfil:
+    def __init__(self, C, modo="contagem"):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de perfil desconhecido: {modo}")
+        self.modo = modo
+        self.nomes = [C[i].instrucao for i in range(len(C))]
+        self.args = [C[i].argumento for i in range(len(C))]
+        self.contagem = [0] * len(C)
+        self.tempo = [0] * len(C)  # em nanossegundos
+        self.amostras = Counter()
+        self.duracao = 0.0
+
+        # (cabeçalho, endereço do DSVI de retorno) de cada laço
+        self.lacos = [(arg, pc) for pc, (nome, arg) in enumerate(zip(self.nomes, self.args))
+                      if nome == "DSVI" and isinstance(arg, int) and arg <= pc]
+
+    # Instrumentação das closures
+
+    def instrumentar(self, pc, f):
+        contagem = self.contagem
+        if self.modo == "contagem":
+            def g():
+                contagem[pc] += 1
+                return f()
+            return g
+        if self.modo == "tempo":
+            tempo = self.tempo
+            relogio = time.perf_counter_ns
+            def g():
+                contagem[pc] += 1
+                inicio = relogio()
+                proximo = f()
+                tempo[pc] += relogio() - inicio
+                return proximo
+            return g
+        return f
+
+    # Resultados
+
+    def peso(self, pc):
+        if self.modo == "amostragem":
+            return self.amostras[pc]
+        if self.modo == "tempo":
+            return self.tempo[pc]
+        return self.contagem[pc]
+
+    def por_opcode(self):
+        resultado = {}
+        for pc, nome in enumerate(self.nomes):
+            item = resultado.setdefault(nome, {"execucoes": 0, "tempo_ns": 0, "amostras": 0})
+            item["execucoes"] += self.contagem[pc]
+            item["tempo_ns"] += self.tempo[pc]
+            item["amostras"] += self.amostras[pc]
+        return dict(sorted(resultado.items(), key=lambda item: -self._chave(item[1])))
+
+    def _chave(self, item):
+        if self.modo == "amostragem":
+            return item["amostras"]
+        if self.modo == "tempo":
+            return item["tempo_ns"]
+        return item["execucoes"]
+
+    def lacos_quentes(self):
+        lacos = []
+        for cabecalho, retorno in self.lacos:
+            lacos.append({
+                "cabecalho": cabecalho,
+                "fim": retorno,
+                "iteracoes": self.contagem[retorno],
+                "amostras": sum(self.amostras[pc] for pc in range(cabecalho, retorno + 1)),
+            })
+        chave = "amostras" if self.modo == "amostragem" else "iteracoes"
+        return sorted(lacos, key=lambda laco: -laco[chave])
+
+    def como_dict(self):
+        return {
+            "modo": self.modo,
+            "duracao_s": self.duracao,
+            "instrucoes_executadas": sum(self.contagem) if self.modo != "amostragem" else None,
+            "amostras": sum(self.amostras.values()),
+            "por_endereco": [
+                {"pc": pc, "instrucao": nome, "argumento": _serializavel(arg),
+                 "execucoes": self.contagem[pc], "tempo_ns": self.tempo[pc],
+                 "amostras": self.amostras[pc]}
+                for pc, (nome, arg) in enumerate(zip(self.nomes, self.args))
+            ],
+            "por_opcode": self.por_opcode(),
+            "lacos": self.lacos_quentes(),
+        }
+
+    def pilhas_colapsadas(self, programa="programa"):
+        """Uma linha "programa;while@h;...;pc INSTR peso" por endereço, para flamegraph.pl e afins."""
+        linhas = []
+        for pc, nome in enumerate(self.nomes):
+            peso = self.peso(pc)
+            if not peso:
+                continue
+            # Laços que contêm pc, do mais externo para o mais interno
+            envolventes = sorted((laco for laco in self.lacos if laco[0] <= pc <= laco[1]),
+                                 key=lambda laco: laco[0] - laco[1])
+            quadros = [programa] + [f"while@{cabecalho}" for cabecalho, _ in envolventes]
+            quadros.append(f"{pc} {nome}")
+            linhas.append(f"{';'.join(quadros)} {peso}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self, limite=10):
+        linhas = [f"Perfil ({self.modo}) em {self.duracao:.3f} s"]
+        if self.modo == "amostragem":
+            linhas[0] += f", {sum(self.amostras.values())} amostras"
+        else:
+            linhas[0] += f", {sum(self.contagem)} instruções executadas"
+        linhas.append(f"{'instrução':<22}{'execuções':>12}{'tempo (ms)':>12}{'amostras':>10}")
+        for nome, item in list(self.por_opcode().items())[:limite]:
+            linhas.append(f"{nome:<22}{item['execucoes']:>12}{item['tempo_ns'] / 1e6:>12.2f}{item['amostras']:>10}")
+        lacos = self.lacos_quentes()[:limite]
+        if lacos:
+            linhas.append("laços (cabeçalho..DSVI):")
+            for laco in lacos:
+                linhas.append(f"  {laco['cabecalho']:>5}..{laco['fim']:<5} {laco['iteracoes']:>10} iterações"
+                              f"{laco['amostras']:>8} amostras")
+        return "\n".join(linhas)
+
+
+def _serializavel(arg):
+    return list(arg) if isinstance(arg, tuple) else arg
+
+
+class Amostrador:
+    """Thread que anota, a cada intervalo, o pc do executar_despacho de outra thread."""
+
+    def __init__(self, perfil, thread_alvo, intervalo=0.001):
+        self.perfil = perfil
+        self.alvo = thread_alvo
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self._rodar, daemon=True)
+
+    def _rodar(self):
+        codigo_laco = executar_despacho.__code__
+        amostras = self.perfil.amostras
+        while not self.parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            while quadro is not None and quadro.f_code is not codigo_laco:
+                quadro = quadro.f_back
+            if quadro is not None:
+                pc = quadro.f_locals.get("pc")
+                if isinstance(pc, int):
+                    amostras[pc] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *erro):
+        self.parar.set()
+        self.thread.join()
+
+
+def perfilar(C, modo="contagem", ler=ler_console, escrever=escrever_console, memoria="lista",
+             intervalo=0.001):
+    """Executa C no motor de despacho e devolve o Perfil da execução."""
+    perfil = Perfil(C, modo)
+    inicio = time.perf_counter()
+    if modo == "amostragem":
+        with Amostrador(perfil, threading.get_ident(), intervalo):
+            executar_despacho(C, ler, escrever, memoria)
+    else:
+        executar_despacho(C, ler, escrever, memoria, instrumentar=perfil.instrumentar)
+    perfil.duracao = time.perf_counter() - inicio
+    return perfil
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa um programa da MaqHipo com perfil.")
+    parser.add_argument("arquivo", help="código objeto em texto ou no formato binário")
+    parser.add_argument("--modo", choices=MODOS, default="amostragem")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="intervalo de amostragem em ms")
+    parser.add_argument("--json", default=None, help="grava o perfil completo em JSON neste arquivo")
+    parser.add_argument("--pilhas", default=None,
+                        help="grava as pilhas colapsadas (formato do flamegraph.pl) neste arquivo")
+    parser.add_argument("--superinstrucoes", action="store_true")
+    parser.add_argument("--entrada", default="-", help="valores lidos por LEIT (padrão: entrada padrão)")
+    parser.add_argument("--saida", default="-", help="valores de IMPR (padrão: saída padrão)")
+    opcoes = parser.parse_args()
+
+    C = carregar_programa(opcoes.arquivo, opcoes.superinstrucoes)
+    with abrir_entrada(opcoes.entrada) as entrada, abrir_saida(opcoes.saida) as saida:
+        perfil = perfilar(C, opcoes.modo, entrada.ler, saida.escrever, intervalo=opcoes.intervalo / 1000)
+
+    print(perfil.resumo(), file=sys.stderr)
+    if opcoes.json:
+        with open(opcoes.json, "w", encoding="utf-8") as f:
+            json.dump(perfil.como_dict(), f, indent=1)
+    if opcoes.pilhas:
+        with open(opcoes.pilhas, "w", encoding="utf-8") as f:
+            f.write(perfil.pilhas_colapsadas(opcoes.arquivo))
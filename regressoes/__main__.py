@@ -0,0 +1,79 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+
+
+# Programas de regressão
+#
+# Cada regressoes/nome.txt é compilado pelo p1.py, com as opções de
+# nome.opcoes se o arquivo existir, e executado pelo p2.py, uma vez com o
+# código objeto em texto e outra com o binário. Nos dois formatos o código
+# objeto tem que passar no verificador (p2.py --verificar) e a saída do
+# p2.py tem que ser igual a nome.esperado.
+
+# Cada programa roda a partir do código objeto em texto e do binário
+FORMATOS = (("texto", []), ("binario", ["--binario"]))
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA)
+
+
+def _opcoes(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
+        return f.read().split()
+
+def conferir(fonte):
+    """Compila e executa fonte; devolve None se a saída for a esperada, senão a diferença."""
+    base = os.path.splitext(fonte)[0]
+    with open(base + ".esperado", "r", encoding="utf-8") as f:
+        esperado = f.read()
+    for formato, opcoes in FORMATOS:
+        diferenca = _conferir_formato(fonte, base, esperado, opcoes)
+        if diferenca is not None:
+            return f"({formato}) {diferenca}"
+    return None
+
+def _conferir_formato(fonte, base, esperado, opcoes):
+    with tempfile.TemporaryDirectory() as pasta:
+        objeto = os.path.join(pasta, "codigoCompilado")
+        compilacao = subprocess.run(
+            [sys.executable, os.path.join(RAIZ, "p1.py"), fonte, "-o", objeto]
+            + opcoes + _opcoes(base + ".opcoes"),
+            cwd=RAIZ, capture_output=True, text=True)
+        if compilacao.returncode != 0 or not os.path.exists(objeto):
+            return f"não compilou:\n{compilacao.stdout}{compilacao.stderr}"
+        verificacao = subprocess.run([sys.executable, os.path.join(RAIZ, "p2.py"), "--verificar", objeto],
+                                     cwd=RAIZ, capture_output=True, text=True)
+        if verificacao.returncode != 0:
+            return f"não passou no verificador:\n{verificacao.stdout}{verificacao.stderr}"
+        execucao = subprocess.run([sys.executable, os.path.join(RAIZ, "p2.py"), objeto],
+                                  cwd=RAIZ, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    if execucao.returncode != 0 or execucao.stdout != esperado:
+        return f"esperado:\n{esperado}obtido:\n{execucao.stdout}{execucao.stderr}"
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m regressoes",
+                                     description="Compila e executa os programas de regressão.")
+    parser.add_argument("nomes", nargs="*", help="só estes programas (sem a extensão)")
+    opcoes = parser.parse_args()
+
+    fontes = sorted(glob.glob(os.path.join(PASTA, "*.txt")))
+    if opcoes.nomes:
+        fontes = [f for f in fontes if os.path.splitext(os.path.basename(f))[0] in opcoes.nomes]
+    falhas = 0
+    for fonte in fontes:
+        nome = os.path.splitext(os.path.basename(fonte))[0]
+        diferenca = conferir(fonte)
+        if diferenca is None:
+            print(f"ok    {nome}")
+        else:
+            falhas += 1
+            print(f"FALHA {nome}\n{diferenca}")
+    print(f"{len(fontes) - falhas} de {len(fontes)} programas com a saída esperada.")
+    sys.exit(1 if falhas else 0)
@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import contextlib
+from collections import deque
+
+from biblioteca import compilar, tabela_densa
+from otimizador import PASSES, ler_passes
+from p2 import montar_despacho
+
+
+# Servidor assíncrono de compilação e execução
+#
+# Cada conexão (TCP ou socket Unix) é uma sessão. O cliente manda o fonte,
+# o servidor compila no próprio processo (ver biblioteca.py), em uma
+# thread fora do laço de eventos, e executa o programa no motor de
+# despacho em fatias de no máximo `fatia` instruções, devolvendo o
+# controle ao laço de eventos entre uma fatia e outra. Assim milhares de
+# sessões dividem o processo de forma justa.
+#
+# Protocolo, em linhas de texto UTF-8:
+#
+#   cliente -> servidor
+#     COMPILAR n       seguido de n bytes com o fonte
+#     x y z ...        doubles para LEIT, separados por espaço, a qualquer
+#                      momento depois do fonte (podem vir antes do LEIT)
+#   servidor -> cliente
+#     COMPILADO n      compilou; n instruções
+#     IMPR x           valor impresso pelo programa
+#     LEIT             o programa está parado esperando um valor
+#     FIM n            o programa terminou depois de n instruções
+#     ERRO mensagem    erro de compilação, de execução ou de protocolo
+#
+# Um valor inválido gera ERRO e um novo LEIT; a execução continua. Depois
+# de FIM ou de qualquer outro ERRO a sessão aceita outro COMPILAR, e os
+# valores que sobraram da execução anterior são descartados.
+
+FATIA = 1000
+MAX_FONTE = 1 << 20
+
+
+class ErroDeSessao(Exception):
+    pass
+
+
+class Sessao:
+    def __init__(self, leitor, escritor, fatia=FATIA, max_passos=None, max_fonte=MAX_FONTE,
+                 otimizar=False, passes=PASSES):
+        self.leitor = leitor
+        self.escritor = escritor
+        self.fatia = fatia
+        self.max_passos = max_passos
+        self.max_fonte = max_fonte
+        self.otimizar = otimizar
+        self.passes = passes
+        self.entrada = deque()
+        self.saida = []
+        self.bloqueado = None
+
+    def enviar(self, linha):
+        self.escritor.write(f"{linha}\n".encode("utf-8"))
+
+    async def atender(self):
+        while True:
+            linha = await self.leitor.readline()
+            if not linha:
+                return
+            partes = linha.split()
+            if not partes or _sao_valores(partes):
+                # Entrada que sobrou de uma execução anterior
+                continue
+            if len(partes) != 2 or partes[0] != b"COMPILAR" or not partes[1].isdigit():
+                self.enviar("ERRO esperado 'COMPILAR n'")
+                await self.escritor.drain()
+                continue
+            tamanho = int(partes[1])
+            if tamanho > self.max_fonte:
+                self.enviar(f"ERRO fonte maior que {self.max_fonte} bytes")
+                await self.escritor.drain()
+                return
+            try:
+                fonte = (await self.leitor.readexactly(tamanho)).decode("utf-8")
+            except asyncio.IncompleteReadError:
+                return
+            except UnicodeDecodeError as e:
+                self.enviar(f"ERRO fonte não é UTF-8: {e}")
+                await self.escritor.drain()
+                continue
+
+            try:
+                # Compilar um fonte grande leva segundos: roda em uma thread
+                # para não parar o laço de eventos e as outras sessões
+                C = await asyncio.get_running_loop().run_in_executor(
+                    None, compilar, fonte, self.otimizar, self.passes)
+            except Exception as e:
+                self.enviar(f"ERRO {_mensagem(e)}")
+                await self.escritor.drain()
+                continue
+            self.enviar(f"COMPILADO {len(C)}")
+
+            try:
+                passos = await self.executar(C)
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception as e:
+                self.enviar_saida()
+                self.enviar(f"ERRO {_mensagem(e)}")
+            else:
+                self.enviar(f"FIM {passos}")
+            await self.escritor.drain()
+
+    def _instrumentar(self, C):
+        """Faz LEIT sem valor disponível parar o laço em vez de chamar ler()."""
+        fim = len(C)
+        entrada = self.entrada
+
+        def instrumentar(pc, f):
+            if C[pc].instrucao != "LEIT":
+                return f
+            def g():
+                if entrada:
+                    return f()
+                self.bloqueado = pc
+                return fim
+            return g
+        return instrumentar
+
+    async def executar(self, C):
+        """Executa C em fatias; devolve o número de instruções executadas."""
+        self.entrada.clear()
+        self.saida.clear()
+        self.bloqueado = None
+        codigo = montar_despacho(C, self.entrada.popleft, self.saida.append,
+                                 instrumentar=self._instrumentar(C))
+        fim = len(codigo)
+        fatia = self.fatia
+        passos = 0
+        pc = 0
+        while pc < fim:
+            for n in range(1, fatia + 1):
+                pc = codigo[pc]()
+                if pc >= fim:
+                    break
+            passos += n
+
+            if self.bloqueado is not None:
+                # O LEIT em que o laço parou não chegou a executar
+                passos -= 1
+                pc, self.bloqueado = self.bloqueado, None
+                self.enviar_saida()
+                await self.receber_entrada()
+            else:
+                if self.saida:
+                    self.enviar_saida()
+                    await self.escritor.drain()
+                if self.max_passos is not None and passos >= self.max_passos:
+                    raise ErroDeSessao(f"limite de {self.max_passos} instruções excedido")
+                await asyncio.sleep(0)
+        self.enviar_saida()
+        return passos
+
+    def enviar_saida(self):
+        if self.saida:
+            self.escritor.write("".join(f"IMPR {valor}\n" for valor in self.saida).encode("utf-8"))
+            self.saida.clear()
+
+    async def receber_entrada(self):
+        self.enviar("LEIT")
+        await self.escritor.drain()
+        while not self.entrada:
+            linha = await self.leitor.readline()
+            if not linha:
+                raise ConnectionResetError("conexão encerrada antes da entrada do programa")
+            try:
+                self.entrada.extend(map(float, linha.split()))
+            except ValueError:
+                self.enviar(f"ERRO valor inválido: {linha.decode('utf-8', 'replace').strip()}")
+                self.enviar("LEIT")
+                await self.escritor.drain()
+
+
+def _sao_valores(partes):
+    try:
+        for parte in partes:
+            float(parte)
+    except ValueError:
+        return False
+    return True
+
+def _mensagem(erro):
+    """A mensagem do erro em uma linha só, para o protocolo."""
+    texto = " ".join(str(erro).split())
+    if isinstance(erro, ErroDeSessao) or texto.startswith("Erro"):
+        return texto
+    return f"Erro de execução: {type(erro).__name__}: {texto}"
+
+
+async def _atender_conexao(leitor, escritor, **opcoes):
+    try:
+        await Sessao(leitor, escritor, **opcoes).atender()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        escritor.close()
+        with contextlib.suppress(ConnectionError):
+            await escritor.wait_closed()
+
+async def servir(host="127.0.0.1", porta=8765, unix=None, **opcoes):
+    """Aceita sessões até ser cancelado; opcoes vão para Sessao."""
+    atender = lambda leitor, escritor: _atender_conexao(leitor, escritor, **opcoes)
+    # Limite de linha maior que o padrão de 64 KiB, para linhas longas de entrada
+    if unix:
+        servidor = await asyncio.start_unix_server(atender, unix, limit=MAX_FONTE)
+    else:
+        servidor = await asyncio.start_server(atender, host, porta, limit=MAX_FONTE)
+    # Monta a tabela LL(1) antes da primeira sessão
+    tabela_densa()
+    async with servidor:
+        await servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor assíncrono que compila e executa programas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--unix", default=None, metavar="CAMINHO", help="usa um socket Unix em vez de TCP")
+    parser.add_argument("--fatia", type=int, default=FATIA,
+                        help=f"instruções executadas antes de ceder o laço de eventos (padrão: {FATIA})")
+    parser.add_argument("--max-passos", type=int, default=None,
+                        help="encerra com erro a execução que passar deste número de instruções")
+    parser.add_argument("--max-fonte", type=int, default=MAX_FONTE, help="tamanho máximo do fonte em bytes")
+    parser.add_argument("-O", "--otimizar", action="store_true", help="aplica o otimizador peephole")
+    parser.add_argument("--passes", default=",".join(PASSES),
+                        help=f"passes do otimizador separados por vírgula (padrão: {','.join(PASSES)})")
+    opcoes = parser.parse_args()
+    if opcoes.fatia < 1:
+        parser.error("--fatia deve ser positiva")
+    try:
+        passes = ler_passes(opcoes.passes)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        asyncio.run(servir(opcoes.host, opcoes.porta, opcoes.unix, fatia=opcoes.fatia,
+                           max_passos=opcoes.max_passos, max_fonte=opcoes.max_fonte,
+                           otimizar=opcoes.otimizar,
+                           passes=passes))
+    except KeyboardInterrupt:
+        pass
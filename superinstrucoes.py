@@ -0,0 +1,135 @@
+import argparse
+from collections import Counter
+
+from codigo_objeto import Instrucao
+
+
+# Superinstruções da MaqHipo
+#
+# Sequências frequentes no código gerado pelo p1.py são fundidas, na
+# carga, em uma única instrução que o motor de despacho do p2.py executa
+# em um passo. O argumento de uma superinstrução é a tupla com os
+# argumentos (e operações) das instruções originais. Nenhuma instrução
+# fundida, exceto a primeira, pode ser alvo de desvio.
+
+COMPARACOES = ("CPME", "CPMA", "CPIG", "CDES", "CPMI", "CMAI")
+ARITMETICAS = ("SOMA", "SUBT", "MULT", "DIVI")
+SALTOS = ("DSVI", "DSVF")
+
+# (nome, padrão de instruções); os padrões mais longos são tentados antes
+PADROES = [
+    ("CRVL_CRVL_CMP_DSVF", ("CRVL", "CRVL", COMPARACOES, "DSVF")),
+    ("CRVL_CRCT_CMP_DSVF", ("CRVL", "CRCT", COMPARACOES, "DSVF")),
+    ("CRVL_CRVL_OP_ARMZ", ("CRVL", "CRVL", ARITMETICAS, "ARMZ")),
+    ("CRVL_CRCT_OP_ARMZ", ("CRVL", "CRCT", ARITMETICAS, "ARMZ")),
+    ("CRVL_CRVL_OP", ("CRVL", "CRVL", ARITMETICAS)),
+    ("CRVL_CRCT_OP", ("CRVL", "CRCT", ARITMETICAS)),
+    ("CRVL_IMPR", ("CRVL", "IMPR")),
+    ("CRVL_ARMZ", ("CRVL", "ARMZ")),
+    ("CRCT_ARMZ", ("CRCT", "ARMZ")),
+    ("LEIT_ARMZ", ("LEIT", "ARMZ")),
+]
+
+SUPERINSTRUCOES = [nome for nome, _ in PADROES]
+
+
+def _casa(padrao, C, i, alvos):
+    if i + len(padrao) > len(C):
+        return False
+    for k, esperado in enumerate(padrao):
+        instr = C[i + k]
+        if k > 0 and (i + k) in alvos:
+            return False
+        if isinstance(esperado, tuple):
+            if instr.instrucao not in esperado:
+                return False
+        elif instr.instrucao != esperado:
+            return False
+    return True
+
+def _argumento(padrao, instrucoes):
+    """Argumento da superinstrução: args das CRVL/CRCT/ARMZ/DSVF e nomes das operações."""
+    partes = []
+    for esperado, instr in zip(padrao, instrucoes):
+        if isinstance(esperado, tuple):
+            partes.append(instr.instrucao)
+        elif instr.argumento is not None:
+            partes.append(instr.argumento)
+    return tuple(partes)
+
+
+def fundir(C):
+    """Devolve uma nova lista de Instrucao com as sequências fundidas e saltos remapeados."""
+    alvos = {instr.argumento for instr in C if instr.instrucao in SALTOS}
+
+    novo = []
+    novo_endereco = {}
+    i = 0
+    while i < len(C):
+        novo_endereco[i] = len(novo)
+        for nome, padrao in PADROES:
+            if _casa(padrao, C, i, alvos):
+                originais = [C[i + k] for k in range(len(padrao))]
+                novo.append(Instrucao(nome, _argumento(padrao, originais)))
+                i += len(padrao)
+                break
+        else:
+            novo.append(Instrucao(C[i].instrucao, C[i].argumento))
+            i += 1
+    novo_endereco[len(C)] = len(novo)
+
+    for instr in novo:
+        if instr.instrucao in SALTOS:
+            instr.argumento = novo_endereco.get(instr.argumento, instr.argumento)
+        elif instr.instrucao.endswith("_DSVF"):
+            instr.argumento = instr.argumento[:-1] + (novo_endereco[instr.argumento[-1]],)
+    return novo
+
+
+# Mineração de sequências candidatas
+
+def minerar(programas, tamanhos=(2, 3, 4)):
+    """Conta sequências de opcodes em trechos sem desvio de um corpus.
+
+    Uma janela só vale se nenhuma instrução além da primeira for alvo de
+    desvio e se só a última puder ser DSVF/DSVI/PARA. Devolve um Counter de
+    tuplas de opcodes.
+    """
+    contagem = Counter()
+    for C in programas:
+        alvos = {instr.argumento for instr in C if instr.instrucao in SALTOS}
+        nomes = [instr.instrucao for instr in C]
+        for i in range(len(nomes)):
+            for n in tamanhos:
+                if i + n > len(nomes):
+                    break
+                janela = nomes[i:i + n]
+                if any(nome in SALTOS or nome == "PARA" for nome in janela[:-1]):
+                    break
+                if any((i + k) in alvos for k in range(1, n)):
+                    break
+                contagem[tuple(janela)] += 1
+    return contagem
+
+
+if __name__ == "__main__":
+    from p2 import carregar_programa
+
+    parser = argparse.ArgumentParser(
+        description="Sugere sequências de instruções para fundir em superinstruções.")
+    parser.add_argument("arquivos", nargs="+", help="arquivos codigoCompilado (texto ou binário)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--tamanho-max", type=int, default=4)
+    opcoes = parser.parse_args()
+
+    programas = []
+    for arquivo in opcoes.arquivos:
+        C = carregar_programa(arquivo)
+        programas.append([C[i] for i in range(len(C))])
+
+    contagem = minerar(programas, range(2, opcoes.tamanho_max + 1))
+    # Cada ocorrência fundida economiza len(sequência) - 1 despachos
+    ranking = sorted(contagem.items(), key=lambda item: item[1] * (len(item[0]) - 1), reverse=True)
+    print(f"{'ocorrências':>11} {'economia':>9}  sequência")
+    for sequencia, n in ranking[:opcoes.top]:
+        print(f"{n:>11} {n * (len(sequencia) - 1):>9}  {' '.join(sequencia)}")
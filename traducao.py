@@ -0,0 +1,241 @@
+from codigo_objeto import ObjetoBinario
+
+
+# Tradução antecipada (AOT) do código da MaqHipo para Python
+#
+# O fluxo de DSVF/DSVI gerado pelo p1.py tem sempre a forma de if/else e
+# while, então dá para reconstruir código estruturado:
+#
+#   if   : cond; DSVF f; <então>; DSVI e; f: <senão>; e:
+#   while: h: cond; DSVF s; <corpo>; DSVI h; s:
+#
+# A pilha de operandos é resolvida em tempo de tradução (vira expressões
+# Python) e cada posição alocada por ALME vira uma variável local. Quando
+# aparece um desvio que não se encaixa nesses moldes, a tradução levanta
+# NaoEstruturado e quem chamou volta para o interpretador.
+
+class NaoEstruturado(Exception):
+    pass
+
+
+ARITMETICA = {"SOMA": "+", "SUBT": "-", "MULT": "*", "DIVI": "//"}
+COMPARACAO = {"CPME": "<", "CPMA": ">", "CPIG": "==", "CDES": "!=", "CPMI": "<=", "CMAI": ">="}
+
+# Expressões mais profundas que isso vão para uma temporária, para não
+# estourar o limite de aninhamento do parser do Python.
+PROFUNDIDADE_MAX = 40
+
+
+class Expr:
+    def __init__(self, texto, profundidade=0, booleana=False):
+        self.texto = texto
+        self.profundidade = profundidade
+        self.booleana = booleana
+
+    def valor(self):
+        """Texto da expressão como valor da MaqHipo (comparações viram 1/0)."""
+        if self.booleana:
+            return f"(1 if {self.texto} else 0)"
+        return self.texto
+
+    def condicao(self):
+        """Texto da expressão como condição (DSVF desvia quando o valor é 0)."""
+        if self.booleana:
+            return self.texto
+        return f"{self.texto} != 0"
+
+
+class Tradutor:
+    def __init__(self, C):
+        self.nomes = [C[i].instrucao for i in range(len(C))]
+        self.args = [C[i].argumento for i in range(len(C))]
+        self.linhas = []
+        self.temporarias = 0
+
+        self.variaveis = 0
+        for nome, arg in zip(self.nomes, self.args):
+            if nome == "ALME":
+                self.variaveis += arg
+
+        # cabeçalho de while -> endereço do último DSVI que volta para ele;
+        # os demais (vindos do encadeamento de saltos) viram continue
+        self.lacos = {}
+        for i, (nome, arg) in enumerate(zip(self.nomes, self.args)):
+            if nome == "DSVI" and isinstance(arg, int) and arg <= i:
+                self.lacos[arg] = i
+
+    def emitir(self, nivel, texto):
+        self.linhas.append("    " * nivel + texto)
+
+    def temporaria(self, nivel, expr):
+        nome = f"t{self.temporarias}"
+        self.temporarias += 1
+        self.emitir(nivel, f"{nome} = {expr.valor()}")
+        return Expr(nome)
+
+    def variavel(self, endereco):
+        if not isinstance(endereco, int) or not 0 <= endereco < self.variaveis:
+            raise NaoEstruturado(f"endereço fora da área alocada: {endereco}")
+        return f"v{endereco}"
+
+    def alvo(self, i):
+        arg = self.args[i]
+        if not isinstance(arg, int):
+            raise NaoEstruturado(f"desvio sem destino resolvido em {i}")
+        return arg
+
+    def bloco(self, lo, hi, nivel, laco=None, cabecalho=None):
+        """Traduz [lo, hi). laco = (cabeçalho, saída) do while mais interno."""
+        pilha = []
+        emitiu = False
+        i = lo
+        while i < hi:
+            nome, arg = self.nomes[i], self.args[i]
+
+            if i in self.lacos and i != cabecalho:
+                fim = self.lacos[i]
+                if pilha or fim >= hi:
+                    raise NaoEstruturado(f"while mal aninhado em {i}")
+                self.emitir(nivel, "while True:")
+                self.bloco(i, fim, nivel + 1, (i, fim + 1), cabecalho=i)
+                emitiu = True
+                i = fim + 1
+                continue
+
+            if nome in ("INPP", "ALME"):
+                pass
+
+            elif nome == "CRVL":
+                pilha.append(Expr(self.variavel(arg)))
+
+            elif nome == "CRCT":
+                if isinstance(arg, bool) or not isinstance(arg, (int, float)):
+                    raise NaoEstruturado(f"constante inválida em {i}: {arg!r}")
+                pilha.append(Expr(repr(arg)))
+
+            elif nome in ARITMETICA or nome in COMPARACAO or nome in ("CONJ", "DISJ"):
+                if len(pilha) < 2:
+                    raise NaoEstruturado(f"pilha insuficiente em {i}")
+                b = pilha.pop()
+                a = pilha.pop()
+                profundidade = max(a.profundidade, b.profundidade) + 1
+                if nome in ARITMETICA:
+                    expr = Expr(f"({a.valor()} {ARITMETICA[nome]} {b.valor()})", profundidade)
+                elif nome in COMPARACAO:
+                    expr = Expr(f"({a.valor()} {COMPARACAO[nome]} {b.valor()})", profundidade, True)
+                elif nome == "CONJ":
+                    expr = Expr(f"({a.valor()} == 1 and {b.valor()} == 1)", profundidade, True)
+                else:
+                    expr = Expr(f"({a.valor()} == 1 or {b.valor()} == 1)", profundidade, True)
+                if profundidade > PROFUNDIDADE_MAX:
+                    expr = self.temporaria(nivel, expr)
+                    emitiu = True
+                pilha.append(expr)
+
+            elif nome in ("INVE", "NEGA"):
+                if not pilha:
+                    raise NaoEstruturado(f"pilha insuficiente em {i}")
+                a = pilha.pop()
+                texto = f"(-{a.valor()})" if nome == "INVE" else f"(1 - {a.valor()})"
+                expr = Expr(texto, a.profundidade + 1)
+                if expr.profundidade > PROFUNDIDADE_MAX:
+                    expr = self.temporaria(nivel, expr)
+                    emitiu = True
+                pilha.append(expr)
+
+            elif nome == "LEIT":
+                pilha.append(self.temporaria(nivel, Expr("ler()")))
+                emitiu = True
+
+            elif nome == "ARMZ":
+                if len(pilha) != 1:
+                    raise NaoEstruturado(f"ARMZ com pilha de altura {len(pilha)} em {i}")
+                self.emitir(nivel, f"{self.variavel(arg)} = {pilha.pop().valor()}")
+                emitiu = True
+
+            elif nome == "IMPR":
+                if not pilha:
+                    raise NaoEstruturado(f"pilha insuficiente em {i}")
+                self.emitir(nivel, f"escrever({pilha.pop().valor()})")
+                emitiu = True
+
+            elif nome == "PARA":
+                self.emitir(nivel, "return")
+                emitiu = True
+
+            elif nome == "DSVF":
+                if len(pilha) != 1:
+                    raise NaoEstruturado(f"DSVF com pilha de altura {len(pilha)} em {i}")
+                cond = pilha.pop()
+                destino = self.alvo(i)
+                if laco is not None and destino == laco[1]:
+                    self.emitir(nivel, f"if not ({cond.condicao()}):")
+                    self.emitir(nivel + 1, "break")
+                elif i < destino <= hi:
+                    anterior = destino - 1
+                    fim = None
+                    if anterior > i and self.nomes[anterior] == "DSVI":
+                        fim = self.alvo(anterior)
+                        if not destino <= fim <= hi:
+                            fim = None
+                    self.emitir(nivel, f"if {cond.condicao()}:")
+                    if fim is None:
+                        self.bloco(i + 1, destino, nivel + 1, laco)
+                        i = destino
+                    else:
+                        self.bloco(i + 1, anterior, nivel + 1, laco)
+                        if fim > destino:
+                            self.emitir(nivel, "else:")
+                            self.bloco(destino, fim, nivel + 1, laco)
+                        i = fim
+                    emitiu = True
+                    continue
+                else:
+                    raise NaoEstruturado(f"DSVF não estruturado em {i}")
+                emitiu = True
+
+            elif nome == "DSVI":
+                destino = self.alvo(i)
+                if pilha:
+                    raise NaoEstruturado(f"DSVI com pilha não vazia em {i}")
+                if destino == i + 1:
+                    pass
+                elif laco is not None and destino == laco[1]:
+                    self.emitir(nivel, "break")
+                    emitiu = True
+                elif laco is not None and destino == laco[0]:
+                    self.emitir(nivel, "continue")
+                    emitiu = True
+                else:
+                    raise NaoEstruturado(f"DSVI não estruturado em {i}")
+
+            else:
+                raise NaoEstruturado(f"instrução desconhecida em {i}: {nome}")
+
+            i += 1
+
+        if pilha:
+            raise NaoEstruturado(f"pilha não vazia ao fim do bloco [{lo}, {hi})")
+        if not emitiu:
+            self.emitir(nivel, "pass")
+
+    def traduzir(self):
+        self.emitir(0, "def programa(ler, escrever):")
+        for k in range(self.variaveis):
+            self.emitir(1, f"v{k} = 0")
+        self.bloco(0, len(self.nomes), 1)
+        return "\n".join(self.linhas) + "\n"
+
+
+def traduzir(C):
+    """Devolve o código-fonte Python de programa(ler, escrever) equivalente a C."""
+    if isinstance(C, ObjetoBinario):
+        C = [C[i] for i in range(len(C))]
+    return Tradutor(C).traduzir()
+
+def compilar_funcao(C):
+    """Traduz C e compila com compile(); levanta NaoEstruturado se não der."""
+    fonte = traduzir(C)
+    escopo = {}
+    exec(compile(fonte, "<maqhipo>", "exec"), escopo)
+    return escopo["programa"]
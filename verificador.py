@@ -0,0 +1,89 @@
+import argparse
+
+from codigo_objeto import COM_ARGUMENTO, OP, OPCODES, alturas_de_pilha, profundidade_maxima
+
+
+# Verificador de código objeto da MaqHipo
+#
+# Confere, na carga, o que o motor de despacho assume sem checar durante
+# a execução:
+#   - toda instrução existe e tem o argumento do tipo certo
+#   - todo DSVF/DSVI desvia para um endereço em [0, nº de instruções]
+#   - todo endereço de CRVL/ARMZ está abaixo do total alocado por ALME
+#   - a pilha de operandos nunca fica negativa e tem a mesma altura em
+#     todos os caminhos que chegam a um mesmo endereço
+#   - as dimensões do cabeçalho, se houver, cobrem as calculadas
+# Programas aprovados rodam no caminho rápido, sem checagens por passo.
+
+NOMES_COM_ARGUMENTO = {OPCODES[op] for op in COM_ARGUMENTO}
+
+
+def verificar(C):
+    """Devolve a lista de problemas encontrados em C (vazia se o código é válido)."""
+    nomes = [C[i].instrucao for i in range(len(C))]
+    args = [C[i].argumento for i in range(len(C))]
+    fim = len(nomes)
+    problemas = []
+
+    memoria = 0
+    for nome, arg in zip(nomes, args):
+        if nome == 'ALME' and isinstance(arg, int) and not isinstance(arg, bool):
+            memoria += max(arg, 0)
+
+    for i, (nome, arg) in enumerate(zip(nomes, args)):
+        if nome not in OP:
+            problemas.append(f"endereço {i}: instrução desconhecida {nome!r}")
+        elif nome not in NOMES_COM_ARGUMENTO:
+            if arg is not None:
+                problemas.append(f"endereço {i}: {nome} não tem argumento, recebeu {arg!r}")
+        elif nome == 'CRCT':
+            if isinstance(arg, bool) or not isinstance(arg, (int, float)):
+                problemas.append(f"endereço {i}: CRCT com constante inválida {arg!r}")
+        elif isinstance(arg, bool) or not isinstance(arg, int):
+            problemas.append(f"endereço {i}: {nome} com argumento inválido {arg!r}")
+        elif nome == 'ALME' and arg < 0:
+            problemas.append(f"endereço {i}: ALME com tamanho negativo {arg}")
+        elif nome in ('DSVI', 'DSVF') and not 0 <= arg <= fim:
+            problemas.append(f"endereço {i}: {nome} para {arg}, fora de [0, {fim}]")
+        elif nome in ('CRVL', 'ARMZ') and not 0 <= arg < memoria:
+            problemas.append(f"endereço {i}: {nome} {arg} fora da memória alocada ({memoria} posições)")
+
+    # A análise de pilha precisa de instruções e desvios válidos
+    if problemas:
+        return problemas
+    try:
+        alturas_de_pilha(nomes, args)
+    except Exception as e:
+        problemas.append(str(e))
+        return problemas
+
+    cab_memoria = getattr(C, "memoria", None)
+    cab_pilha = getattr(C, "pilha", None)
+    if cab_memoria is not None and cab_memoria < memoria:
+        problemas.append(f"cabeçalho declara memória {cab_memoria}, mas ALME aloca {memoria}")
+    if cab_pilha is not None:
+        pilha = profundidade_maxima(nomes, args)
+        if cab_pilha < pilha:
+            problemas.append(f"cabeçalho declara pilha {cab_pilha}, mas a altura máxima é {pilha}")
+    return problemas
+
+
+if __name__ == "__main__":
+    from p2 import carregar_programa
+
+    parser = argparse.ArgumentParser(description="Verifica código objeto da MaqHipo.")
+    parser.add_argument("arquivos", nargs="+", help="código objeto (texto ou binário)")
+    opcoes = parser.parse_args()
+
+    falhas = 0
+    for arquivo in opcoes.arquivos:
+        problemas = verificar(carregar_programa(arquivo))
+        if problemas:
+            falhas += 1
+            print(f"{arquivo}: {len(problemas)} problema(s)")
+            for problema in problemas:
+                print(f"    {problema}")
+        else:
+            print(f"{arquivo}: ok")
+    if falhas:
+        exit(1)